@@ -0,0 +1,174 @@
+import operator
+import warnings
+from array import array
+from itertools import repeat
+from typing import Any, List
+
+from unordered_multiset import UnorderedMultiset
+
+try:
+    import numpy as np
+except ImportError:  # Без NumPy векторы хранятся в array('q'), операции идут через map
+    np = None
+
+
+# Без NumPy каждая операция проходит весь вектор длины словаря, поэтому
+# мультимножество, занимающее меньше SPARSE_DENSITY словаря из не менее чем
+# SPARSE_MIN_VOCABULARY элементов, помечается предупреждением: для него
+# словарное представление UnorderedMultiset быстрее
+SPARSE_DENSITY = 0.1
+SPARSE_MIN_VOCABULARY = 1000
+
+
+def _zeros(length: int):
+    """Нулевой вектор кратностей"""
+    if np is not None:
+        return np.zeros(length, dtype=np.int64)
+    return array('q', bytes(8 * length))
+
+
+class Vocabulary:
+    """Общий словарь элементов: ключ элемента -> номер позиции в векторе кратностей"""
+
+    def __init__(self, elements: List[Any] = None):
+        self.keys = []
+        self.indices = {}
+        for element in elements or []:
+            self.index(element)
+
+    def index(self, element: Any) -> int:
+        """Номер элемента (новый элемент добавляется в конец словаря)"""
+        key = UnorderedMultiset._key(element)
+        index = self.indices.get(key)
+        if index is None:
+            index = self.indices[key] = len(self.keys)
+            self.keys.append(key)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class DenseMultiset:
+    """Мультимножество в виде вектора кратностей над общим словарем
+
+    Кратность элемента с номером i хранится в counts[i]: массив NumPy int64,
+    если NumPy установлен, иначе array('q'). Операции над мультимножествами
+    одного словаря выполняются поэлементно над векторами (в NumPy - векторными
+    операциями, без NumPy - через map со встроенными функциями), поэтому их
+    время пропорционально длине словаря, а не числу элементов множества.
+    Представление выгодно для множеств, занимающих заметную часть словаря.
+    """
+
+    __slots__ = ("vocabulary", "counts")
+
+    def __init__(self, vocabulary: Vocabulary, counts=None):
+        self.vocabulary = vocabulary
+        self.counts = counts if counts is not None else _zeros(0)
+
+    @classmethod
+    def from_multiset(cls, multiset: UnorderedMultiset, vocabulary: Vocabulary) -> 'DenseMultiset':
+        """Перевод из словарного представления
+
+        Элементы, которых нет в словаре, добавляются в его конец, поэтому
+        построенные раньше векторы того же словаря становятся короче словаря.
+        Такой вектор дополняется нулями один раз - при первой операции после
+        роста словаря, - и дальше используется без копирования.
+        """
+        indices = [(vocabulary.index(elem), count) for elem, count in multiset.elements.items()]
+        if np is None and len(vocabulary) >= SPARSE_MIN_VOCABULARY and \
+                len(indices) < SPARSE_DENSITY * len(vocabulary):
+            warnings.warn(f"Мультимножество занимает {len(indices)} из {len(vocabulary)} позиций словаря: "
+                          f"без NumPy операции над ним медленнее, чем над UnorderedMultiset",
+                          RuntimeWarning, stacklevel=2)
+
+        counts = _zeros(len(vocabulary))
+        for index, count in indices:
+            counts[index] = count
+        return cls(vocabulary, counts)
+
+    def to_multiset(self) -> UnorderedMultiset:
+        """Перевод в словарное представление"""
+        result = UnorderedMultiset()
+        keys = self.vocabulary.keys
+        if np is not None:
+            for index in np.flatnonzero(self.counts).tolist():
+                result.elements[keys[index]] = int(self.counts[index])
+            return result
+        for key, count in zip(keys, self.counts):
+            if count:
+                result.elements[key] = count
+        return result
+
+    def _grow(self):
+        """Дополнение вектора нулями до длины словаря (после роста словаря)"""
+        missing = len(self.vocabulary) - len(self.counts)
+        if missing > 0:
+            if np is not None:
+                self.counts = np.concatenate((self.counts, _zeros(missing)))
+            else:
+                self.counts.frombytes(bytes(8 * missing))
+
+    def _aligned(self, other: 'DenseMultiset') -> tuple:
+        """Векторы обоих мультимножеств длины словаря"""
+        if self.vocabulary is not other.vocabulary:
+            raise ValueError("Мультимножества построены над разными словарями")
+        self._grow()
+        other._grow()
+        return self.counts, other.counts
+
+    def __add__(self, other: 'DenseMultiset') -> 'DenseMultiset':
+        """Сумма кратностей"""
+        first, second = self._aligned(other)
+        if np is not None:
+            return DenseMultiset(self.vocabulary, first + second)
+        return DenseMultiset(self.vocabulary, array('q', map(operator.add, first, second)))
+
+    def __sub__(self, other: 'DenseMultiset') -> 'DenseMultiset':
+        """Разность кратностей (не меньше нуля)"""
+        first, second = self._aligned(other)
+        if np is not None:
+            return DenseMultiset(self.vocabulary, np.maximum(first - second, 0))
+        differences = map(operator.sub, first, second)
+        return DenseMultiset(self.vocabulary, array('q', map(max, differences, repeat(0))))
+
+    def __mul__(self, other: 'DenseMultiset') -> 'DenseMultiset':
+        """Пересечение (минимум кратностей)"""
+        first, second = self._aligned(other)
+        if np is not None:
+            return DenseMultiset(self.vocabulary, np.minimum(first, second))
+        return DenseMultiset(self.vocabulary, array('q', map(min, first, second)))
+
+    def __or__(self, other: 'DenseMultiset') -> 'DenseMultiset':
+        """Объединение (максимум кратностей)"""
+        first, second = self._aligned(other)
+        if np is not None:
+            return DenseMultiset(self.vocabulary, np.maximum(first, second))
+        return DenseMultiset(self.vocabulary, array('q', map(max, first, second)))
+
+    def count(self, element: Any) -> int:
+        """Подсчет количества вхождений элемента"""
+        index = self.vocabulary.indices.get(UnorderedMultiset._key(element))
+        if index is None or index >= len(self.counts):
+            return 0
+        return int(self.counts[index])
+
+    def __len__(self) -> int:
+        """Общее количество элементов (с учетом кратности)"""
+        if np is not None:
+            return int(self.counts.sum())
+        return sum(self.counts)
+
+    def __eq__(self, other: 'DenseMultiset') -> bool:
+        if not isinstance(other, DenseMultiset) or self.vocabulary is not other.vocabulary:
+            return False
+        first, second = self._aligned(other)
+        if np is not None:
+            return bool(np.array_equal(first, second))
+        return first == second
+
+    def __str__(self) -> str:
+        return str(self.to_multiset())
+
+    def __repr__(self) -> str:
+        return f"DenseMultiset('{str(self)}')"
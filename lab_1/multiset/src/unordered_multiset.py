@@ -1,15 +1,101 @@
+import multiprocessing
+import os
 import re
+import weakref
 from collections import defaultdict
 from typing import Union, List, Dict, Any
 import itertools
 
 
+# Операции свертки набора мультимножеств
+FOLD_SUM = "sum"
+FOLD_INTERSECT = "intersect"
+FOLD_UNION_MAX = "union_max"
+
+# Число кусков файла на один процесс в fold_file (куски разного размера по работе
+# выравниваются тем, что свободный процесс берет следующий кусок)
+FOLD_SHARDS_PER_WORKER = 4
+
+# Пропуск пробелов и поиск конца простого элемента при разборе строки
+_SPACES = re.compile(r'\s*')
+_ATOM_END = re.compile(r'[,{}]')
+
+
+class MultisetSyntaxError(ValueError):
+    """Ошибка разбора строкового представления мультимножества"""
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} (позиция {position})")
+        self.position = position
+
+
+class FrozenMultiset:
+    """Неизменяемое мультимножество, которое служит ключом вложенного мультимножества
+
+    Экземпляры интернируются: для одинакового содержимого существует один
+    объект, хеш вычисляется один раз при создании, поэтому поиск вложенного
+    мультимножества в словаре не перестраивает строковый ключ.
+    """
+
+    __slots__ = ("items", "hash", "__weakref__")
+
+    # Содержимое (frozenset пар (элемент, кратность)) -> единственный узел
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, items=()):
+        items = frozenset(items)
+        node = cls._interned.get(items)
+        if node is None:
+            node = super().__new__(cls)
+            node.items = items
+            node.hash = hash(items)
+            cls._interned[items] = node
+        return node
+
+    def __reduce__(self):
+        # При распаковке (например, в другом процессе) узел интернируется заново
+        return FrozenMultiset, (tuple(self.items),)
+
+    def __hash__(self) -> int:
+        return self.hash
+
+    def __eq__(self, other) -> bool:
+        """Структурное сравнение (для интернированных узлов - сравнение ссылок)"""
+        if self is other:
+            return True
+        if not isinstance(other, FrozenMultiset):
+            return False
+        return self.hash == other.hash and self.items == other.items
+
+    def __len__(self) -> int:
+        """Общее количество элементов (с учетом кратности)"""
+        return sum(count for _, count in self.items)
+
+    def thaw(self) -> 'UnorderedMultiset':
+        """Изменяемая копия"""
+        result = UnorderedMultiset()
+        for elem, count in self.items:
+            result.elements[elem] = count
+        return result
+
+    def __str__(self) -> str:
+        """Строковое представление (элементы упорядочены для однозначности)"""
+        items = []
+        for elem, count in sorted((str(elem), count) for elem, count in self.items):
+            items.extend([elem] * count)
+        return "{" + ", ".join(items) + "}"
+
+    def __repr__(self) -> str:
+        return f"FrozenMultiset('{str(self)}')"
+
+
 class UnorderedMultiset:
     def __init__(self, data: Union[str, List[Any]] = None):
         """
         Инициализация мультимножества из строки или списка
         """
         self.elements = defaultdict(int)
+        self._frozen = None  # Кэш freeze(), сбрасывается при изменении
 
         if data is not None:
             if isinstance(data, str):
@@ -18,92 +104,109 @@ class UnorderedMultiset:
                 self._parse_list(data)
 
     def _parse_string(self, s: str):
-        """Парсинг строки вида {a, a, c, {a, b, b}, {}, {a, {c, c}}}"""
-        s = s.strip()
-        if s.startswith('{') and s.endswith('}'):
-            s = s[1:-1].strip()
+        """Парсинг строки вида {a, a, c, {a, b, b}, {}, {a, {c, c}}} за один проход
 
-        if not s:
-            return
-
-        elements = self._split_elements(s)
-
-        for elem in elements:
-            elem = elem.strip()
-            if elem.startswith('{') and elem.endswith('}'):
-                nested = UnorderedMultiset(elem)
-                self.add(nested)
-            elif elem:
-                self.add(elem)
-
-    def _split_elements(self, s: str) -> List[str]:
-        """Разбивает строку на элементы, учитывая вложенные множества"""
-        elements = []
-        current = ""
-        brace_count = 0
-
-        for char in s:
-            if char == '{':
-                brace_count += 1
-                current += char
+        Строка просматривается по индексам без копирования подстрок (кроме
+        самих элементов), вложенность обрабатывается стеком, а не рекурсией,
+        поэтому время линейно и глубина не ограничена. Внешние скобки можно
+        опустить, пустые элементы между запятыми пропускаются.
+        При ошибке выбрасывается MultisetSyntaxError с позицией в строке.
+        """
+        n = len(s)
+        i = _SPACES.match(s, 0).end()
+        braced = i < n and s[i] == '{'
+        if braced:
+            i += 1
+        stack = [self]
+        openings = [i - 1]  # Позиции открывающих скобок для сообщений об ошибках
+        expect_separator = False
+
+        while True:
+            i = _SPACES.match(s, i).end()
+            if i == n:
+                if len(stack) > 1 or braced:
+                    raise MultisetSyntaxError("незакрытая скобка '{'", openings[-1])
+                return
+
+            char = s[i]
+            if char == ',':
+                expect_separator = False
+                i += 1
             elif char == '}':
-                brace_count -= 1
-                current += char
-            elif char == ',' and brace_count == 0:
-                elements.append(current.strip())
-                current = ""
+                if len(stack) == 1:
+                    if not braced:
+                        raise MultisetSyntaxError("лишняя скобка '}'", i)
+                    i = _SPACES.match(s, i + 1).end()
+                    if i != n:
+                        raise MultisetSyntaxError("лишние символы после '}'", i)
+                    return
+                nested = stack.pop()
+                openings.pop()
+                stack[-1].add(nested)
+                expect_separator = True
+                i += 1
+            elif expect_separator:
+                raise MultisetSyntaxError("ожидалась ',' или '}'", i)
+            elif char == '{':
+                stack.append(UnorderedMultiset())
+                openings.append(i)
+                i += 1
             else:
-                current += char
-
-        if current.strip():
-            elements.append(current.strip())
-
-        return elements
+                match = _ATOM_END.search(s, i)
+                j = match.start() if match else n
+                if j < n and s[j] == '{':
+                    raise MultisetSyntaxError("скобка '{' внутри элемента", j)
+                stack[-1].add(s[i:j].rstrip())
+                expect_separator = True
+                i = j
 
     def _parse_list(self, lst: List[Any]):
         """Парсинг из списка"""
         for item in lst:
-            if isinstance(item, (list, UnorderedMultiset)):
+            if isinstance(item, list):
                 self.add(UnorderedMultiset(item))
+            elif isinstance(item, (UnorderedMultiset, FrozenMultiset)):
+                self.add(item)
             else:
                 self.add(str(item))
 
-    def add(self, element: Any):
-        """Добавление элемента в мультимножество"""
+    @staticmethod
+    def _key(element: Any):
+        """Ключ элемента в словаре: строка или FrozenMultiset для вложенного множества"""
         if isinstance(element, UnorderedMultiset):
-            key = element._get_hash_key()
-        else:
-            key = str(element)
+            return element.freeze()
+        if isinstance(element, FrozenMultiset):
+            return element
+        return str(element)
 
-        self.elements[key] += 1
+    def add(self, element: Any):
+        """Добавление элемента в мультимножество"""
+        self.elements[self._key(element)] += 1
+        self._frozen = None
 
     def remove(self, element: Any):
         """Удаление одного вхождения элемента"""
-        if isinstance(element, UnorderedMultiset):
-            key = element._get_hash_key()
-        else:
-            key = str(element)
+        key = self._key(element)
 
         if key in self.elements and self.elements[key] > 0:
             self.elements[key] -= 1
             if self.elements[key] == 0:
                 del self.elements[key]
+            self._frozen = None
 
     def count(self, element: Any) -> int:
         """Подсчет количества вхождений элемента"""
-        if isinstance(element, UnorderedMultiset):
-            key = element._get_hash_key()
-        else:
-            key = str(element)
+        return self.elements.get(self._key(element), 0)
 
-        return self.elements.get(key, 0)
+    def freeze(self) -> FrozenMultiset:
+        """Неизменяемая интернированная форма (вычисляется один раз до следующего изменения)
 
-    def _get_hash_key(self) -> str:
-        """Генерация ключа для хеширования множества"""
-        items = []
-        for elem, count in sorted(self.elements.items()):
-            items.append(f"{elem}:{count}")
-        return "{" + ",".join(items) + "}"
+        Кэш сбрасывают add и remove. Словарь elements после вызова freeze()
+        нельзя изменять напрямую: кэш об этом не узнает и устареет.
+        """
+        if self._frozen is None:
+            self._frozen = FrozenMultiset(self.elements.items())
+        return self._frozen
 
     def __contains__(self, element: Any) -> bool:
         """Проверка наличия элемента"""
@@ -158,6 +261,7 @@ class UnorderedMultiset:
         """Оператор += для объединения"""
         for elem, count in other.elements.items():
             self.elements[elem] += count
+        self._frozen = None
         return self
 
     def __isub__(self, other: 'UnorderedMultiset') -> 'UnorderedMultiset':
@@ -167,6 +271,7 @@ class UnorderedMultiset:
                 self.elements[elem] = max(0, self.elements[elem] - count)
                 if self.elements[elem] == 0:
                     del self.elements[elem]
+        self._frozen = None
         return self
 
     def __mul__(self, other: 'UnorderedMultiset') -> 'UnorderedMultiset':
@@ -188,20 +293,67 @@ class UnorderedMultiset:
         
         for elem in elements_to_remove:
             del self.elements[elem]
+        self._frozen = None
         return self
 
+    @classmethod
+    def _from_counts(cls, counts: Dict[Any, int]) -> 'UnorderedMultiset':
+        """Мультимножество из готового словаря кратностей"""
+        result = cls()
+        result.elements.update(counts)
+        return result
+
+    @classmethod
+    def sum_all(cls, multisets) -> 'UnorderedMultiset':
+        """Сумма всех мультимножеств за один проход (без промежуточных результатов)"""
+        return cls._from_counts(_fold_counts(FOLD_SUM, (ms.elements for ms in multisets)))
+
+    @classmethod
+    def intersect_all(cls, multisets) -> 'UnorderedMultiset':
+        """Пересечение всех мультимножеств (минимум кратностей)"""
+        return cls._from_counts(_fold_counts(FOLD_INTERSECT, (ms.elements for ms in multisets)))
+
+    @classmethod
+    def union_max_all(cls, multisets) -> 'UnorderedMultiset':
+        """Объединение всех мультимножеств (максимум кратностей)"""
+        return cls._from_counts(_fold_counts(FOLD_UNION_MAX, (ms.elements for ms in multisets)))
+
+    @classmethod
+    def fold_file(cls, path: str, operation: str = FOLD_SUM, workers: int = None) -> 'UnorderedMultiset':
+        """Свертка мультимножеств из текстового файла (по одному в строке) в пуле процессов
+
+        Файл делится по байтам на workers * FOLD_SHARDS_PER_WORKER кусков;
+        каждый процесс сам читает свой кусок, разбирает строки и сворачивает
+        их, поэтому текущий процесс пересылает только границы кусков и получает
+        частичные результаты, которые сливаются по мере готовности. Заданий
+        столько же, сколько кусков, поэтому очередь пула не растет с размером
+        файла. Выигрыш дает параллельный разбор строк: уже построенные
+        в памяти мультимножества быстрее свернуть через sum_all и аналоги.
+        При workers=1 файл читается в текущем процессе.
+        """
+        if operation not in (FOLD_SUM, FOLD_INTERSECT, FOLD_UNION_MAX):
+            raise ValueError(f"Неизвестная операция свертки: '{operation}'")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        size = os.path.getsize(path)
+        if workers == 1:
+            return cls._from_counts(_fold_counts(operation, _read_shard(path, 0, size)))
+
+        shards = workers * FOLD_SHARDS_PER_WORKER
+        bounds = [size * index // shards for index in range(shards + 1)]
+        tasks = [(operation, path, low, high) for low, high in zip(bounds, bounds[1:]) if low < high]
+        with multiprocessing.Pool(workers) as pool:
+            partials = (counts for counts in pool.imap_unordered(_fold_shard, tasks) if counts is not None)
+            return cls._from_counts(_fold_counts(operation, partials))
+
     def power_set(self) -> List['UnorderedMultiset']:
         """Построение булеана - множества всех подмножеств"""
         # Создаем список всех элементов с учетом кратности
         all_elements = []
         for elem, count in self.elements.items():
             for i in range(count):
-                if elem.startswith('{') and elem.endswith('}'):
-                    # Для вложенных множеств создаем новый объект
-                    nested_ms = UnorderedMultiset(elem)
-                    all_elements.append(nested_ms)
-                else:
-                    all_elements.append(elem)
+                # Вложенные множества хранятся как FrozenMultiset и добавляются без копирования
+                all_elements.append(elem)
         
         # Генерируем все возможные подмножества
         result = []
@@ -218,16 +370,150 @@ class UnorderedMultiset:
         
         return result
 
+    def iter_power_set(self, size: int = None, count_only: bool = False):
+        """Ленивый булеан без повторов: различные подмультимножества
+
+        Подмультимножество задается кратностью 0..count каждого элемента,
+        поэтому {a x 20, b x 20} дает 21 * 21 = 441 подмножество. size - только
+        подмножества с этим числом элементов. При count_only=True вместо
+        генератора возвращается число подмножеств (без их построения).
+        """
+        items = list(self.elements.items())
+        counts = [count for _, count in items]
+        if count_only:
+            return _count_bounded(counts, size)
+        return self._iter_sub_multisets(items, counts, size)
+
+    @staticmethod
+    def _iter_sub_multisets(items: list, counts: list, size: int):
+        """Генератор подмультимножеств по наборам кратностей"""
+        for chosen in _iter_bounded(counts, size):
+            subset = UnorderedMultiset()
+            for (elem, _), count in zip(items, chosen):
+                if count:
+                    subset.elements[elem] = count
+            yield subset
+
     def __str__(self) -> str:
         """Строковое представление"""
         items = []
         for elem, count in self.elements.items():
             for _ in range(count):
-                if elem.startswith('{') and elem.endswith('}'):
-                    items.append(elem)
-                else:
-                    items.append(elem)
+                items.append(elem)
         return "{" + ", ".join(str(item) for item in items) + "}"
 
     def __repr__(self) -> str:
         return f"UnorderedMultiset('{str(self)}')"
+
+
+def _iter_bounded(counts: List[int], size: int = None):
+    """Наборы кратностей (c1, ..., cn), 0 <= ci <= counts[i], с суммой size (None - любой)"""
+    if size is None:
+        yield from itertools.product(*(range(count + 1) for count in counts))
+        return
+
+    n = len(counts)
+    suffix = [0] * (n + 1)  # suffix[i] - наибольшая сумма кратностей с i-го элемента
+    for i in range(n - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + counts[i]
+    if not 0 <= size <= suffix[0]:
+        return
+
+    # Наборы перебираются в лексикографическом порядке: хвост после
+    # увеличенной позиции каждый раз заполняется наименьшим набором
+    chosen = [0] * n
+    remaining = size
+    for k in range(n):
+        chosen[k] = max(0, remaining - suffix[k + 1])
+        remaining -= chosen[k]
+
+    while True:
+        yield tuple(chosen)
+        tail = 0
+        for j in range(n - 1, -1, -1):
+            if tail > 0 and chosen[j] < counts[j]:
+                break
+            tail += chosen[j]
+        else:
+            return
+
+        chosen[j] += 1
+        remaining = tail - 1
+        for k in range(j + 1, n):
+            chosen[k] = max(0, remaining - suffix[k + 1])
+            remaining -= chosen[k]
+
+
+def _count_bounded(counts: List[int], size: int = None) -> int:
+    """Число наборов кратностей из _iter_bounded (без перебора)"""
+    if size is None:
+        total = 1
+        for count in counts:
+            total *= count + 1
+        return total
+    if size < 0:
+        return 0
+
+    # ways[s] - число наборов для просмотренных элементов с суммой s
+    ways = [1] + [0] * size
+    for count in counts:
+        prefix = list(itertools.accumulate(ways, initial=0))
+        ways = [prefix[s + 1] - prefix[max(0, s - count)] for s in range(size + 1)]
+    return ways[size]
+
+
+def _fold_counts(operation: str, counters) -> Dict[Any, int]:
+    """Свертка словарей кратностей одной операцией за один проход"""
+    iterator = iter(counters)
+    if operation == FOLD_SUM:
+        result = defaultdict(int)
+        for counts in iterator:
+            for elem, count in counts.items():
+                result[elem] += count
+        return dict(result)
+
+    first = next(iterator, None)
+    if first is None:
+        return {}
+    result = dict(first)
+    if operation == FOLD_UNION_MAX:
+        for counts in iterator:
+            for elem, count in counts.items():
+                if count > result.get(elem, 0):
+                    result[elem] = count
+    elif operation == FOLD_INTERSECT:
+        for counts in iterator:
+            result = {elem: min(count, counts[elem]) for elem, count in result.items() if elem in counts}
+            if not result:
+                break  # Пересечение уже пусто
+    else:
+        raise ValueError(f"Неизвестная операция свертки: '{operation}'")
+    return result
+
+
+def _read_shard(path: str, start: int, end: int):
+    """Словари кратностей мультимножеств из строк файла, начинающихся в байтах [start, end)"""
+    with open(path, 'rb') as stream:
+        if start > 0:
+            # Строка, начавшаяся до start, относится к предыдущему куску
+            stream.seek(start - 1)
+            stream.readline()
+        position = stream.tell()
+        while position < end:
+            line = stream.readline()
+            if not line:
+                return
+            position += len(line)
+            text = line.decode('utf-8').strip()
+            if text:
+                yield UnorderedMultiset(text).elements
+
+
+def _fold_shard(task: tuple):
+    """Свертка куска файла в процессе-исполнителе (None - в куске нет мультимножеств)"""
+    operation, path, start, end = task
+    counters = _read_shard(path, start, end)
+    first = next(counters, None)
+    if first is None:
+        return None  # Пустой кусок не должен обнулять пересечение
+    return _fold_counts(operation, itertools.chain((first,), counters))
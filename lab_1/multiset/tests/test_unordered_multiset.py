@@ -1,11 +1,15 @@
 import unittest
+import warnings
 import sys
 import os
 
 # Добавляем путь к src для импорта
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from unordered_multiset import UnorderedMultiset
+from unordered_multiset import (UnorderedMultiset, FrozenMultiset, MultisetSyntaxError,
+                                 FOLD_SUM, FOLD_INTERSECT, FOLD_UNION_MAX)
+import dense_multiset
+from dense_multiset import Vocabulary, DenseMultiset
 
 
 class TestUnorderedMultiset(unittest.TestCase):
@@ -298,6 +302,148 @@ class TestUnorderedMultiset(unittest.TestCase):
         nested = UnorderedMultiset("{x, y}")
         self.assertEqual(result.count(nested), 1)  # min(2, 1)
 
+    def test_frozen_interning(self):
+        """Тест интернирования вложенных множеств"""
+        ms1 = UnorderedMultiset("{a, {c, c}, {b, {d}}}")
+        ms2 = UnorderedMultiset("{{{d}, b}, {c, c}, a}")
+
+        self.assertIs(ms1.freeze(), ms2.freeze())
+        self.assertEqual(hash(ms1.freeze()), hash(ms2.freeze()))
+        self.assertIn(UnorderedMultiset("{b, {d}}").freeze(), ms1)
+        self.assertEqual(str(UnorderedMultiset("{c, c}").freeze()), "{c, c}")
+        self.assertEqual(ms1.freeze().thaw(), ms1)
+
+    def test_freeze_after_change(self):
+        """Тест сброса неизменяемой формы после изменения множества"""
+        nested = UnorderedMultiset("{x}")
+        ms = UnorderedMultiset()
+        ms.add(nested)
+
+        nested.add("y")
+        self.assertEqual(ms.count(nested), 0)
+        self.assertEqual(ms.count(UnorderedMultiset("{x}")), 1)
+        self.assertIsInstance(nested.freeze(), FrozenMultiset)
+        self.assertEqual(str(ms), "{{x}}")
+
+    def test_list_with_multiset_items(self):
+        """Тест построения из списка с вложенными множествами в готовом виде"""
+        nested = UnorderedMultiset("{x, {y}}")
+        ms = UnorderedMultiset(["a", nested, nested.freeze(), ["x", ["y"]]])
+
+        self.assertEqual(ms.count(nested), 3)
+        self.assertEqual(ms.count("a"), 1)
+        self.assertEqual(ms, UnorderedMultiset("{a, {x, {y}}, {x, {y}}, {x, {y}}}"))
+
+    def test_parse_syntax_errors(self):
+        """Тест сообщений о синтаксических ошибках с позицией"""
+        cases = [("{a, {b, c", 4), ("{a, {b}", 0), ("{a}}", 3), ("{a{b}}", 2), ("{{a} b}", 5), ("a}", 1)]
+        for text, position in cases:
+            with self.subTest(text=text):
+                with self.assertRaises(MultisetSyntaxError) as context:
+                    UnorderedMultiset(text)
+                self.assertEqual(context.exception.position, position)
+                self.assertIn(f"позиция {position}", str(context.exception))
+
+    def test_parse_deep_nesting(self):
+        """Тест разбора глубоко вложенных множеств без рекурсии"""
+        depth = 5000
+        ms = UnorderedMultiset("{" * depth + "x" + "}" * depth)
+        self.assertEqual(len(ms), 1)
+        self.assertEqual(UnorderedMultiset("{a,, b , }"), UnorderedMultiset("a, b"))
+
+    def test_iter_power_set(self):
+        """Тест ленивого булеана без повторяющихся подмножеств"""
+        ms = UnorderedMultiset("{a, a, b}")
+        subsets = sorted(str(subset) for subset in ms.iter_power_set())
+        self.assertEqual(subsets, ["{a, a, b}", "{a, a}", "{a, b}", "{a}", "{b}", "{}"])
+
+        pairs = [str(subset) for subset in ms.iter_power_set(size=2)]
+        self.assertEqual(sorted(pairs), ["{a, a}", "{a, b}"])
+        self.assertEqual(list(ms.iter_power_set(size=4)), [])
+
+    def test_iter_power_set_count_only(self):
+        """Тест подсчета подмножеств без их построения"""
+        ms = UnorderedMultiset(["a"] * 20 + ["b"] * 20)
+        self.assertEqual(ms.iter_power_set(count_only=True), 441)
+        self.assertEqual(ms.iter_power_set(size=20, count_only=True), 21)
+        self.assertEqual(ms.iter_power_set(size=30, count_only=True), 11)
+        self.assertEqual(sum(1 for _ in ms.iter_power_set(size=30)), 11)
+
+    def test_dense_operations(self):
+        """Тест операций над векторами кратностей общего словаря"""
+        vocabulary = Vocabulary()
+        ms1 = UnorderedMultiset("{a, a, b, c, {x}}")
+        ms2 = UnorderedMultiset("{a, b, b, d}")
+        dense1 = DenseMultiset.from_multiset(ms1, vocabulary)
+        dense2 = DenseMultiset.from_multiset(ms2, vocabulary)
+
+        self.assertEqual((dense1 + dense2).to_multiset(), ms1 + ms2)
+        self.assertEqual((dense1 - dense2).to_multiset(), ms1 - ms2)
+        self.assertEqual((dense1 * dense2).to_multiset(), ms1 * ms2)
+        self.assertEqual((dense1 | dense2).count("b"), 2)
+        self.assertEqual((dense1 | dense2).count("a"), 2)
+        self.assertEqual(dense1.count(UnorderedMultiset("{x}")), 1)
+        self.assertEqual(len(dense1 + dense2), len(ms1) + len(ms2))
+
+        with self.assertRaises(ValueError):
+            dense1 + DenseMultiset.from_multiset(ms2, Vocabulary())
+
+    def test_dense_vocabulary_growth(self):
+        """Тест: вектор, построенный до роста словаря, дополняется один раз и дальше не копируется"""
+        vocabulary = Vocabulary()
+        dense1 = DenseMultiset.from_multiset(UnorderedMultiset("{a, b}"), vocabulary)
+        dense2 = DenseMultiset.from_multiset(UnorderedMultiset("{b, c, d}"), vocabulary)
+        self.assertEqual((len(dense1.counts), len(dense2.counts)), (2, 4))
+
+        self.assertEqual((dense1 * dense2).to_multiset(), UnorderedMultiset("{b}"))
+        counts = dense1.counts
+        self.assertEqual(len(counts), 4)
+        self.assertEqual((dense1 | dense2).to_multiset(), UnorderedMultiset("{a, b, c, d}"))
+        self.assertIs(dense1.counts, counts)
+
+    @unittest.skipIf(dense_multiset.np is not None, "с NumPy разреженные векторы не помечаются")
+    def test_dense_sparse_warning(self):
+        """Тест предупреждения о разреженном множестве без NumPy"""
+        vocabulary = Vocabulary([str(i) for i in range(2000)])
+        with self.assertWarns(RuntimeWarning):
+            DenseMultiset.from_multiset(UnorderedMultiset("{1, 2}"), vocabulary)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            DenseMultiset.from_multiset(UnorderedMultiset([str(i) for i in range(500)]), vocabulary)
+
+    def test_fold_all(self):
+        """Тест свертки набора мультимножеств за один проход"""
+        sets = [UnorderedMultiset("{a, a, b, {x}}"), UnorderedMultiset("{a, b, b, {x}}"),
+                UnorderedMultiset("{a, c, {x}, {x}}")]
+
+        self.assertEqual(UnorderedMultiset.sum_all(sets), sets[0] + sets[1] + sets[2])
+        self.assertEqual(UnorderedMultiset.intersect_all(sets), sets[0] * sets[1] * sets[2])
+        self.assertEqual(UnorderedMultiset.union_max_all(sets),
+                         UnorderedMultiset("{a, a, b, b, c, {x}, {x}}"))
+        self.assertTrue(UnorderedMultiset.intersect_all([]).is_empty())
+
+    def test_fold_file(self):
+        """Тест свертки мультимножеств из файла кусками в пуле процессов"""
+        import tempfile
+
+        sets = [UnorderedMultiset([str(i % 7)] * (i % 3 + 1) + [["x"]]) for i in range(200)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sets.txt")
+            with open(path, "w", encoding="utf-8") as stream:
+                stream.write("\n".join(str(ms) for ms in sets) + "\n\n")
+            empty_path = os.path.join(directory, "empty.txt")
+            open(empty_path, "w").close()
+
+            for operation, fold in ((FOLD_SUM, UnorderedMultiset.sum_all),
+                                    (FOLD_INTERSECT, UnorderedMultiset.intersect_all),
+                                    (FOLD_UNION_MAX, UnorderedMultiset.union_max_all)):
+                for workers in (1, 2):
+                    with self.subTest(operation=operation, workers=workers):
+                        self.assertEqual(UnorderedMultiset.fold_file(path, operation, workers), fold(sets))
+                        self.assertTrue(UnorderedMultiset.fold_file(empty_path, operation, workers).is_empty())
+
+            with self.assertRaises(ValueError):
+                UnorderedMultiset.fold_file(path, "product")
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
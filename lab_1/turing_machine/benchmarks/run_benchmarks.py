@@ -0,0 +1,266 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.tape import Tape
+from core.array_tape import ArrayTape
+from core.program import Program
+from core.machine import TuringMachine
+from workloads import WORKLOADS, generate_program_text
+
+
+# Замеры производительности пакета turing_machine.
+# Запуск из каталога turing_machine:
+#   python benchmarks/run_benchmarks.py                  - замер и сравнение с baseline.json
+#   python benchmarks/run_benchmarks.py --save-baseline  - сохранение нового baseline.json
+# Метрики с суффиксом steps_per_second должны расти, остальные (время, память) - уменьшаться.
+# Результаты сравниваются с сохраненными с допуском --tolerance; при регрессии код возврата 1.
+# Скорость и время сравниваются не в абсолютных единицах, а относительно эталонной
+# нагрузки на чистом Python (measure_reference), замеряемой сразу после каждой серии:
+# в baseline.json хранятся отношения, поэтому скорость машины и ее загрузка в них сокращаются.
+# Отношения безразмерны и сохраняются под своими именами (RELATIVE_SUFFIXES):
+# steps_per_second -> speed_rel (скорость / эталон), lookup_ns -> lookup_rel и
+# seconds -> time_rel (время * скорость эталона).
+# Отношения не убирают кратковременные помехи (другие процессы во время одной серии):
+# на загруженной одноядерной машине отдельные метрики между запусками расходятся
+# до 40%, поэтому допуск по умолчанию 0.5 - сравнение ловит только крупные регрессии.
+# Для более точной проверки нужна ненагруженная машина, --rounds побольше и меньший допуск.
+# Память (peak_memory_kb) от скорости машины не зависит и сравнивается как есть.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+RELATIVE_SUFFIXES = {"steps_per_second": "speed_rel", "lookup_ns": "lookup_rel", "seconds": "time_rel"}
+TAPE_CLASSES = (Tape, ArrayTape)
+
+
+ENGINES = ("run", "run_accelerated", "run_compiled")
+
+
+def run_engine(tm: TuringMachine, engine: str, max_steps: int):
+    """Выполнение программы выбранным способом"""
+    if engine == "run":
+        tm.run(max_steps, accelerate=False)
+    elif engine == "run_accelerated":
+        tm.run(max_steps, accelerate=True)
+    else:
+        tm.run_compiled(max_steps)
+
+
+def measure_steps_per_second(program: Program, data: str, max_steps: int, tape_class: type,
+                             engine: str, min_time: float) -> float:
+    """Скорость выполнения (шагов в секунду) за серию запусков не короче min_time"""
+    steps = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        tm = TuringMachine(tape_class(data), program, tape_class)
+        started = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            run_engine(tm, engine, max_steps)
+        elapsed += time.perf_counter() - started
+        steps += tm.step_count
+    return steps / elapsed
+
+
+def measure_reference(min_time: float) -> float:
+    """Скорость эталонной нагрузки (переходов по таблице в секунду)
+
+    Цикл поиска по словарю с ключом-кортежем похож на шаг машины, но не
+    использует код пакета, поэтому его скорость зависит только от машины
+    и интерпретатора.
+    """
+    table = {(state, symbol): (state + 1) % 7 for state in range(7) for symbol in "01"}
+    operations = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        started = time.perf_counter()
+        state = 0
+        for index in range(100_000):
+            state = table[(state, "01"[index & 1])]
+        elapsed += time.perf_counter() - started
+        operations += 100_000
+    return operations / elapsed
+
+
+def measure_lookup_ns(program: Program, min_time: float) -> float:
+    """Среднее время поиска правила (наносекунд на вызов get_rule)"""
+    keys = [(rule.current_state, rule.read_symbol) for rule in program.rules]
+    get_rule = program.get_rule
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < min_time:
+        for state, symbol in keys:
+            get_rule(state, symbol)
+        calls += len(keys)
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def measure_peak_memory_kb(program: Program, data: str, max_steps: int, tape_class: type) -> float:
+    """Пиковый объем памяти, выделенной при создании ленты и выполнении программы"""
+    tracemalloc.start()
+    try:
+        tm = TuringMachine(tape_class(data), program, tape_class)
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps, accelerate=False)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def time_action(action) -> float:
+    """Время одного выполнения действия, с"""
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+def load_actions(directory: str) -> list:
+    """Загрузка, компиляция и чтение двоичной формы большой программы: (имя метрики, действие)"""
+    text = generate_program_text(2000, "01ab")
+    program = Program()
+    program.load_from_stream(io.StringIO(text))
+    path = os.path.join(directory, "program.tmb")
+    program.save_binary(path)
+    return [("load/text_10000_rules/seconds", lambda: Program().load_from_stream(io.StringIO(text))),
+            ("load/compile_10000_rules/seconds", program.compile),
+            ("load/binary_10000_rules/seconds", lambda: Program.load_binary(path))]
+
+
+def relative_key(key: str) -> str:
+    """Имя отношения к эталону для метрики key (память сохраняется под своим именем)"""
+    prefix, _, suffix = key.rpartition("/")
+    return f"{prefix}/{RELATIVE_SUFFIXES[suffix]}" if suffix in RELATIVE_SUFFIXES else key
+
+
+class Collector:
+    """Класс, накапливающий абсолютные результаты и их отношения к эталону"""
+
+    def __init__(self, min_time: float, rounds: int):
+        self.min_time = min_time
+        self.rounds = rounds
+        self.results = {}
+        self.relative = {}
+
+    def measure(self, key: str, measure):
+        """Лучший результат метрики за rounds серий и лучшее отношение к эталону
+
+        Эталон замеряется сразу после каждой серии, поэтому изменение скорости
+        машины между сериями сокращается в отношении.
+        """
+        higher_is_better = key.endswith("steps_per_second")
+        pick = max if higher_is_better else min
+        for _ in range(self.rounds):
+            value = measure()
+            reference = measure_reference(self.min_time / 2)
+            ratio = value / reference if higher_is_better else value * reference
+            self.results[key] = pick(self.results.get(key, value), value)
+            self.relative[relative_key(key)] = pick(self.relative.get(relative_key(key), ratio), ratio)
+
+    def record(self, key: str, value: float):
+        """Метрика, не зависящая от скорости машины (память)"""
+        self.results[key] = self.relative[key] = value
+
+
+def collect(min_time: float, rounds: int, only: str = None) -> tuple:
+    """Сбор всех метрик: словари 'нагрузка/лента/метрика' -> значение и 'нагрузка/лента/отношение' -> отношение"""
+    collector = Collector(min_time, rounds)
+
+    # Прогревочный запуск, чтобы первая нагрузка не измерялась на «холодном» интерпретаторе
+    name, create_program, data, max_steps = WORKLOADS[0]
+    measure_steps_per_second(create_program(), data, max_steps, Tape, "run", min_time)
+    measure_reference(min_time)
+
+    for name, create_program, data, max_steps in WORKLOADS:
+        if only and only not in name:
+            continue
+        program = create_program()
+        collector.measure(f"{name}/lookup_ns", lambda: measure_lookup_ns(program, min_time))
+        for tape_class in TAPE_CLASSES:
+            prefix = f"{name}/{tape_class.__name__}"
+            for engine in ENGINES:
+                collector.measure(f"{prefix}/{engine}/steps_per_second", lambda: measure_steps_per_second(
+                    program, data, max_steps, tape_class, engine, min_time))
+            collector.record(f"{prefix}/peak_memory_kb",
+                             measure_peak_memory_kb(program, data, max_steps, tape_class))
+        print(f"{name}: готово", file=sys.stderr)
+
+    if not only:
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            for key, action in load_actions(directory):
+                collector.measure(key, lambda: time_action(action))
+    return collector.results, collector.relative
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Поиск регрессий по отношениям: список (метрика, значение в baseline, текущее значение)"""
+    regressions = []
+    for key, value in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if key.endswith("speed_rel"):
+            regressed = value < expected * (1 - tolerance)
+        else:
+            regressed = value > expected * (1 + tolerance)
+        if regressed:
+            regressions.append((key, expected, value))
+    return regressions
+
+
+def print_results(results: dict, relative: dict, baseline: dict):
+    """Вывод таблицы абсолютных результатов с изменением отношений относительно baseline"""
+    width = max(len(key) for key in results)
+    for key, value in results.items():
+        line = f"{key:<{width}}  {value:>14.1f}" if value >= 1 else f"{key:<{width}}  {value:>14.6f}"
+        expected = baseline.get(relative_key(key))
+        if expected:
+            line += f"  ({(relative[relative_key(key)] / expected - 1) * 100:+.1f}%)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности машины Тьюринга")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл с базовыми результатами")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как базовые")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="допустимое отклонение (доля)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="минимальное время одной серии, с")
+    parser.add_argument("--rounds", type=int, default=3, help="число серий (берется лучшая)")
+    parser.add_argument("--only", help="замерять только нагрузки, содержащие строку")
+    parser.add_argument("--output", help="файл для записи результатов в JSON")
+    args = parser.parse_args()
+
+    results, relative = collect(args.min_time, args.rounds, args.only)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as stream:
+            baseline = json.load(stream)
+
+    print_results(results, relative, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as stream:
+            json.dump(results, stream, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as stream:
+            json.dump(relative, stream, indent=2, sort_keys=True)
+        print(f"Базовые результаты сохранены: {args.baseline}")
+        return 0
+
+    regressions = compare(relative, baseline, args.tolerance)
+    for key, expected, value in regressions:
+        print(f"Регрессия: {key}: {expected:.6g} -> {value:.6g}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
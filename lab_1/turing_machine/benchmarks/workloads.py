@@ -0,0 +1,96 @@
+import random
+
+from core.rule import Rule
+from core.program import Program
+from demo import create_inverter_program, create_copier_program
+
+
+# Пустой символ в таблицах правил ниже обозначается "_" и заменяется на пробел
+
+
+def build_program(lines: list, initial_state: str = "q0", final_states: set = None) -> Program:
+    """Создание программы из строк вида 'q0 a q1 b R'"""
+    program = Program()
+    for line in lines:
+        parts = [part.replace("_", " ") for part in line.split()]
+        program.add_rule(Rule(*parts))
+    program.initial_state = initial_state
+    program.final_states = final_states if final_states else set()
+    return program
+
+
+def create_busy_beaver_3() -> Program:
+    """Трехсостоятельный «усердный бобер» (13 шагов, 6 единиц)"""
+    return build_program(["A _ B 1 R", "A 1 C 1 L",
+                          "B _ A 1 L", "B 1 B 1 R",
+                          "C _ B 1 L", "C 1 H 1 S"], "A", {"H"})
+
+
+def create_busy_beaver_4() -> Program:
+    """Четырехсостоятельный «усердный бобер» (107 шагов, 13 единиц)"""
+    return build_program(["A _ B 1 R", "A 1 B 1 L",
+                          "B _ A 1 L", "B 1 C _ L",
+                          "C _ H 1 R", "C 1 D 1 L",
+                          "D _ D 1 R", "D 1 A _ R"], "A", {"H"})
+
+
+def create_unary_addition() -> Program:
+    """Сложение в унарной записи: 111+11 -> 11111"""
+    return build_program(["q0 1 q0 1 R", "q0 + q1 1 R",
+                          "q1 1 q1 1 R", "q1 _ q2 _ L",
+                          "q2 1 qf _ S"], "q0", {"qf"})
+
+
+def create_unary_multiplication() -> Program:
+    """Умножение в унарной записи: 11*111= -> 11*111=111111 (x, y - отмеченные единицы)"""
+    return build_program(["q0 1 q1 x R", "q0 * qf * S",
+                          "q1 1 q1 1 R", "q1 * q2 * R",
+                          "q2 y q2 y R", "q2 1 q3 y R", "q2 = q5 = L",
+                          "q3 1 q3 1 R", "q3 = q3 = R", "q3 _ q4 1 L",
+                          "q4 1 q4 1 L", "q4 = q7 = L",
+                          "q7 1 q7 1 L", "q7 y q2 y R",
+                          "q5 y q5 1 L", "q5 * q6 * L",
+                          "q6 1 q6 1 L", "q6 x q0 x R"], "q0", {"qf"})
+
+
+def create_counter() -> Program:
+    """Двоичный счетчик (не останавливается)"""
+    return build_program(["q0 0 q0 0 R", "q0 1 q0 1 R", "q0 _ q1 _ L",
+                          "q1 1 q1 0 L", "q1 0 q2 1 R", "q1 _ q2 1 R",
+                          "q2 0 q2 0 R", "q2 1 q2 1 R", "q2 _ q1 _ L"])
+
+
+def generate_program_text(states: int, symbols: str, seed: int = 1) -> str:
+    """Текст случайной программы с правилом для каждой пары (состояние, символ)
+
+    Правила для пустого символа записываются без читаемого символа: 'q0 -> q1 a R'.
+    """
+    rng = random.Random(seed)
+    lines = ["initial q0"]
+    for state in range(states):
+        for symbol in symbols + " ":
+            lines.append(f"q{state} {symbol} -> q{rng.randrange(states)} "
+                         f"{rng.choice(symbols)} {rng.choice('LR')}".replace("  ", " "))
+    return "\n".join(lines) + "\n"
+
+
+def create_generated_program(states: int = 2000, symbols: str = "01ab") -> Program:
+    """Большая случайная программа (загружается из текста)"""
+    import io
+
+    program = Program()
+    program.load_from_stream(io.StringIO(generate_program_text(states, symbols)))
+    return program
+
+
+# Нагрузки для замеров: (имя, функция создания программы, начальная лента, число шагов)
+WORKLOADS = [
+    ("inverter", create_inverter_program, "10" * 50_000, 200_000),
+    ("copier", create_copier_program, "10" * 50_000, 200_000),
+    ("busy_beaver_3", create_busy_beaver_3, "", 1_000),
+    ("busy_beaver_4", create_busy_beaver_4, "", 1_000),
+    ("unary_addition", create_unary_addition, "1" * 50_000 + "+" + "1" * 50_000, 200_000),
+    ("unary_multiplication", create_unary_multiplication, "1" * 12 + "*" + "1" * 12 + "=", 1_000_000),
+    ("counter", create_counter, "0", 200_000),
+    ("generated", create_generated_program, "01ab" * 100, 200_000),
+]
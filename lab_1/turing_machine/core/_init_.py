@@ -1,6 +1,18 @@
 from .tape import Tape
+from .array_tape import ArrayTape
+from .packed_tape import PackedTape, choose_tape_class
 from .rule import Rule
 from .program import Program
+from .compiled import CompiledProgram
 from .machine import TuringMachine
+from .batch import run_batch, BatchResult
+from .multitape import MultiTapeRule, MultiTapeProgram, MultiTapeTuringMachine
+from .nondeterministic import NondeterministicProgram, NondeterministicTuringMachine
+from .scheduler import MachineScheduler
+from .fuzz import fuzz_program, FuzzReport
 
-__all__ = ['Tape', 'Rule', 'Program', 'TuringMachine']
+__all__ = ['Tape', 'ArrayTape', 'PackedTape', 'choose_tape_class', 'Rule', 'Program',
+           'CompiledProgram', 'TuringMachine',
+           'run_batch', 'BatchResult', 'MultiTapeRule', 'MultiTapeProgram', 'MultiTapeTuringMachine',
+           'NondeterministicProgram', 'NondeterministicTuringMachine',
+           'MachineScheduler', 'fuzz_program', 'FuzzReport']
@@ -0,0 +1,364 @@
+import re
+
+from . import binary_format
+from .tape import EXPORT_CHUNK, VISIBLE_LIMIT
+
+
+# Наибольшее число планов прохода, хранимых лентой
+SWEEP_PLAN_CACHE = 64
+
+
+class ArrayTape:
+    """Класс, реализующий ленту машины Тьюринга на двух растущих массивах
+
+    Правая половина хранит ячейки 0, 1, 2, ..., левая - ячейки -1, -2, ...
+    Символы кодируются номерами в таблице symbols (номер 0 - пустой символ),
+    поэтому каждая ячейка занимает один байт.
+    """
+
+    MAX_SYMBOLS = 256
+
+    def __init__(self, initial_data: str = "", blank_symbol: str = " "):
+        self.blank_symbol = blank_symbol
+        self.symbols = [blank_symbol]
+        self.symbol_codes = {blank_symbol: 0}
+        self.right = bytearray(self._code(symbol) for symbol in initial_data)
+        self.left = bytearray()
+        self._sweep_plans = {}
+
+        self.head_position = 0
+        self.min_position = 0
+        self.max_position = len(initial_data) - 1 if initial_data else 0
+
+    def _code(self, symbol: str) -> int:
+        """Получение кода символа (новый символ добавляется в таблицу)"""
+        code = self.symbol_codes.get(symbol)
+        if code is None:
+            code = len(self.symbols)
+            if code >= self.MAX_SYMBOLS:
+                raise ValueError(f"Слишком много различных символов на ленте: {code + 1}")
+            self.symbols.append(symbol)
+            self.symbol_codes[symbol] = code
+        return code
+
+    def read(self) -> str:
+        """Чтение символа под головкой"""
+        position = self.head_position
+        if position >= 0:
+            cells = self.right
+        else:
+            cells = self.left
+            position = -position - 1
+
+        if position < len(cells):
+            return self.symbols[cells[position]]
+        return self.blank_symbol
+
+    def write(self, symbol: str):
+        """Запись символа под головкой"""
+        code = self._code(symbol)
+        position = self.head_position
+        if position >= 0:
+            cells = self.right
+        else:
+            cells = self.left
+            position = -position - 1
+
+        if position >= len(cells):
+            if code == 0:
+                # Пустой символ за пределами массива уже записан
+                self._update_bounds()
+                return
+            # Амортизированный рост: массив как минимум удваивается
+            cells.extend(bytes(max(position + 1 - len(cells), len(cells))))
+        cells[position] = code
+
+        self._update_bounds()
+
+    def _update_bounds(self):
+        """Обновление границ после записи"""
+        if self.head_position < self.min_position:
+            self.min_position = self.head_position
+        elif self.head_position > self.max_position:
+            self.max_position = self.head_position
+
+    def move_left(self):
+        """Движение головки влево"""
+        self.head_position -= 1
+        if self.head_position < self.min_position:
+            self.min_position = self.head_position
+
+    def move_right(self):
+        """Движение головки вправо"""
+        self.head_position += 1
+        if self.head_position > self.max_position:
+            self.max_position = self.head_position
+
+    def get_symbol(self, position: int) -> str:
+        """Получение символа в указанной позиции без движения головки"""
+        if position >= 0:
+            cells = self.right
+        else:
+            cells = self.left
+            position = -position - 1
+
+        if position < len(cells):
+            return self.symbols[cells[position]]
+        return self.blank_symbol
+
+    def sweep(self, mapping: dict, direction: str, limit: int) -> int:
+        """Проход головки по серии ячеек за одну операцию (до limit шагов)
+
+        mapping - словарь символ -> записываемый символ для петлевых правил
+        (q, a) -> (q, b, direction) одного состояния. Конец серии ищется
+        регулярным выражением по байтам, запись выполняется через translate.
+        Возвращает количество шагов.
+        """
+        if limit <= 0:
+            return 0
+        plan = self._get_sweep_plan(mapping)
+        start = self.head_position
+
+        if direction == 'R':
+            if start >= 0:
+                count = self._sweep_up(self.right, start, limit, plan)
+            else:
+                index = -start - 1
+                count = self._sweep_down(self.left, index, limit, plan)
+                if count == index + 1 and count < limit:
+                    count += self._sweep_up(self.right, 0, limit - count, plan)
+            position = start + count
+        else:
+            if start < 0:
+                count = self._sweep_up(self.left, -start - 1, limit, plan)
+            else:
+                count = self._sweep_down(self.right, start, limit, plan)
+                if count == start + 1 and count < limit:
+                    count += self._sweep_up(self.left, 0, limit - count, plan)
+            position = start - count
+
+        # Обновление границ (головка прошла от start до position)
+        self.head_position = position
+        if count:
+            low, high = (start, position) if position > start else (position, start)
+            if low < self.min_position:
+                self.min_position = low
+            if high > self.max_position:
+                self.max_position = high
+
+        return count
+
+    def _get_sweep_plan(self, mapping: dict) -> tuple:
+        """Таблица перекодировки и шаблон конца серии для mapping (с кешированием)"""
+        # Ключ - содержимое mapping, поэтому новые словари с теми же правилами
+        # используют уже построенный план
+        key = frozenset(mapping.items())
+        plan = self._sweep_plans.get(key)
+        if plan is not None:
+            return plan
+
+        table = bytearray(range(256))
+        codes = []
+        for symbol, new_symbol in mapping.items():
+            code = self._code(symbol)
+            table[code] = self._code(new_symbol)
+            codes.append(code)
+
+        stop_pattern = re.compile(b"[^" + b"".join(re.escape(bytes((code,))) for code in codes) + b"]")
+        plan = (bytes(table), stop_pattern, 0 in codes, table[0])
+        if len(self._sweep_plans) >= SWEEP_PLAN_CACHE:
+            del self._sweep_plans[next(iter(self._sweep_plans))]  # Самый старый план
+        self._sweep_plans[key] = plan
+        return plan
+
+    @staticmethod
+    def _sweep_up(cells: bytearray, index: int, limit: int, plan: tuple) -> int:
+        """Проход по массиву в сторону увеличения индекса"""
+        table, stop_pattern, blank_in_run, blank_code = plan
+        run = 0
+        length = len(cells)
+        if index < length:
+            end = min(length, index + limit)
+            match = stop_pattern.search(cells, index, end)
+            stop = match.start() if match else end
+            run = stop - index
+            if run:
+                cells[index:stop] = cells[index:stop].translate(table)
+            if match or run == limit:
+                return run
+            index = stop
+
+        # Дальше конца массива лента пустая
+        if not blank_in_run:
+            return run
+        rest = limit - run
+        if blank_code:
+            cells.extend(bytes(index + rest - len(cells)))
+            cells[index:index + rest] = bytes((blank_code,)) * rest
+        return limit
+
+    @staticmethod
+    def _sweep_down(cells: bytearray, index: int, limit: int, plan: tuple) -> int:
+        """Проход по массиву в сторону уменьшения индекса (не дальше нуля)"""
+        table, stop_pattern, blank_in_run, blank_code = plan
+        run = 0
+        length = len(cells)
+        if index >= length:
+            # Ячейки от конца массива до index пустые
+            if not blank_in_run:
+                return 0
+            run = min(index - length + 1, limit)
+            if blank_code:
+                cells.extend(bytes(index + 1 - length))
+                cells[index - run + 1:index + 1] = bytes((blank_code,)) * run
+            if run == limit:
+                return run
+            index -= run
+
+        # Поиск назад кусками растущей длины, чтобы стоимость была O(длины серии)
+        size = 64
+        while True:
+            low = max(0, index - min(size, limit - run) + 1)
+            chunk = cells[low:index + 1]
+            chunk.reverse()
+            match = stop_pattern.search(chunk)
+            found = match.start() if match else len(chunk)
+            if found:
+                cells[index - found + 1:index + 1] = cells[index - found + 1:index + 1].translate(table)
+            run += found
+            index -= found
+            if match or run == limit or low == 0:
+                return run
+            size *= 4
+
+    def content_key(self):
+        """Хешируемое представление содержимого ленты (без учета головки)"""
+        # Коды символов зависят только от порядка их появления на этой ленте
+        return bytes(self.left).rstrip(b"\0"), bytes(self.right).rstrip(b"\0")
+
+    def get_segment(self, start: int, end: int) -> bytearray:
+        """Коды символов в позициях [start, end)"""
+        result = bytearray()
+        if start < 0:
+            # Позиции start..-1 хранятся в левой половине в обратном порядке
+            low_index = -min(end, 0)
+            high_index = -start
+            part = self.left[low_index:high_index]
+            part += bytes(high_index - low_index - len(part))
+            part.reverse()
+            result += part
+        if end > 0:
+            right_start = max(start, 0)
+            part = self.right[right_start:end]
+            part += bytes(end - right_start - len(part))
+            result += part
+        return result
+
+    def set_segment(self, start: int, codes: bytes):
+        """Запись кодов символов в позиции [start, start + len(codes)) (головка не двигается)"""
+        end = start + len(codes)
+        if start < 0:
+            # Позиции start..-1 хранятся в левой половине в обратном порядке
+            low_index = -min(end, 0)
+            high_index = -start
+            if len(self.left) < high_index:
+                self.left.extend(bytes(high_index - len(self.left)))
+            part = bytearray(codes[:high_index - low_index])
+            part.reverse()
+            self.left[low_index:high_index] = part
+        if end > 0:
+            right_start = max(start, 0)
+            if len(self.right) < end:
+                self.right.extend(bytes(end - len(self.right)))
+            self.right[right_start:end] = codes[right_start - start:]
+
+        if end > start:
+            self.min_position = min(self.min_position, start)
+            self.max_position = max(self.max_position, end - 1)
+
+    def get_cells(self, start: int, end: int) -> list:
+        """Символы в позициях [start, end)"""
+        return list(map(self.symbols.__getitem__, self.get_segment(start, end)))
+
+    def set_cells(self, start: int, symbols):
+        """Запись символов подряд, начиная с позиции start (головка не двигается)"""
+        self.set_segment(start, bytes(map(self._code, symbols)))
+
+    def snapshot(self) -> bytes:
+        """Снимок ленты в двоичном формате (отрезок от min_position до max_position)"""
+        cells = self.get_segment(self.min_position, self.max_position + 1)
+        return binary_format.pack_tape(self.symbols, self.head_position, self.min_position,
+                                       self.max_position, self.min_position, bytes(cells))
+
+    def restore(self, data: bytes):
+        """Восстановление ленты из снимка (коды ячеек копируются без перекодирования)"""
+        fields = binary_format.unpack_tape(data)
+        start = fields["start"]
+        cells = fields["cells"]
+        if len(fields["symbols"]) > self.MAX_SYMBOLS:
+            raise ValueError(f"Слишком много различных символов на ленте: {len(fields['symbols'])}")
+
+        self.symbols = fields["symbols"]
+        self.symbol_codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        self.blank_symbol = self.symbols[0]
+        self._sweep_plans = {}
+
+        # Ячейки с отрицательными позициями уходят в левую половину
+        split = min(max(-start, 0), len(cells))
+        left = bytearray(cells[:split])
+        left.reverse()
+        self.left = bytearray(-start - split) + left if start < 0 else bytearray()
+        self.right = bytearray(max(start, 0)) + bytearray(cells[split:])
+
+        self.head_position = fields["head_position"]
+        self.min_position = fields["min_position"]
+        self.max_position = fields["max_position"]
+
+    def get_visible_tape(self, padding: int = 5) -> str:
+        """Получение видимой части ленты с padding символами вокруг головки
+
+        Показывается посещенная часть ленты, но не дальше max(VISIBLE_LIMIT, padding)
+        ячеек от головки: читаются только ячейки окна.
+        """
+        head = self.head_position
+        limit = max(VISIBLE_LIMIT, padding)
+        start = max(min(self.min_position, head - padding), head - limit)
+        end = min(max(self.max_position, head + padding), head + limit)
+        before = "".join(self.iter_cells(start, head))
+        after = "".join(self.iter_cells(head + 1, end + 1))
+        return f"{before}[{self.get_symbol(head)}]{after}"
+
+    def get_window(self, padding: int = 5) -> str:
+        """Окно ленты из padding ячеек по обе стороны от головки (остальная лента не читается)"""
+        head = self.head_position
+        symbols = self.symbols
+        before = "".join(map(symbols.__getitem__, self.get_segment(head - padding, head)))
+        after = "".join(map(symbols.__getitem__, self.get_segment(head + 1, head + padding + 1)))
+        return f"{before}[{self.get_symbol(head)}]{after}"
+
+    def iter_cells(self, start: int = None, end: int = None):
+        """Генератор символов в позициях [start, end) (по умолчанию - посещенная часть ленты)"""
+        start = self.min_position if start is None else start
+        end = self.max_position + 1 if end is None else end
+        for chunk_start in range(start, end, EXPORT_CHUNK):
+            segment = self.get_segment(chunk_start, min(chunk_start + EXPORT_CHUNK, end))
+            yield from map(self.symbols.__getitem__, segment)
+
+    def export(self, stream, start: int = None, end: int = None) -> int:
+        """Запись символов позиций [start, end) в поток кусками, возвращает число ячеек"""
+        start = self.min_position if start is None else start
+        end = self.max_position + 1 if end is None else end
+        for chunk_start in range(start, end, EXPORT_CHUNK):
+            segment = self.get_segment(chunk_start, min(chunk_start + EXPORT_CHUNK, end))
+            stream.write("".join(map(self.symbols.__getitem__, segment)))
+        return max(0, end - start)
+
+    def load_from_stream(self, stream):
+        """Загрузка состояния ленты из потока"""
+        data = stream.read().strip()
+        self.right = bytearray(self._code(symbol) for symbol in data)
+        self.left = bytearray()
+
+        self.head_position = 0
+        self.min_position = 0
+        self.max_position = len(data) - 1 if data else 0
@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+from typing import Iterable, Iterator
+
+from .tape import Tape
+from .packed_tape import choose_tape_class
+from .program import Program
+from .compiled import CompiledProgram
+from .machine import TuringMachine
+
+
+# Причины завершения выполнения на ленте
+STATUS_HALTED = "halted"
+STATUS_LOOPED = "looped"
+STATUS_BUDGET_EXCEEDED = "budget_exceeded"
+
+
+class BatchResult:
+    """Класс, описывающий результат выполнения программы на одной ленте"""
+
+    def __init__(self, index: int, tape: str, state: str, steps: int, status: str):
+        self.index = index  # Номер ленты во входной последовательности
+        self.tape = tape
+        self.state = state
+        self.steps = steps
+        self.status = status
+
+    def __repr__(self):
+        return (f"BatchResult(index={self.index}, tape='{self.tape}', state='{self.state}', "
+                f"steps={self.steps}, status='{self.status}')")
+
+
+def run_tape(program: Program, compiled: CompiledProgram, index: int, data: str,
+             max_steps: int, detect_loops: bool = False, tape_class: type = Tape) -> BatchResult:
+    """Выполнение программы на одной ленте без вывода сообщений"""
+    if tape_class is None:
+        tape_class = choose_tape_class(program.alphabet | set(data))
+    tm = TuringMachine(tape_class(data), program)
+    if detect_loops:
+        tm._run_detecting_loops(max_steps)
+    elif max_steps > 0:
+        tm._execute_compiled(max_steps, compiled)
+
+    if tm.is_halted:
+        status = STATUS_HALTED
+    elif tm.loop_detected:
+        status = STATUS_LOOPED
+    else:
+        status = STATUS_BUDGET_EXCEEDED
+
+    # Содержимое посещенной части ленты без пустых символов по краям
+    content = "".join(tm.get_tape_value(position)
+                      for position in range(tm.tape.min_position, tm.tape.max_position + 1))
+    return BatchResult(index, content.strip(tm.tape.blank_symbol), tm.current_state,
+                       tm.step_count, status)
+
+
+# Состояние процесса-исполнителя: программа передается один раз при его запуске
+_worker_args = None
+
+
+def _init_worker(program: Program, compiled: CompiledProgram, max_steps: int,
+                 detect_loops: bool, tape_class: type):
+    """Инициализация процесса-исполнителя"""
+    global _worker_args
+    _worker_args = (program, compiled, max_steps, detect_loops, tape_class)
+
+
+def _run_task(task: tuple) -> BatchResult:
+    """Выполнение одной задачи в процессе-исполнителе"""
+    program, compiled, max_steps, detect_loops, tape_class = _worker_args
+    index, data = task
+    return run_tape(program, compiled, index, data, max_steps, detect_loops, tape_class)
+
+
+def run_batch(program: Program, tapes: Iterable[str], max_steps: int = 1000,
+              workers: int = None, detect_loops: bool = False, tape_class: type = Tape,
+              chunksize: int = 16) -> Iterator[BatchResult]:
+    """Выполнение одной программы на множестве лент в пуле процессов
+
+    Программа компилируется один раз и передается каждому процессу при запуске.
+    Результаты выдаются по мере готовности (не обязательно в порядке лент),
+    номер ленты хранится в BatchResult.index. При workers=1 ленты выполняются
+    в текущем процессе. При tape_class=None класс ленты выбирается по алфавиту
+    программы и входного слова.
+    """
+    compiled = program.compile()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        for index, data in enumerate(tapes):
+            yield run_tape(program, compiled, index, data, max_steps, detect_loops, tape_class)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(program, compiled, max_steps, detect_loops, tape_class)) as pool:
+        yield from pool.imap_unordered(_run_task, enumerate(tapes), chunksize)
@@ -0,0 +1,192 @@
+import mmap
+import struct
+import sys
+from array import array
+
+
+# Двоичный формат скомпилированных программ и снимков ленты.
+# Программа: заголовок, таблица строк (состояния и символы), флаги конечных
+# состояний и упакованные таблицы next_state / write_symbol (int32) и move (int8).
+# Лента: заголовок с позициями, таблица символов и коды ячеек (0 - пустой символ)
+# для отрезка [start, start + count). При алфавите до 256 символов код занимает
+# байт (версия 1, резервное поле 0); иначе снимок пишется версией WIDE_TAPE_VERSION,
+# а в резервном поле заголовка хранится ширина кода в байтах (2 или 4), поэтому
+# старые версии чтения отвергают такой снимок, а не читают его неверно.
+# Числа записываются в порядке little-endian, таблицы выравниваются на 4 байта,
+# чтобы их можно было читать через mmap без копирования.
+PROGRAM_MAGIC = b"TMPG"
+TAPE_MAGIC = b"TMTP"
+FORMAT_VERSION = 1
+WIDE_TAPE_VERSION = 2
+
+# Типы массивов для кодов ячеек по ширине кода в байтах
+_CELL_TYPECODES = {1: 'B', 2: 'H', 4: 'I'}
+
+_PROGRAM_HEADER = struct.Struct("<4sHHIII")   # magic, версия, резерв, состояний, символов, начальное
+_TAPE_HEADER = struct.Struct("<4sHHqqqqQ")    # magic, версия, резерв, head, min, max, start, count
+_LENGTH = struct.Struct("<I")
+
+
+def pack_strings(strings: list) -> bytes:
+    """Упаковка списка строк: количество и строки UTF-8 с длиной"""
+    parts = [_LENGTH.pack(len(strings))]
+    for string in strings:
+        encoded = string.encode("utf-8")
+        parts.append(_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def unpack_strings(buffer, offset: int) -> tuple:
+    """Распаковка списка строк, возвращает (строки, новое смещение)"""
+    (count,) = _LENGTH.unpack_from(buffer, offset)
+    offset += _LENGTH.size
+    strings = []
+    for _ in range(count):
+        (length,) = _LENGTH.unpack_from(buffer, offset)
+        offset += _LENGTH.size
+        strings.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+        offset += length
+    return strings, offset
+
+
+def _align(offset: int) -> int:
+    """Выравнивание смещения на 4 байта"""
+    return (offset + 3) & ~3
+
+
+def _check_header(magic: bytes, version: int, expected_magic: bytes):
+    """Проверка сигнатуры и версии формата"""
+    if magic != expected_magic:
+        raise ValueError(f"Неверная сигнатура файла: {magic!r}")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия формата: {version}")
+
+
+def _to_little_endian(values: array) -> bytes:
+    """Байты массива в порядке little-endian"""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _table_view(buffer, offset: int, count: int, typecode: str):
+    """Таблица чисел из буфера: без копирования, если порядок байтов совпадает"""
+    raw = memoryview(buffer)[offset:offset + array(typecode).itemsize * count]
+    if sys.byteorder == "little":
+        return raw.cast(typecode)
+    values = array(typecode, raw.tobytes())
+    values.byteswap()
+    return values
+
+
+def pack_program(compiled) -> bytes:
+    """Упаковка скомпилированной программы"""
+    header = _PROGRAM_HEADER.pack(PROGRAM_MAGIC, FORMAT_VERSION, 0,
+                                  compiled.n_states, compiled.n_symbols, compiled.initial_state)
+    parts = [header, pack_strings(compiled.states), pack_strings(compiled.symbols),
+             bytes(compiled.final)]
+    offset = sum(len(part) for part in parts)
+    parts.append(bytes(_align(offset) - offset))
+    parts.append(_to_little_endian(array('i', compiled.next_state)))
+    parts.append(_to_little_endian(array('i', compiled.write_symbol)))
+    parts.append(bytes(array('b', compiled.move)))
+    return b"".join(parts)
+
+
+def unpack_program(buffer):
+    """Распаковка скомпилированной программы без копирования таблиц переходов"""
+    from .compiled import CompiledProgram
+
+    magic, version, _, n_states, n_symbols, initial_state = _PROGRAM_HEADER.unpack_from(buffer, 0)
+    _check_header(magic, version, PROGRAM_MAGIC)
+
+    offset = _PROGRAM_HEADER.size
+    states, offset = unpack_strings(buffer, offset)
+    symbols, offset = unpack_strings(buffer, offset)
+    final = bytearray(buffer[offset:offset + n_states])
+    offset = _align(offset + n_states)
+
+    size = n_states * n_symbols
+    next_state = _table_view(buffer, offset, size, 'i')
+    offset += 4 * size
+    write_symbol = _table_view(buffer, offset, size, 'i')
+    offset += 4 * size
+    move = memoryview(buffer)[offset:offset + size].cast('b')
+
+    return CompiledProgram.from_tables(states, symbols, initial_state, final,
+                                       next_state, write_symbol, move, buffer)
+
+
+def save_program(compiled, path: str):
+    """Сохранение скомпилированной программы в файл"""
+    with open(path, "wb") as stream:
+        stream.write(pack_program(compiled))
+
+
+def load_program(path: str):
+    """Загрузка скомпилированной программы из файла через mmap
+
+    Таблицы переходов не копируются и не превращаются в объекты Rule:
+    CompiledProgram ссылается на отображенную в память копию файла.
+    """
+    with open(path, "rb") as stream:
+        buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_COPY)
+    return unpack_program(buffer)
+
+
+def cell_typecode(symbol_count: int) -> str:
+    """Тип массива для кодов ячеек ленты с symbol_count символами"""
+    if symbol_count <= 256:
+        return 'B'
+    if symbol_count <= 65536:
+        return 'H'
+    return 'I'
+
+
+def pack_tape(symbols: list, head_position: int, min_position: int, max_position: int,
+              start: int, cells) -> bytes:
+    """Упаковка снимка ленты (symbols[0] - пустой символ, cells - коды символов)
+
+    cells - байты (код в байте) или array с типом из cell_typecode.
+    """
+    width = cells.itemsize if isinstance(cells, array) else 1
+    if width == 1:
+        header = _TAPE_HEADER.pack(TAPE_MAGIC, FORMAT_VERSION, 0, head_position,
+                                   min_position, max_position, start, len(cells))
+        data = bytes(cells)
+    else:
+        header = _TAPE_HEADER.pack(TAPE_MAGIC, WIDE_TAPE_VERSION, width, head_position,
+                                   min_position, max_position, start, len(cells))
+        data = _to_little_endian(cells)
+    return b"".join([header, pack_strings(symbols), data])
+
+
+def unpack_tape(data) -> dict:
+    """Распаковка снимка ленты, ячейки возвращаются без копирования (memoryview)
+
+    Поле width - ширина кода ячейки в байтах.
+    """
+    magic, version, width, head, low, high, start, count = _TAPE_HEADER.unpack_from(data, 0)
+    if magic == TAPE_MAGIC and version == WIDE_TAPE_VERSION:
+        if width not in _CELL_TYPECODES or width == 1:
+            raise ValueError(f"Неверная ширина кода ячейки: {width}")
+    else:
+        _check_header(magic, version, TAPE_MAGIC)
+        width = 1
+
+    symbols, offset = unpack_strings(data, _TAPE_HEADER.size)
+    if width == 1:
+        cells = memoryview(data)[offset:offset + count]
+    else:
+        cells = _table_view(data, offset, count, _CELL_TYPECODES[width])
+    return {
+        "symbols": symbols,
+        "head_position": head,
+        "min_position": low,
+        "max_position": high,
+        "start": start,
+        "width": width,
+        "cells": cells,
+    }
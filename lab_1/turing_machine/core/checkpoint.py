@@ -0,0 +1,166 @@
+import os
+import struct
+from array import array
+
+from . import binary_format
+
+
+# Файл контрольных точек: сигнатура и последовательность записей.
+# Полная запись (B) содержит программу, снимок ленты и состояние машины,
+# запись-дельта (D) - состояние машины и только измененный отрезок ленты.
+# При восстановлении к последней полной записи применяются все следующие дельты.
+CHECKPOINT_MAGIC = b"TMCK"
+FULL_RECORD = b"B"
+DELTA_RECORD = b"D"
+
+_RECORD = struct.Struct("<cQ")   # тип записи, длина
+_BLOB = struct.Struct("<Q")
+_META = struct.Struct("<QB")     # номер шага, флаг остановки
+
+
+def _pack_blobs(*blobs: bytes) -> bytes:
+    """Упаковка последовательности байтовых блоков с длинами"""
+    return b"".join(_BLOB.pack(len(blob)) + blob for blob in blobs)
+
+
+def _unpack_blobs(data, offset: int, end: int) -> list:
+    """Распаковка блоков до смещения end"""
+    blobs = []
+    while offset < end:
+        (length,) = _BLOB.unpack_from(data, offset)
+        offset += _BLOB.size
+        blobs.append(data[offset:offset + length])
+        offset += length
+    return blobs
+
+
+def _pack_meta(machine) -> bytes:
+    """Упаковка состояния машины"""
+    return _META.pack(machine.step_count, machine.is_halted) + \
+        binary_format.pack_strings([machine.current_state])
+
+
+def _pack_segment(machine, start: int, end: int) -> bytes:
+    """Снимок отрезка ленты [start, end] вместе с позициями головки и границ"""
+    tape = machine.tape
+    symbols = [tape.blank_symbol]
+    codes = {tape.blank_symbol: 0}
+    cells = []
+
+    for symbol in tape.get_cells(start, end + 1):
+        code = codes.get(symbol)
+        if code is None:
+            code = len(symbols)
+            symbols.append(symbol)
+            codes[symbol] = code
+        cells.append(code)
+
+    return binary_format.pack_tape(symbols, tape.head_position, tape.min_position, tape.max_position,
+                                   start, array(binary_format.cell_typecode(len(symbols)), cells))
+
+
+class CheckpointWriter:
+    """Класс, записывающий контрольные точки выполнения машины в файл
+
+    После compact_every дельт вместо очередной дельты записывается полная
+    контрольная точка, и файл заменяется атомарно, поэтому он не растет без предела.
+    """
+
+    def __init__(self, path: str, compiled, compact_every: int = 64):
+        self.path = path
+        self.compiled = compiled
+        self.compact_every = compact_every
+        self.delta_count = 0
+        self.stream = None
+
+    def write_full(self, machine):
+        """Запись полной контрольной точки"""
+        payload = _pack_blobs(_pack_meta(machine),
+                              binary_format.pack_program(self.compiled),
+                              machine.tape.snapshot())
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as stream:
+            stream.write(CHECKPOINT_MAGIC)
+            stream.write(_RECORD.pack(FULL_RECORD, len(payload)))
+            stream.write(payload)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+        self.close()
+        os.replace(temp_path, self.path)
+        self.stream = open(self.path, "ab")
+        self.delta_count = 0
+
+    def write_delta(self, machine, dirty: tuple = None):
+        """Запись дельты: состояние машины и отрезок ленты dirty = (начало, конец)"""
+        if self.stream is None or self.delta_count >= self.compact_every:
+            self.write_full(machine)
+            return
+
+        if dirty is None:
+            dirty = (machine.tape.head_position, machine.tape.head_position - 1)
+        payload = _pack_blobs(_pack_meta(machine), _pack_segment(machine, *dirty))
+        self.stream.write(_RECORD.pack(DELTA_RECORD, len(payload)))
+        self.stream.write(payload)
+        self.stream.flush()
+        self.delta_count += 1
+
+    def close(self):
+        """Закрытие файла"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+def load_checkpoint(path: str, tape_class: type) -> tuple:
+    """Чтение контрольной точки
+
+    Возвращает (программа, лента, состояние, номер шага, флаг остановки).
+    Недописанная последняя запись (например, после сбоя) пропускается.
+    """
+    with open(path, "rb") as stream:
+        data = stream.read()
+    if data[:len(CHECKPOINT_MAGIC)] != CHECKPOINT_MAGIC:
+        raise ValueError(f"Файл не является контрольной точкой: {path}")
+
+    program = tape = None
+    state, step_count, is_halted = None, 0, False
+    offset = len(CHECKPOINT_MAGIC)
+
+    while offset + _RECORD.size <= len(data):
+        kind, length = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        if offset + length > len(data):
+            break
+        blobs = _unpack_blobs(data, offset, offset + length)
+        offset += length
+
+        step_count, halted = _META.unpack_from(blobs[0], 0)
+        (state,), _ = binary_format.unpack_strings(blobs[0], _META.size)
+        is_halted = bool(halted)
+
+        if kind == FULL_RECORD:
+            program = binary_format.unpack_program(blobs[1]).to_program()
+            tape = tape_class()
+            tape.restore(blobs[2])
+        else:
+            _apply_segment(tape, blobs[1])
+
+    if program is None:
+        raise ValueError(f"В файле нет полной контрольной точки: {path}")
+    return program, tape, state, step_count, is_halted
+
+
+def _apply_segment(tape, data: bytes):
+    """Применение дельты к ленте"""
+    fields = binary_format.unpack_tape(data)
+    symbols = fields["symbols"]
+    start = fields["start"]
+
+    for i, code in enumerate(fields["cells"]):
+        tape.head_position = start + i
+        tape.write(symbols[code])
+
+    tape.head_position = fields["head_position"]
+    tape.min_position = fields["min_position"]
+    tape.max_position = fields["max_position"]
@@ -0,0 +1,173 @@
+from array import array
+
+from . import binary_format
+
+
+# Коды движения головки в скомпилированной программе
+MOVE_CODES = {'L': -1, 'R': 1, 'S': 0}
+DIRECTIONS = {code: direction for direction, code in MOVE_CODES.items()}
+
+
+class CompiledProgram:
+    """Класс, реализующий программу машины Тьюринга в целочисленном представлении
+
+    Состояния и символы заменяются небольшими целыми числами, а правила
+    хранятся в плоских массивах, индексируемых как state * n_symbols + symbol.
+    Отсутствие правила обозначается значением -1 в массиве next_state.
+    """
+
+    def __init__(self, states: list, symbols: list, initial_state: str, final_states: set):
+        self.states = list(states)
+        self.state_ids = {state: i for i, state in enumerate(self.states)}
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        size = len(self.states) * len(self.symbols)
+        self.next_state = array('i', [-1]) * size
+        self.write_symbol = array('i', [0]) * size
+        self.move = array('b', [0]) * size
+
+        self.final = bytearray(len(self.states))
+        self._buffer = None
+        self.initial_state = self.intern_state(initial_state)
+        for state in final_states:
+            self.final[self.intern_state(state)] = 1
+
+    @classmethod
+    def from_tables(cls, states: list, symbols: list, initial_state: int, final: bytearray,
+                    next_state, write_symbol, move, buffer=None) -> 'CompiledProgram':
+        """Создание программы из готовых таблиц (например, загруженных через mmap)"""
+        compiled = cls.__new__(cls)
+        compiled.states = list(states)
+        compiled.state_ids = {state: i for i, state in enumerate(compiled.states)}
+        compiled.symbols = list(symbols)
+        compiled.symbol_ids = {symbol: i for i, symbol in enumerate(compiled.symbols)}
+        compiled.next_state = next_state
+        compiled.write_symbol = write_symbol
+        compiled.move = move
+        compiled.final = final
+        compiled.initial_state = initial_state
+        compiled._buffer = buffer  # Отображение файла должно жить вместе с таблицами
+        return compiled
+
+    def __getstate__(self):
+        """Состояние для pickle: таблицы из mmap заменяются обычными массивами"""
+        state = self.__dict__.copy()
+        state["next_state"] = array('i', self.next_state)
+        state["write_symbol"] = array('i', self.write_symbol)
+        state["move"] = array('b', self.move)
+        state["_buffer"] = None
+        return state
+
+    def save(self, path: str):
+        """Сохранение в двоичный файл"""
+        binary_format.save_program(self, path)
+
+    @staticmethod
+    def load(path: str) -> 'CompiledProgram':
+        """Загрузка из двоичного файла через mmap"""
+        return binary_format.load_program(path)
+
+    @property
+    def n_states(self) -> int:
+        """Количество состояний"""
+        return len(self.states)
+
+    @property
+    def n_symbols(self) -> int:
+        """Количество символов алфавита"""
+        return len(self.symbols)
+
+    def intern_state(self, state: str) -> int:
+        """Получение номера состояния (новое состояние добавляется без правил)"""
+        state_id = self.state_ids.get(state)
+        if state_id is None:
+            state_id = len(self.states)
+            self.states.append(state)
+            self.state_ids[state] = state_id
+
+            # Таблицы из mmap нельзя расширить - переходим к обычным массивам
+            if not isinstance(self.next_state, array):
+                self.next_state = array('i', self.next_state)
+                self.write_symbol = array('i', self.write_symbol)
+                self.move = array('b', self.move)
+
+            width = len(self.symbols)
+            self.next_state.extend([-1] * width)
+            self.write_symbol.extend([0] * width)
+            self.move.extend([0] * width)
+            self.final.append(0)
+        return state_id
+
+    def intern_symbol(self, symbol: str) -> int:
+        """Получение номера символа (новый символ добавляется без правил)"""
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            old_width = symbol_id
+            self.symbols.append(symbol)
+            self.symbol_ids[symbol] = symbol_id
+
+            # Перестроение таблиц: у каждого состояния появляется новый столбец
+            next_state = array('i')
+            write_symbol = array('i')
+            move = array('b')
+            for row in range(len(self.states)):
+                start = row * old_width
+                end = start + old_width
+                next_state.extend(self.next_state[start:end])
+                next_state.append(-1)
+                write_symbol.extend(self.write_symbol[start:end])
+                write_symbol.append(0)
+                move.extend(self.move[start:end])
+                move.append(0)
+
+            self.next_state = next_state
+            self.write_symbol = write_symbol
+            self.move = move
+        return symbol_id
+
+    def set_transition(self, state: str, read_symbol: str,
+                       next_state: str, write_symbol: str, direction: str):
+        """Запись перехода в таблицы"""
+        # Сначала интернируем символы: это может перестроить таблицы
+        read_id = self.intern_symbol(read_symbol)
+        write_id = self.intern_symbol(write_symbol)
+        state_id = self.intern_state(state)
+        next_id = self.intern_state(next_state)
+
+        index = state_id * len(self.symbols) + read_id
+        self.next_state[index] = next_id
+        self.write_symbol[index] = write_id
+        self.move[index] = MOVE_CODES.get(direction, 0)
+
+    def to_program(self):
+        """Восстановление программы с объектами Rule"""
+        from .program import Program
+        from .rule import Rule
+
+        program = Program()
+        width = len(self.symbols)
+        for index, next_id in enumerate(self.next_state):
+            if next_id >= 0:
+                state_id, symbol_id = divmod(index, width)
+                direction = DIRECTIONS[self.move[index]]
+                program.add_rule(Rule(self.states[state_id], self.symbols[symbol_id],
+                                      self.states[next_id], self.symbols[self.write_symbol[index]],
+                                      direction))
+
+        program.initial_state = self.states[self.initial_state]
+        program.final_states = {state for state, flag in zip(self.states, self.final) if flag}
+        return program
+
+    @classmethod
+    def from_program(cls, program) -> 'CompiledProgram':
+        """Компиляция программы машины Тьюринга"""
+        states = sorted(program.states | {program.initial_state} | set(program.final_states))
+        symbols = sorted(program.alphabet)
+        compiled = cls(states, symbols, program.initial_state, program.final_states)
+
+        for rule in program.rules:
+            compiled.set_transition(rule.current_state, rule.read_symbol,
+                                    rule.next_state, rule.write_symbol, rule.direction)
+        return compiled
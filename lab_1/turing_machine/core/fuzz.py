@@ -0,0 +1,125 @@
+import random
+import time
+from typing import Callable
+
+from .program import Program
+from .batch import run_batch, run_tape, STATUS_HALTED, BatchResult
+
+
+class FuzzFailure:
+    """Класс, описывающий входное слово, на котором программа расходится с эталоном"""
+
+    def __init__(self, data: str, shrunk: str, expected: str, result: BatchResult):
+        self.data = data  # Исходное случайное слово
+        self.shrunk = shrunk  # Минимизированное слово, на котором расхождение сохраняется
+        self.expected = expected  # Ответ эталона для минимизированного слова
+        self.result = result  # Результат программы на минимизированном слове
+
+    def __repr__(self):
+        return (f"FuzzFailure(shrunk='{self.shrunk}', expected='{self.expected}', "
+                f"actual='{self.result.tape}', status='{self.result.status}')")
+
+
+class FuzzReport:
+    """Класс, описывающий итог проверки программы на случайных словах"""
+
+    def __init__(self, cases: int, failures: list, elapsed: float):
+        self.cases = cases
+        self.failures = failures
+        self.elapsed = elapsed
+
+    @property
+    def passed(self) -> bool:
+        """Совпала ли программа с эталоном на всех словах"""
+        return not self.failures
+
+    @property
+    def cases_per_second(self) -> float:
+        """Скорость проверки"""
+        return self.cases / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"FuzzReport(cases={self.cases}, failures={len(self.failures)}, "
+                f"cases_per_second={self.cases_per_second:.0f})")
+
+
+def random_tapes(alphabet: str, cases: int, max_length: int, seed: int = 0) -> list:
+    """Случайные входные слова длиной от 0 до max_length над алфавитом"""
+    rng = random.Random(seed)
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+            for _ in range(cases)]
+
+
+def _shrink_candidates(data: str, smallest: str):
+    """Более простые варианты слова: без кусков (от половины длины до символа), затем с заменой символов"""
+    size = len(data) // 2
+    while size >= 1:
+        for start in range(0, len(data), size):
+            yield data[:start] + data[start + size:]
+        size //= 2
+    if len(data) == 1:
+        yield ""
+
+    for index, symbol in enumerate(data):
+        if symbol > smallest:
+            yield data[:index] + smallest + data[index + 1:]
+
+
+def _matches(result: BatchResult, expected: str, blank_symbol: str) -> bool:
+    """Совпадает ли результат программы с ответом эталона"""
+    return result.status == STATUS_HALTED and result.tape == expected.strip(blank_symbol)
+
+
+def fuzz_program(program: Program, reference: Callable[[str], str], cases: int = 1000,
+                 max_length: int = 20, max_steps: int = 10_000, alphabet: str = None,
+                 workers: int = None, seed: int = 0, max_failures: int = 10,
+                 tape_class: type = None, blank_symbol: str = " ") -> FuzzReport:
+    """Проверка программы на случайных словах по эталонной функции
+
+    reference получает входное слово и возвращает ожидаемое содержимое ленты
+    после остановки (пустые символы по краям не учитываются). Слова строятся
+    из символов alphabet (по умолчанию - алфавит программы без пустого символа)
+    и выполняются компилированной программой в пуле процессов через run_batch.
+    Эталон вызывается в текущем процессе, поэтому может быть любой функцией.
+    Программа, не остановившаяся за max_steps шагов, считается ошибочной.
+    Каждое найденное расхождение минимизируется: от слова отбрасываются куски
+    и символы заменяются наименьшим, пока расхождение сохраняется.
+    Проверка прекращается после max_failures расхождений.
+    """
+    if alphabet is None:
+        alphabet = "".join(sorted(program.alphabet - {blank_symbol}))
+    if not alphabet:
+        raise ValueError("Алфавит для случайных слов пуст")
+
+    started = time.perf_counter()
+    tapes = random_tapes(alphabet, cases, max_length, seed)
+    failing = []
+    checked = 0
+    for result in run_batch(program, tapes, max_steps, workers, tape_class=tape_class, chunksize=64):
+        checked += 1
+        if not _matches(result, reference(tapes[result.index]), blank_symbol):
+            failing.append(tapes[result.index])
+            if len(failing) >= max_failures:
+                break
+
+    # Минимизация выполняется в текущем процессе: вариантов немного и они короткие
+    compiled = program.compile()
+    smallest = min(alphabet)
+    failures = []
+    for data in failing:
+        shrunk = data
+        result = None
+        changed = True
+        while changed:
+            changed = False
+            for candidate in _shrink_candidates(shrunk, smallest):
+                candidate_result = run_tape(program, compiled, 0, candidate, max_steps,
+                                            tape_class=tape_class)
+                if not _matches(candidate_result, reference(candidate), blank_symbol):
+                    shrunk, result, changed = candidate, candidate_result, True
+                    break
+        if result is None:
+            result = run_tape(program, compiled, 0, shrunk, max_steps, tape_class=tape_class)
+        failures.append(FuzzFailure(data, shrunk, reference(shrunk), result))
+
+    return FuzzReport(checked, failures, time.perf_counter() - started)
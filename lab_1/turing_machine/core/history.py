@@ -0,0 +1,125 @@
+from array import array
+
+
+class History:
+    """Класс, хранящий историю выполнения машины для шагов назад
+
+    История состоит из полных снимков конфигурации (шаг, состояние, лента),
+    которые делаются каждые snapshot_every шагов, и журнала отмены шагов после
+    последнего снимка. Запись журнала - предыдущее состояние, позиция головки,
+    затертый символ и признак расширения границ ленты, все поля хранятся
+    в массивах array. Возврат к более раннему шагу восстанавливает ближайший
+    снимок и заново выполняет шаги до нужного. Хранятся не более max_snapshots
+    последних снимков, поэтому объем памяти ограничен.
+    """
+
+    def __init__(self, snapshot_every: int = 10_000, max_snapshots: int = 100):
+        if snapshot_every < 1 or max_snapshots < 1:
+            raise ValueError("Интервал и число снимков должны быть положительными")
+        self.snapshot_every = snapshot_every
+        self.max_snapshots = max_snapshots
+        self.snapshots = []  # (шаг, состояние, снимок ленты)
+        self.states = []
+        self.state_ids = {}
+        self.symbols = []
+        self.symbol_ids = {}
+        self._clear_log()
+
+    def _clear_log(self):
+        """Очистка журнала отмены"""
+        self.previous_states = array('i')
+        self.heads = array('q')
+        self.old_symbols = array('i')
+        self.bound_changes = array('b')  # -1: расширена левая граница, 1: правая, 0: нет
+
+    @property
+    def first_step(self) -> int:
+        """Самый ранний шаг, к которому можно вернуться"""
+        return self.snapshots[0][0]
+
+    def take_snapshot(self, machine):
+        """Полный снимок текущей конфигурации, журнал отмены начинается заново"""
+        self.snapshots.append((machine.step_count, machine.current_state, machine.tape.snapshot()))
+        if len(self.snapshots) > self.max_snapshots:
+            del self.snapshots[0]
+        self._clear_log()
+
+    def _code(self, value: str, values: list, ids: dict) -> int:
+        """Номер строки в таблице (новая строка добавляется)"""
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(values)
+            values.append(value)
+        return code
+
+    def step(self, machine) -> bool:
+        """Шаг машины с записью в журнал отмены"""
+        tape = machine.tape
+        head = tape.head_position
+        low, high = tape.min_position, tape.max_position
+        state = machine.current_state
+        symbol = tape.read()
+
+        rule = machine.program.get_rule(state, symbol)
+        if rule is None:
+            machine.is_halted = True
+            return False
+
+        tape.write(rule.write_symbol)
+        if rule.direction == 'L':
+            tape.move_left()
+        elif rule.direction == 'R':
+            tape.move_right()
+        machine.current_state = rule.next_state
+        machine.step_count += 1
+        if machine.current_state in machine.program.final_states:
+            machine.is_halted = True
+
+        self.previous_states.append(self._code(state, self.states, self.state_ids))
+        self.heads.append(head)
+        self.old_symbols.append(self._code(symbol, self.symbols, self.symbol_ids))
+        self.bound_changes.append(-1 if tape.min_position < low else 1 if tape.max_position > high else 0)
+
+        if len(self.heads) >= self.snapshot_every:
+            self.take_snapshot(machine)
+        return True
+
+    def _undo(self, machine):
+        """Отмена последнего шага из журнала"""
+        tape = machine.tape
+        tape.head_position = self.heads.pop()
+        tape.write(self.symbols[self.old_symbols.pop()])
+
+        bound_change = self.bound_changes.pop()
+        if bound_change < 0:
+            tape.min_position += 1
+        elif bound_change > 0:
+            tape.max_position -= 1
+
+        machine.current_state = self.states[self.previous_states.pop()]
+        machine.step_count -= 1
+
+    def rewind(self, machine, target: int):
+        """Возврат машины к шагу target (не позже текущего)"""
+        if target > machine.step_count:
+            raise ValueError(f"Шаг {target} еще не выполнен (текущий шаг {machine.step_count})")
+        if not self.snapshots or target < self.first_step:
+            raise ValueError(f"Шаг {target} недоступен: история начинается с шага "
+                             f"{self.first_step if self.snapshots else machine.step_count}")
+
+        machine.is_halted = False
+        log_start = machine.step_count - len(self.heads)
+        if target < log_start:
+            # Восстановление последнего снимка не позже target и повтор шагов до него
+            while self.snapshots[-1][0] > target:
+                self.snapshots.pop()
+            step, state, tape_data = self.snapshots[-1]
+            machine.tape.restore(tape_data)
+            machine.current_state = state
+            machine.step_count = step
+            self._clear_log()
+            while machine.step_count < target and self.step(machine):
+                pass
+        else:
+            while machine.step_count > target:
+                self._undo(machine)
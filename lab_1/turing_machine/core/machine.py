@@ -1,22 +1,74 @@
+import asyncio
+import io
+import time
+
 from .tape import Tape
+from .array_tape import ArrayTape
+from .packed_tape import choose_tape_class
 from .program import Program
 from .rule import Rule
+from .compiled import CompiledProgram
+from .checkpoint import CheckpointWriter, load_checkpoint
+from .profiler import RunProfile
+from .trace import TraceBuffer
+from .history import History
+
+
+# Число шагов между проверками таймера контрольных точек
+CHECKPOINT_CHUNK = 100_000
+
+# Число шагов, которое run(log=True) накапливает в трассе перед выводом
+LOG_CHUNK = 1000
+
+# Проход по серии отключается, если после SWEEP_PROBE вызовов он в среднем
+# заменял меньше SWEEP_MIN_AVERAGE шагов
+SWEEP_PROBE = 64
+SWEEP_MIN_AVERAGE = 4
 
 
 class TuringMachine:
     """Класс, реализующий абстрактную машину Тьюринга"""
 
-    def __init__(self, tape: Tape = None, program: Program = None):
-        self.tape = tape if tape else Tape()
+    def __init__(self, tape: Tape = None, program: Program = None, tape_class: type = Tape):
         self.program = program if program else Program()
+        # None - класс ленты выбирается по алфавиту программы (PackedTape для 2-битных алфавитов)
+        self.auto_tape_class = tape_class is None
+        self.tape_class = tape_class if tape_class else choose_tape_class(self.program.alphabet)
+        self.tape = tape if tape else self.tape_class()
         self.current_state = self.program.initial_state if self.program else "q0"
         self.step_count = 0
         self.is_halted = False
+        self.loop_detected = None  # (шаг, период), если run обнаружил зацикливание
+        self.profile = None  # RunProfile последнего запуска run(profile=True)
+        self.trace = None  # TraceBuffer последнего запуска run(log=True)
+        self.history = None  # History для шагов назад (включается enable_history)
 
     def load_program_from_stream(self, stream):
-        """Загрузка программы из потока"""
+        """Загрузка программы из потока (вместе с лентой из секции ===TAPE===)"""
         self.program.load_from_stream(stream)
         self.current_state = self.program.initial_state
+        blank = self.tape.blank_symbol
+        if self.program.tape_data is not None:
+            if self.auto_tape_class:
+                # Лента строится заново: класс выбирается по символам программы и новой ленты
+                self.tape_class = choose_tape_class(self.program.alphabet | set(self.program.tape_data.strip()), blank)
+                self.tape = self.tape_class(blank_symbol=blank)
+            self.tape.load_from_stream(io.StringIO(self.program.tape_data))
+        elif self.auto_tape_class:
+            # Загруженная лента сохраняется: класс выбирается с учетом символов на ней
+            self.tape_class = choose_tape_class(self.program.alphabet | set(self.tape.iter_cells()), blank)
+            if type(self.tape) is not self.tape_class:
+                self.tape = self._copy_tape(self.tape, self.tape_class)
+
+    @staticmethod
+    def _copy_tape(tape, tape_class: type):
+        """Копия ленты (содержимое, головка и границы) в ленте другого класса"""
+        copy = tape_class(blank_symbol=tape.blank_symbol)
+        copy.set_cells(tape.min_position, tape.iter_cells())
+        copy.head_position = tape.head_position
+        copy.min_position = tape.min_position
+        copy.max_position = tape.max_position
+        return copy
 
     def load_tape_from_stream(self, stream):
         """Загрузка ленты из потока"""
@@ -53,20 +105,500 @@ class TuringMachine:
 
         return True
 
-    def run(self, max_steps: int = 1000, log: bool = False):
-        """Выполнение программы до завершения или достижения максимального числа шагов"""
-        if log:
-            self.print_state()
+    def run(self, max_steps: int = 1000, log: bool = False, accelerate: bool = True,
+            detect_loops: bool = False, profile: bool = False, trace=None):
+        """Выполнение программы до завершения или достижения максимального числа шагов
+
+        При accelerate=True серии шагов петлевых правил (q, a) -> (q, b, L|R)
+        выполняются за одну операцию над лентой (при логировании не используется).
+        При detect_loops=True выполнение прекращается, как только конфигурация
+        машины повторилась: результат сохраняется в loop_detected.
+        При profile=True статистика выполнения сохраняется в profile (RunProfile).
+        trace - приемник трассы (TraceBuffer или TraceFileWriter), получающий
+        компактную запись каждого шага. При log=True трасса пишется в TraceBuffer
+        на LOG_CHUNK шагов (атрибут trace), и по ней после каждой порции шагов
+        печатается состояние каждого шага.
+        Если включена история (enable_history), выполнение идет пошагово с записью
+        в журнал отмены, остальные режимы не используются.
+        """
+        self.loop_detected = None
+        # Без петлевых правил ускорять нечего - выполнение идет обычными шагами
+        sweep_plans = self._build_sweep_plans() if accelerate else None
+
+        if self.history is not None:
+            while self.step_count < max_steps and self.step():
+                pass
+        elif log:
+            self._run_logged(max_steps)
+        elif trace is not None:
+            self._run_traced(max_steps, trace)
+        elif profile:
+            self.profile = RunProfile()
+            self._run_profiled(max_steps, self.profile)
+        elif detect_loops:
+            self._run_detecting_loops(max_steps)
+        elif accelerate and sweep_plans:
+            self._run_with_sweeps(max_steps, sweep_plans)
+        else:
+            while self.step_count < max_steps and not self.is_halted:
+                if not self.step():
+                    break
+
+        if self.loop_detected:
+            step, period = self.loop_detected
+            print(f"Обнаружено зацикливание на шаге {step} с периодом {period}")
+        elif self.step_count >= max_steps:
+            print(f"Достигнуто максимальное число шагов: {max_steps}")
+
+    def _run_profiled(self, max_steps: int, profile: RunProfile):
+        """Пошаговое выполнение со сбором статистики в profile"""
+        tape = self.tape
+        rule_index = self.program.rule_index
+        final_states = self.program.final_states
+        rule_hits = profile.rule_hits
+        head_histogram = profile.head_histogram
+        tape_growth = profile.tape_growth
+        sample_every = profile.sample_every
+        first_step = self.step_count
 
+        profile.start()
+        tape_growth.append((self.step_count, tape.max_position - tape.min_position + 1))
         while self.step_count < max_steps and not self.is_halted:
-            if not self.step():  # Выполняем шаг и проверяем результат
+            head = tape.head_position
+            rule = rule_index.get((self.current_state, tape.read()))
+            if rule is None:
+                self.is_halted = True
+                break
+
+            rule_hits[rule] = rule_hits.get(rule, 0) + 1
+            head_histogram[head] = head_histogram.get(head, 0) + 1
+
+            tape.write(rule.write_symbol)
+            if rule.direction == 'L':
+                tape.move_left()
+            elif rule.direction == 'R':
+                tape.move_right()
+
+            self.current_state = rule.next_state
+            self.step_count += 1
+            if self.current_state in final_states:
+                self.is_halted = True
+
+            if self.step_count % sample_every == 0:
+                tape_growth.append((self.step_count, tape.max_position - tape.min_position + 1))
+
+        tape_growth.append((self.step_count, tape.max_position - tape.min_position + 1))
+        profile.stop(self.step_count - first_step)
+
+    def _run_traced(self, max_steps: int, trace):
+        """Пошаговое выполнение с записью каждого шага в trace"""
+        tape = self.tape
+        rule_index = self.program.rule_index
+        final_states = self.program.final_states
+        record = trace.record
+
+        trace.begin(self)
+        try:
+            while self.step_count < max_steps and not self.is_halted:
+                head = tape.head_position
+                rule = rule_index.get((self.current_state, tape.read()))
+                if rule is None:
+                    self.is_halted = True
+                    break
+
+                tape.write(rule.write_symbol)
+                if rule.direction == 'L':
+                    tape.move_left()
+                elif rule.direction == 'R':
+                    tape.move_right()
+
+                self.current_state = rule.next_state
+                self.step_count += 1
+                if self.current_state in final_states:
+                    self.is_halted = True
+
+                record(self.current_state, head, rule.write_symbol, rule.direction)
+        finally:
+            trace.end(self)
+
+    def _run_logged(self, max_steps: int):
+        """Выполнение с выводом состояния каждого шага порциями по LOG_CHUNK шагов"""
+        self.trace = TraceBuffer(LOG_CHUNK)
+        start = self.step_count  # Первый шаг, который еще не напечатан
+        while True:
+            self._run_traced(min(max_steps, self.step_count + LOG_CHUNK), self.trace)
+            for line in self.trace.format_steps(start):
+                print(line)
+            start = self.step_count + 1
+            if self.is_halted or self.step_count >= max_steps:
+                break
+
+    def _run_detecting_loops(self, max_steps: int):
+        """Выполнение с поиском повторяющейся конфигурации (алгоритм Брента)
+
+        Хранится только одна сохраненная конфигурация (состояние, позиция головки),
+        она обновляется на шагах, кратных степеням двойки. Лента целиком
+        не копируется и не сравнивается: для ячеек, измененных после сохранения,
+        запоминается прежний символ, а счетчик mismatches хранит число ячеек,
+        которые сейчас от него отличаются. Совпадение состояния, головки и
+        mismatches == 0 доказывает, что машина детерминированно повторяет цикл
+        с найденным периодом. Каждый шаг и каждая проверка стоят O(1).
+        """
+        tape = self.tape
+        rule_index = self.program.rule_index
+        final_states = self.program.final_states
+        saved_state = self.current_state
+        saved_head = tape.head_position
+        original = {}  # позиция -> символ на момент сохранения (только измененные ячейки)
+        mismatches = 0
+        power = period = 1
+
+        while self.step_count < max_steps:
+            head = tape.head_position
+            symbol = tape.read()
+            rule = rule_index.get((self.current_state, symbol))
+            if rule is None:
+                self.is_halted = True
+                break
+
+            new_symbol = rule.write_symbol
+            if new_symbol != symbol:
+                old = original.get(head)
+                if old is None:
+                    # Ячейка меняется впервые после сохранения: до записи она совпадала
+                    original[head] = symbol
+                    mismatches += 1
+                else:
+                    mismatches += (new_symbol != old) - (symbol != old)
+            tape.write(new_symbol)
+            if rule.direction == 'L':
+                tape.move_left()
+            elif rule.direction == 'R':
+                tape.move_right()
+
+            self.current_state = rule.next_state
+            self.step_count += 1
+            if self.current_state in final_states:
+                self.is_halted = True
+                break
+
+            if (mismatches == 0 and self.current_state == saved_state
+                    and tape.head_position == saved_head):
+                self.loop_detected = (self.step_count, period)
                 break
-            if log:
-                self.print_state()
+
+            if period == power:
+                saved_state = self.current_state
+                saved_head = tape.head_position
+                original = {}
+                mismatches = 0
+                power *= 2
+                period = 0
+            period += 1
+
+    def _build_sweep_plans(self) -> dict:
+        """Словарь (состояние, символ) -> (mapping, направление) для петлевых правил"""
+        # Петлевые правила группируются по (состояние, направление)
+        final_states = self.program.final_states
+        mappings = {}
+        sweep_plans = {}
+        for rule in self.program.rules:
+            if rule.is_self_loop() and rule.next_state not in final_states:
+                mapping = mappings.setdefault((rule.current_state, rule.direction), {})
+                mapping[rule.read_symbol] = rule.write_symbol
+                sweep_plans[(rule.current_state, rule.read_symbol)] = (mapping, rule.direction)
+        return sweep_plans
+
+    def _run_with_sweeps(self, max_steps: int, sweep_plans: dict = None):
+        """Выполнение с заменой серий шагов петлевых правил одним проходом по ленте
+
+        Правило или проход выбирается одним поиском в словаре по (состояние, символ),
+        символ под головкой читается один раз за шаг. Проход, который после
+        SWEEP_PROBE вызовов в среднем заменяет меньше SWEEP_MIN_AVERAGE шагов,
+        дороже обычных шагов и заменяется исходным правилом.
+        """
+        if sweep_plans is None:
+            sweep_plans = self._build_sweep_plans()
+        rule_index = self.program.rule_index
+        actions = dict(rule_index)
+        actions.update(sweep_plans)
+        usage = {}  # (состояние, символ) -> [число проходов, число шагов]
+
+        tape = self.tape
+        read = tape.read
+        write = tape.write
+        final_states = self.program.final_states
+        state = self.current_state
+        step_count = self.step_count
+        try:
+            while step_count < max_steps:
+                key = (state, read())
+                action = actions.get(key)
+                if action is None:
+                    self.is_halted = True
+                    break
+
+                if action.__class__ is tuple:
+                    count = tape.sweep(action[0], action[1], max_steps - step_count)
+                    step_count += count
+                    stats = usage.get(key)
+                    if stats is None:
+                        stats = usage[key] = [0, 0]
+                    stats[0] += 1
+                    stats[1] += count
+                    if stats[0] == SWEEP_PROBE and stats[1] < SWEEP_MIN_AVERAGE * SWEEP_PROBE:
+                        actions[key] = rule_index[key]
+                    continue
+
+                write(action.write_symbol)
+                if action.direction == 'L':
+                    tape.move_left()
+                elif action.direction == 'R':
+                    tape.move_right()
+                state = action.next_state
+                step_count += 1
+                if state in final_states:
+                    self.is_halted = True
+                    break
+        finally:
+            self.current_state = state
+            self.step_count = step_count
+
+    async def run_async(self, max_steps: int = 1000, yield_every: int = 10_000,
+                        resumed: asyncio.Event = None):
+        """Выполнение порциями по yield_every шагов с передачей управления циклу событий
+
+        Между порциями выполняется await asyncio.sleep(0), поэтому другие задачи
+        цикла событий не ждут окончания длинного выполнения. Если передано
+        событие resumed, перед каждой порцией ожидается его установка (пауза).
+        Сообщения не печатаются: результат виден по is_halted и step_count.
+        """
+        self.loop_detected = None
+        sweep_plans = self._build_sweep_plans()
+
+        while not self.is_halted and self.step_count < max_steps:
+            if resumed is not None:
+                await resumed.wait()
+            limit = min(max_steps, self.step_count + yield_every)
+            if self.history is not None or not sweep_plans:
+                while self.step_count < limit and self.step():
+                    pass
+            else:
+                self._run_with_sweeps(limit, sweep_plans)
+            await asyncio.sleep(0)
+
+    def run_compiled(self, max_steps: int = 1000, compiled: CompiledProgram = None):
+        """Выполнение программы в скомпилированном виде (результат совпадает с run)"""
+        if self.history is not None:
+            self.run(max_steps)
+            return
+
+        if not self.is_halted and self.step_count < max_steps:
+            self._execute_compiled(max_steps, compiled if compiled else self.program.compile())
 
         if self.step_count >= max_steps:
             print(f"Достигнуто максимальное число шагов: {max_steps}")
 
+    def _execute_compiled(self, max_steps: int, compiled: CompiledProgram, window: "CompiledWindow" = None):
+        """Цикл выполнения скомпилированной программы
+
+        Без window часть ленты переносится в список номеров символов перед
+        выполнением и посещенный отрезок возвращается на ленту после него.
+        С window (см. run_with_checkpoints) список сохраняется между вызовами,
+        а лента обновляется только через _flush_window.
+        """
+        own_window = window is None
+        if own_window:
+            window = CompiledWindow(self, compiled, max_steps)
+
+        tape = self.tape
+        cells = window.cells
+        offset = window.offset
+        blank = window.blank
+        width = window.width
+        next_base = window.next_base
+        write_symbol = window.write_symbol
+        move = window.move
+        final = window.final
+
+        pos = tape.head_position - offset
+        # Границы измененной части ленты (индексы в cells) с учетом прошлых вызовов
+        low = high = pos
+        if window.low is not None:
+            low = min(low, window.low)
+            high = max(high, window.high)
+        base = compiled.state_ids[self.current_state] * width
+        steps = max_steps
+        halted = False
+
+        for step in range(self.step_count, max_steps):
+            index = base + cells[pos]
+            new_base = next_base[index]
+            if new_base < 0:
+                steps = step
+                halted = True
+                break
+
+            cells[pos] = write_symbol[index]
+            pos += move[index]
+            base = new_base
+
+            if pos < low or pos > high:
+                # Головка вышла за посещенную часть - при необходимости расширяем список
+                if pos < 0:
+                    grow = len(cells)
+                    cells[:0] = [blank] * grow
+                    pos += grow
+                    low += grow
+                    high += grow
+                    offset -= grow
+                elif pos >= len(cells):
+                    cells.extend([blank] * len(cells))
+
+                if pos < low:
+                    low = pos
+                else:
+                    high = pos
+
+            if final[base]:
+                steps = step + 1
+                halted = True
+                break
+
+        self.is_halted = halted
+        if steps != self.step_count:
+            window.offset = offset
+            window.low = low
+            window.high = high
+            tape.head_position = offset + pos
+            self.current_state = compiled.states[base // width]
+            self.step_count = steps
+        if own_window:
+            self._flush_window(window)
+
+    def _flush_window(self, window: "CompiledWindow") -> tuple:
+        """Перенос измененной части списка на ленту
+
+        Возвращает отрезок позиций (начало, конец), записанный на ленту,
+        или None, если с прошлого переноса ни один шаг не был выполнен.
+        """
+        if window.low is None:
+            return None
+        low, high = window.low, window.high
+        self._store_cells(window.compiled, window.offset + low, window.cells[low:high + 1])
+        window.low = window.high = None
+        return window.offset + low, window.offset + high
+
+    def _load_cells(self, compiled: CompiledProgram, start: int, end: int) -> list:
+        """Номера символов скомпилированной программы для позиций ленты [start, end)"""
+        tape = self.tape
+        if isinstance(tape, ArrayTape):
+            # Коды ленты перекодируются в номера программы одним translate
+            ids = [compiled.intern_symbol(symbol) for symbol in tape.symbols]
+            if max(ids) < 256:
+                return list(tape.get_segment(start, end).translate(bytes(ids).ljust(256, b"\0")))
+
+        symbols = tape.get_cells(start, end)
+        for symbol in set(symbols):
+            compiled.intern_symbol(symbol)
+        return list(map(compiled.symbol_ids.__getitem__, symbols))
+
+    def _store_cells(self, compiled: CompiledProgram, start: int, cells: list):
+        """Запись номеров символов программы на ленту, начиная с позиции start"""
+        tape = self.tape
+        if isinstance(tape, ArrayTape) and compiled.n_symbols <= 256:
+            ids = bytes(cells)
+            table = bytearray(256)
+            for symbol_id in set(ids):
+                table[symbol_id] = tape._code(compiled.symbols[symbol_id])
+            tape.set_segment(start, ids.translate(table))
+        else:
+            tape.set_cells(start, map(compiled.symbols.__getitem__, cells))
+
+    def run_with_checkpoints(self, path: str, max_steps: int = 1000, every_steps: int = None,
+                             every_seconds: float = None, compiled: CompiledProgram = None):
+        """Скомпилированное выполнение с сохранением контрольных точек в файл path
+
+        Контрольная точка записывается каждые every_steps шагов и/или every_seconds
+        секунд. В начале записывается полная точка (программа и лента), дальше -
+        только измененный с прошлой точки отрезок ленты. Продолжить выполнение
+        после остановки процесса можно через TuringMachine.resume(path).
+        """
+        compiled = compiled if compiled else self.program.compile()
+        chunk = every_steps if every_steps else CHECKPOINT_CHUNK
+        writer = CheckpointWriter(path, compiled)
+        writer.write_full(self)
+
+        # Список номеров символов живет все выполнение, на ленту переносится
+        # только отрезок, измененный с прошлой контрольной точки
+        window = CompiledWindow(self, compiled, max_steps)
+        last_step = self.step_count
+        last_time = time.monotonic()
+        try:
+            while not self.is_halted and self.step_count < max_steps:
+                self._execute_compiled(min(max_steps, self.step_count + chunk), compiled, window)
+
+                now = time.monotonic()
+                due = ((every_steps and self.step_count - last_step >= every_steps)
+                       or (every_seconds and now - last_time >= every_seconds))
+                if due or self.is_halted or self.step_count >= max_steps:
+                    writer.write_delta(self, self._flush_window(window))
+                    last_step = self.step_count
+                    last_time = now
+        finally:
+            self._flush_window(window)
+            writer.close()
+
+        if self.step_count >= max_steps:
+            print(f"Достигнуто максимальное число шагов: {max_steps}")
+
+    @classmethod
+    def resume(cls, path: str, tape_class: type = Tape) -> "TuringMachine":
+        """Создание машины из последней контрольной точки файла path"""
+        program, tape, state, step_count, is_halted = load_checkpoint(path, tape_class)
+        tm = cls(tape, program, tape_class)
+        tm.current_state = state
+        tm.step_count = step_count
+        tm.is_halted = is_halted
+        return tm
+
+    def enable_history(self, snapshot_every: int = 10_000, max_snapshots: int = 100):
+        """Включение истории выполнения для step_back и run_to
+
+        Снимок ленты делается каждые snapshot_every шагов, хранятся не более
+        max_snapshots последних снимков: чем больше интервал, тем меньше памяти
+        и тем дольше возврат к шагу из начала интервала.
+        """
+        self.history = History(snapshot_every, max_snapshots)
+        self.history.take_snapshot(self)
+        # Шаги идут через журнал отмены: step подменяется, чтобы обычный шаг не проверял историю
+        self.step = self._step_with_history
+
+    def _step_with_history(self) -> bool:
+        """Выполнение одного шага с записью в журнал отмены"""
+        if self.is_halted:
+            return False
+        return self.history.step(self)
+
+    def step_back(self) -> bool:
+        """Отмена последнего шага (False, если возвращаться некуда)"""
+        if self.history is None:
+            raise ValueError("История выполнения не включена (enable_history)")
+        if self.step_count == 0 or self.step_count <= self.history.first_step:
+            return False
+        self.history.rewind(self, self.step_count - 1)
+        return True
+
+    def run_to(self, step: int):
+        """Переход к шагу step: вперед - выполнением, назад - по истории"""
+        if self.history is None:
+            raise ValueError("История выполнения не включена (enable_history)")
+        if step < self.step_count:
+            self.history.rewind(self, step)
+        else:
+            while self.step_count < step and self.step():
+                pass
+
     def print_state(self):
         """Вывод текущего состояния машины"""
         print(f"Шаг {self.step_count}: Состояние={self.current_state}, Лента={self.tape.get_visible_tape()}")
@@ -85,3 +617,33 @@ class TuringMachine:
         value = self.tape.read()
         self.tape.head_position = old_pos
         return value
+
+
+class CompiledWindow:
+    """Класс, хранящий часть ленты в виде списка номеров символов скомпилированной программы
+
+    cells[i] - символ позиции offset + i. Таблицы переходов заранее
+    переведены в списки (номера следующих состояний умножены на ширину
+    таблицы). low и high - границы измененной, но еще не перенесенной
+    на ленту части списка (None - изменений нет).
+    """
+
+    def __init__(self, machine: TuringMachine, compiled: CompiledProgram, max_steps: int):
+        # Переносится только та часть ленты, до которой головка может дойти
+        # за оставшиеся шаги (дальше список растет по мере необходимости)
+        tape = machine.tape
+        head = tape.head_position
+        budget = max_steps - machine.step_count
+        self.offset = max(min(tape.min_position, head), head - budget)
+        last = min(max(tape.max_position, head), head + budget)
+        self.compiled = compiled
+        self.blank = compiled.intern_symbol(tape.blank_symbol)
+        self.cells = machine._load_cells(compiled, self.offset, last + 1)
+        compiled.intern_state(machine.current_state)
+        self.low = self.high = None
+
+        self.width = width = compiled.n_symbols
+        self.next_base = [new_state * width for new_state in compiled.next_state]
+        self.write_symbol = list(compiled.write_symbol)
+        self.move = list(compiled.move)
+        self.final = [bool(flag) for flag in compiled.final for _ in range(width)]
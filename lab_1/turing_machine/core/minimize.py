@@ -0,0 +1,109 @@
+def reachable_states(program) -> set:
+    """Состояния, достижимые из начального
+
+    Из конечных состояний, в которые машина попала переходом, переходов нет.
+    Начальное состояние раскрывается всегда: перед первым шагом конечные
+    состояния не проверяются, поэтому его правила срабатывают, даже если
+    оно конечное.
+    """
+    successors = {}
+    for rule in program.rules:
+        successors.setdefault(rule.current_state, set()).add(rule.next_state)
+
+    reached = {program.initial_state}
+    pending = [program.initial_state]
+    while pending:
+        state = pending.pop()
+        if state in program.final_states and state != program.initial_state:
+            continue
+        for next_state in successors.get(state, ()):
+            if next_state not in reached:
+                reached.add(next_state)
+                pending.append(next_state)
+    return reached
+
+
+def equivalent_states(rules: list, states: set, final_states: set) -> dict:
+    """Разбиение состояний на классы эквивалентности уточнением (алгоритм Мура)
+
+    Два неконечных состояния эквивалентны, если для каждого символа у них
+    одинаковые записываемый символ и направление, а следующие состояния
+    лежат в одном классе. Конечные состояния не объединяются.
+    Возвращает словарь состояние -> номер класса.
+    """
+    rules_by_state = {state: [] for state in states}
+    for rule in rules:
+        if rule.current_state in rules_by_state:
+            rules_by_state[rule.current_state].append(rule)
+
+    # Начальное разбиение: отдельный класс на каждое конечное состояние,
+    # остальные - по набору (символ, запись, направление) без учета переходов
+    block_of = {}
+    signatures = {}
+    for state in states:
+        if state in final_states:
+            signature = ("final", state)
+        else:
+            signature = frozenset((rule.read_symbol, rule.write_symbol, rule.direction)
+                                  for rule in rules_by_state[state])
+        block_of[state] = signatures.setdefault(signature, len(signatures))
+
+    while True:
+        signatures = {}
+        refined = {}
+        for state in states:
+            signature = (block_of[state], frozenset(
+                (rule.read_symbol, rule.write_symbol, rule.direction, block_of[rule.next_state])
+                for rule in rules_by_state[state]))
+            refined[state] = signatures.setdefault(signature, len(signatures))
+
+        if len(signatures) == len(set(block_of.values())):
+            return refined
+        block_of = refined
+
+
+def minimize_program(program) -> dict:
+    """Удаление недостижимых состояний и лишних правил, объединение эквивалентных состояний
+
+    Программа изменяется на месте, возвращается отчет о сокращении.
+    Объединенные состояния заменяются представителем класса (начальное состояние
+    всегда остается собой), поэтому при остановке из-за отсутствия правила
+    машина может оказаться в состоянии-представителе.
+    """
+    states_before = program.states | {program.initial_state}
+    rules_before = len(program.rules)
+
+    reached = reachable_states(program)
+    live_rules = [rule for rule in program.rules if rule.current_state in reached and
+                  (rule.current_state not in program.final_states or rule.current_state == program.initial_state)]
+
+    # Состояния, упомянутые только в мертвых правилах, больше не нужны
+    states = {program.initial_state} | {rule.current_state for rule in live_rules} | \
+        {rule.next_state for rule in live_rules}
+    block_of = equivalent_states(live_rules, states, program.final_states)
+
+    # Представитель класса - состояние с наименьшим именем, а для класса
+    # начального состояния - само начальное состояние
+    representative = {}
+    for state in sorted(states):
+        representative.setdefault(block_of[state], state)
+    representative[block_of[program.initial_state]] = program.initial_state
+    renamed = {state: representative[block_of[state]] for state in states}
+
+    program.rules = []
+    program._update_sets()
+    for rule in live_rules:
+        if renamed[rule.current_state] == rule.current_state:
+            program.add_rule(rule.__class__(rule.current_state, rule.read_symbol,
+                                            renamed[rule.next_state], rule.write_symbol, rule.direction))
+    program.final_states = {renamed[state] for state in program.final_states if state in states}
+
+    return {
+        "states_before": len(states_before),
+        "states_after": len(program.states | {program.initial_state}),
+        "rules_before": rules_before,
+        "rules_after": len(program.rules),
+        "unreachable_states": sorted(states_before - reached),
+        "dead_rules": rules_before - len(live_rules),
+        "merged_states": {state: target for state, target in renamed.items() if state != target},
+    }
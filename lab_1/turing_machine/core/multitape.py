@@ -0,0 +1,202 @@
+import io
+
+from .tape import Tape
+from .rule import Rule
+from .program import Program
+from .machine import TuringMachine
+
+
+# Разделитель символов и направлений разных лент в строке правила: q0 a,b -> q1 c,d R,L
+SYMBOL_SEPARATOR = ","
+
+
+class MultiTapeRule(Rule):
+    """Класс, реализующий правило k-ленточной машины Тьюринга
+
+    read_symbol, write_symbol и direction - кортежи длины k (по одному
+    элементу на ленту), поэтому правило хранится в индексе Program под ключом
+    (состояние, кортеж символов) и ищется одним обращением к словарю.
+    """
+
+    def __init__(self, current_state: str, read_symbols: tuple,
+                 next_state: str, write_symbols: tuple, directions: tuple):
+        read_symbols, write_symbols, directions = tuple(read_symbols), tuple(write_symbols), tuple(directions)
+        if not len(read_symbols) == len(write_symbols) == len(directions):
+            raise ValueError(f"Разное число лент в правиле: {len(read_symbols)}, "
+                             f"{len(write_symbols)}, {len(directions)}")
+        for direction in directions:
+            if direction not in ('L', 'R', 'S'):
+                raise ValueError(f"Неверное направление: '{direction}'")
+        super().__init__(current_state, read_symbols, next_state, write_symbols, directions)
+
+    @property
+    def tape_count(self) -> int:
+        """Число лент, с которыми работает правило"""
+        return len(self.read_symbol)
+
+    def __str__(self):
+        return (f"{self.current_state} {SYMBOL_SEPARATOR.join(self.read_symbol)} -> {self.next_state} "
+                f"{SYMBOL_SEPARATOR.join(self.write_symbol)} {SYMBOL_SEPARATOR.join(self.direction)}")
+
+    def is_self_loop(self) -> bool:
+        """Макрошаги одной ленты к многоленточным правилам не применяются"""
+        return False
+
+
+class MultiTapeProgram(Program):
+    """Класс, реализующий программу k-ленточной машины Тьюринга"""
+
+    def __init__(self, tape_count: int = 2):
+        super().__init__()
+        self.tape_count = tape_count
+
+    def add_rule(self, rule: MultiTapeRule):
+        """Добавление правила в программу (число лент должно совпадать)"""
+        if rule.tape_count != self.tape_count:
+            raise ValueError(f"Правило '{rule}' для {rule.tape_count} лент, "
+                             f"программа - для {self.tape_count}")
+        super().add_rule(rule)
+
+    def _add_to_sets(self, rule: MultiTapeRule):
+        """Добавление символов всех лент и состояний правила"""
+        self.alphabet.update(rule.read_symbol)
+        self.alphabet.update(rule.write_symbol)
+        self.states.add(rule.current_state)
+        self.states.add(rule.next_state)
+
+    def compile(self):
+        """Многоленточные программы не компилируются в таблицы одной ленты"""
+        raise ValueError("Компиляция поддерживается только для одноленточных программ")
+
+    def _create_and_add_rule(self, current_state: str, read_symbol: str,
+                             next_state: str, write_symbol: str, direction: str):
+        """Создание правила из строки вида 'q0 a,b -> q1 c,d R,L'"""
+        self.add_rule(MultiTapeRule(current_state, read_symbol.split(SYMBOL_SEPARATOR), next_state,
+                                    write_symbol.split(SYMBOL_SEPARATOR),
+                                    direction.split(SYMBOL_SEPARATOR)))
+
+
+class MultiTapeTuringMachine(TuringMachine):
+    """Класс, реализующий k-ленточную машину Тьюринга
+
+    Головки всех лент двигаются независимо; правило выбирается по состоянию
+    и кортежу символов под всеми головками. Атрибут tape указывает на первую
+    ленту (входную), поэтому get_tape_value и set_tape_value работают с ней.
+    """
+
+    def __init__(self, tapes: list = None, program: MultiTapeProgram = None, tape_class: type = Tape):
+        program = program if program else MultiTapeProgram()
+        if tapes is None:
+            tapes = [tape_class() for _ in range(program.tape_count)]
+        if len(tapes) != program.tape_count:
+            raise ValueError(f"Программе нужно лент: {program.tape_count}, передано: {len(tapes)}")
+
+        super().__init__(tapes[0], program, tape_class)
+        self.tapes = list(tapes)
+
+    def load_program_from_stream(self, stream):
+        """Загрузка программы из потока (строки секции ===TAPE=== - ленты по порядку)
+
+        Головки всех лент стоят в первой позиции строки: пробелы в начале
+        строки остаются пустыми ячейками перед содержимым ленты.
+        """
+        self.program.load_from_stream(stream)
+        self.current_state = self.program.initial_state
+        if self.program.tape_data is not None:
+            for tape, line in zip(self.tapes, self.program.tape_data.split("\n")):
+                tape.load_from_stream(io.StringIO(line))
+                offset = len(line) - len(line.lstrip())
+                if line.strip() and offset:
+                    # Лента загружается с головкой на первом символе - сдвигаем головку назад
+                    tape.head_position = tape.min_position = -offset
+
+    def enable_history(self, snapshot_every: int = 10_000, max_snapshots: int = 100):
+        """История выполнения поддерживается только одноленточной машиной"""
+        raise ValueError("История выполнения не поддерживается многоленточной машиной")
+
+    def step(self) -> bool:
+        """Выполнение одного шага машины"""
+        if self.is_halted:
+            return False
+
+        symbols = tuple([tape.read() for tape in self.tapes])
+        rule = self.program.get_rule(self.current_state, symbols)
+
+        if rule is None:
+            self.is_halted = True
+            return False
+
+        for tape, symbol, direction in zip(self.tapes, rule.write_symbol, rule.direction):
+            tape.write(symbol)
+            if direction == 'L':
+                tape.move_left()
+            elif direction == 'R':
+                tape.move_right()
+
+        self.current_state = rule.next_state
+        self.step_count += 1
+
+        if self.current_state in self.program.final_states:
+            self.is_halted = True
+
+        return True
+
+    def run(self, max_steps: int = 1000, log: bool = False, accelerate: bool = True,
+            detect_loops: bool = False, profile: bool = False, trace=None):
+        """Выполнение программы до завершения или достижения максимального числа шагов
+
+        accelerate не влияет на выполнение: макрошаги к многоленточным правилам
+        не применяются. Поиск циклов, профилирование и трасса поддерживаются
+        только одноленточной машиной.
+        """
+        if detect_loops or profile or trace is not None:
+            raise ValueError("Параметры detect_loops, profile и trace не поддерживаются "
+                             "многоленточной машиной")
+
+        if log:
+            self.print_state()
+            while self.step_count < max_steps and self.step():
+                self.print_state()
+        else:
+            self._run_fast(max_steps)
+
+        if self.step_count >= max_steps:
+            print(f"Достигнуто максимальное число шагов: {max_steps}")
+
+    def _run_fast(self, max_steps: int):
+        """Цикл выполнения с заранее связанными методами чтения лент"""
+        tapes = self.tapes
+        readers = [tape.read for tape in tapes]
+        rule_index = self.program.rule_index
+        final_states = self.program.final_states
+        state = self.current_state
+        steps = self.step_count
+        halted = self.is_halted
+
+        while not halted and steps < max_steps:
+            rule = rule_index.get((state, tuple([read() for read in readers])))
+            if rule is None:
+                halted = True
+                break
+
+            for tape, symbol, direction in zip(tapes, rule.write_symbol, rule.direction):
+                tape.write(symbol)
+                if direction == 'R':
+                    tape.move_right()
+                elif direction == 'L':
+                    tape.move_left()
+
+            state = rule.next_state
+            steps += 1
+            if state in final_states:
+                halted = True
+
+        self.current_state = state
+        self.step_count = steps
+        self.is_halted = halted
+
+    def print_state(self):
+        """Вывод текущего состояния машины (по строке на ленту)"""
+        print(f"Шаг {self.step_count}: Состояние={self.current_state}")
+        for number, tape in enumerate(self.tapes, 1):
+            print(f"  Лента {number}={tape.get_visible_tape()}")
@@ -0,0 +1,251 @@
+from typing import Optional
+
+from .rule import Rule
+from .program import Program
+
+
+# Стратегии поиска конфигураций
+SEARCH_BFS = "bfs"
+SEARCH_IDDFS = "iddfs"
+
+
+class NondeterministicProgram(Program):
+    """Класс, реализующий программу недетерминированной машины Тьюринга
+
+    Для одной пары (состояние, символ) может быть несколько правил:
+    rule_index хранит их списком в порядке добавления.
+    """
+
+    def add_rule(self, rule: Rule):
+        """Добавление правила (альтернативы для той же пары не считаются конфликтом)"""
+        alternatives = self.rule_index.setdefault((rule.current_state, rule.read_symbol), [])
+        for existing in alternatives:
+            if (existing.next_state, existing.write_symbol, existing.direction) == \
+                    (rule.next_state, rule.write_symbol, rule.direction):
+                return  # Точный дубликат уже есть в программе
+
+        alternatives.append(rule)
+        self.rules.append(rule)
+        self._add_to_sets(rule)
+
+    def get_rule(self, state: str, symbol: str) -> Optional[Rule]:
+        """Первое из правил для данного состояния и символа"""
+        alternatives = self.rule_index.get((state, symbol))
+        return alternatives[0] if alternatives else None
+
+    def get_rules(self, state: str, symbol: str) -> list:
+        """Все правила для данного состояния и символа"""
+        return self.rule_index.get((state, symbol), [])
+
+    def compile(self):
+        """Таблицы переходов поддерживают только одно правило на пару"""
+        raise ValueError("Компиляция поддерживается только для детерминированных программ")
+
+    def _update_sets(self):
+        """Обновление алфавита, состояний и индекса правил после изменений"""
+        self.alphabet = set()
+        self.states = set()
+        self.rule_index = {}
+
+        for rule in self.rules:
+            self.rule_index.setdefault((rule.current_state, rule.read_symbol), []).append(rule)
+            self._add_to_sets(rule)
+
+
+class Cell:
+    """Ячейка неизменяемого списка символов одной стороны ленты
+
+    Ветви поиска разделяют общие хвосты списков, поэтому шаг создает
+    не более одной новой ячейки, а лента не копируется. Хеш списка
+    вычисляется один раз при создании ячейки.
+    """
+
+    __slots__ = ("symbol", "next", "hash")
+
+    def __init__(self, symbol: str, next_cell: "Cell" = None):
+        self.symbol = symbol
+        self.next = next_cell
+        self.hash = hash((symbol, next_cell.hash if next_cell is not None else 0))
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        first, second = self, other
+        while first is not second:
+            if first is None or second is None or first.hash != second.hash \
+                    or first.symbol != second.symbol:
+                return False
+            first, second = first.next, second.next
+        return True
+
+
+class SearchResult:
+    """Класс, описывающий результат поиска принимающей конфигурации"""
+
+    def __init__(self, accepted: Optional[bool], depth: int, configurations: int,
+                 state: str = None, tape: str = None):
+        self.accepted = accepted  # True - принято, False - отвергнуто, None - не решено
+        self.depth = depth
+        self.configurations = configurations  # Число различных просмотренных конфигураций
+        self.state = state
+        self.tape = tape
+
+    def __repr__(self):
+        return (f"SearchResult(accepted={self.accepted}, depth={self.depth}, "
+                f"configurations={self.configurations}, state={self.state!r}, tape={self.tape!r})")
+
+
+class NondeterministicTuringMachine:
+    """Класс, реализующий поиск по конфигурациям недетерминированной машины Тьюринга
+
+    Конфигурация - кортеж (состояние, левая часть ленты, символ под головкой,
+    правая часть ленты), стороны ленты - списки из Cell, начиная с ближайшей
+    к головке ячейки. Пустые ячейки на концах списков не хранятся, поэтому
+    одинаковые конфигурации совпадают по хешу и отбрасываются при повторе.
+    Входное слово принимается, если достижима конфигурация с конечным состоянием.
+    """
+
+    def __init__(self, program: NondeterministicProgram = None, blank_symbol: str = " "):
+        self.program = program if program else NondeterministicProgram()
+        self.blank_symbol = blank_symbol
+
+    def _push(self, symbol: str, cells: Cell) -> Cell:
+        """Добавление символа к стороне ленты (пустой символ на конце не хранится)"""
+        if cells is None and symbol == self.blank_symbol:
+            return None
+        return Cell(symbol, cells)
+
+    def _pop(self, cells: Cell) -> tuple:
+        """Символ, ближайший к головке, и оставшаяся часть стороны ленты"""
+        if cells is None:
+            return self.blank_symbol, None
+        return cells.symbol, cells.next
+
+    def initial_configuration(self, data: str) -> tuple:
+        """Начальная конфигурация для входного слова"""
+        right = None
+        for symbol in reversed(data[1:]):
+            right = self._push(symbol, right)
+        return self.program.initial_state, None, data[0] if data else self.blank_symbol, right
+
+    def successors(self, configuration: tuple) -> list:
+        """Конфигурации, получаемые за один шаг по всем подходящим правилам"""
+        state, left, symbol, right = configuration
+        result = []
+        for rule in self.program.rule_index.get((state, symbol), ()):
+            if rule.direction == 'R':
+                new_symbol, new_right = self._pop(right)
+                result.append((rule.next_state, self._push(rule.write_symbol, left), new_symbol, new_right))
+            elif rule.direction == 'L':
+                new_symbol, new_left = self._pop(left)
+                result.append((rule.next_state, new_left, new_symbol, self._push(rule.write_symbol, right)))
+            else:
+                result.append((rule.next_state, left, rule.write_symbol, right))
+        return result
+
+    def tape_of(self, configuration: tuple) -> str:
+        """Содержимое ленты конфигурации без пустых символов по краям"""
+        _, left, symbol, right = configuration
+        left_symbols = []
+        while left is not None:
+            left_symbols.append(left.symbol)
+            left = left.next
+        right_symbols = []
+        while right is not None:
+            right_symbols.append(right.symbol)
+            right = right.next
+        return "".join(left_symbols[::-1] + [symbol] + right_symbols).strip(self.blank_symbol)
+
+    def _accept(self, configuration: tuple, depth: int, configurations: int) -> SearchResult:
+        """Результат для найденной принимающей конфигурации"""
+        return SearchResult(True, depth, configurations, configuration[0], self.tape_of(configuration))
+
+    def search(self, data: str, max_depth: int = 1000, strategy: str = SEARCH_BFS,
+               max_configurations: int = 1_000_000) -> SearchResult:
+        """Поиск принимающей конфигурации для входного слова
+
+        strategy=SEARCH_BFS - поиск в ширину (находит кратчайший путь),
+        strategy=SEARCH_IDDFS - поиск в глубину с удваиваемым ограничением глубины.
+        Если за max_depth шагов или max_configurations конфигураций ответ
+        не найден, accepted равен None.
+        """
+        if strategy == SEARCH_BFS:
+            return self._search_breadth_first(data, max_depth, max_configurations)
+        if strategy == SEARCH_IDDFS:
+            return self._search_iterative_deepening(data, max_depth, max_configurations)
+        raise ValueError(f"Неизвестная стратегия поиска: '{strategy}'")
+
+    def accepts(self, data: str, max_depth: int = 1000, strategy: str = SEARCH_BFS) -> Optional[bool]:
+        """Принимает ли машина входное слово (None - ответ не найден в пределах глубины)"""
+        return self.search(data, max_depth, strategy).accepted
+
+    def _search_breadth_first(self, data: str, max_depth: int, max_configurations: int) -> SearchResult:
+        """Поиск в ширину с отбрасыванием повторных конфигураций"""
+        final_states = self.program.final_states
+        initial = self.initial_configuration(data)
+        if initial[0] in final_states:
+            return self._accept(initial, 0, 1)
+
+        seen = {initial}
+        frontier = [initial]
+        depth = 0
+        while frontier:
+            if depth >= max_depth:
+                return SearchResult(None, depth, len(seen))
+            depth += 1
+
+            next_frontier = []
+            for configuration in frontier:
+                for successor in self.successors(configuration):
+                    if successor in seen:
+                        continue
+                    if successor[0] in final_states:
+                        return self._accept(successor, depth, len(seen) + 1)
+                    seen.add(successor)
+                    next_frontier.append(successor)
+                if len(seen) > max_configurations:
+                    return SearchResult(None, depth, len(seen))
+            frontier = next_frontier
+
+        return SearchResult(False, depth, len(seen))
+
+    def _search_iterative_deepening(self, data: str, max_depth: int,
+                                    max_configurations: int) -> SearchResult:
+        """Поиск в глубину с ограничением глубины, удваиваемым на каждой итерации
+
+        Конфигурация повторно раскрывается, только если до нее дошли с большим
+        запасом глубины, чем раньше. Найденный путь не обязательно кратчайший.
+        """
+        final_states = self.program.final_states
+        initial = self.initial_configuration(data)
+        limit = min(1, max_depth)
+
+        while True:
+            explored = {}  # конфигурация -> запас глубины, с которым она раскрыта
+            cut_off = False
+            stack = [(initial, 0)]
+            while stack:
+                configuration, depth = stack.pop()
+                if configuration[0] in final_states:
+                    return self._accept(configuration, depth, len(explored) + 1)
+
+                remaining = limit - depth
+                if explored.get(configuration, -1) >= remaining:
+                    continue
+                explored[configuration] = remaining
+                if len(explored) > max_configurations:
+                    return SearchResult(None, depth, len(explored))
+
+                successors = self.successors(configuration)
+                if remaining == 0:
+                    cut_off = cut_off or bool(successors)
+                    continue
+                for successor in reversed(successors):
+                    stack.append((successor, depth + 1))
+
+            if not cut_off:
+                return SearchResult(False, limit, len(explored))
+            if limit >= max_depth:
+                return SearchResult(None, limit, len(explored))
+            limit = min(limit * 2, max_depth)
@@ -0,0 +1,219 @@
+from .tape import Tape
+from .array_tape import ArrayTape
+
+
+# Таблицы распаковки: код k-й ячейки (2 бита) для каждого значения байта
+_UNPACK_TABLES = [bytes((value >> (2 * k)) & 3 for value in range(256)) for k in range(4)]
+
+
+class PackedTape(ArrayTape):
+    """Класс, реализующий ленту с упаковкой по 2 бита на ячейку
+
+    Подходит для алфавитов не более чем из 4 символов вместе с пустым
+    (например, {0, 1, пробел}): в одном байте хранятся 4 ячейки, ячейка k
+    байта занимает биты 2k..2k+1. Хранение на две половины и таблица
+    символов такие же, как у ArrayTape.
+    """
+
+    MAX_SYMBOLS = 4
+
+    def __init__(self, initial_data: str = "", blank_symbol: str = " "):
+        super().__init__(initial_data, blank_symbol)
+        self.right = self._pack(self.right)
+
+    @staticmethod
+    def _pack(codes: bytearray) -> bytearray:
+        """Упаковка кодов (по байту на ячейку) по 4 ячейки в байт"""
+        codes = codes + bytes(-len(codes) % 4)
+        packed = 0
+        for k in range(4):
+            # Каждый байт не больше 3, поэтому сдвиг не переносит биты между байтами
+            packed |= int.from_bytes(codes[k::4], "little") << (2 * k)
+        return bytearray(packed.to_bytes(len(codes) // 4, "little"))
+
+    @staticmethod
+    def _unpack(cells: bytearray, low: int, high: int) -> bytearray:
+        """Коды ячеек с индексами [low, high) половины ленты (за концом массива - нули)"""
+        first_byte = low >> 2
+        last_byte = (high + 3) >> 2
+        chunk = cells[first_byte:last_byte]
+        chunk += bytes(last_byte - first_byte - len(chunk))
+
+        codes = bytearray(4 * len(chunk))
+        for k in range(4):
+            codes[k::4] = chunk.translate(_UNPACK_TABLES[k])
+        return codes[low - 4 * first_byte:high - 4 * first_byte]
+
+    def _get_code(self, position: int) -> int:
+        """Код символа в позиции"""
+        if position >= 0:
+            cells = self.right
+        else:
+            cells = self.left
+            position = -position - 1
+
+        index = position >> 2
+        if index < len(cells):
+            return (cells[index] >> ((position & 3) << 1)) & 3
+        return 0
+
+    def _set_code(self, position: int, code: int):
+        """Запись кода символа в позицию"""
+        if position >= 0:
+            cells = self.right
+        else:
+            cells = self.left
+            position = -position - 1
+
+        index = position >> 2
+        if index >= len(cells):
+            if code == 0:
+                return  # Пустой символ за пределами массива уже записан
+            # Амортизированный рост: массив как минимум удваивается
+            cells.extend(bytes(max(index + 1 - len(cells), len(cells))))
+        shift = (position & 3) << 1
+        cells[index] = (cells[index] & ~(3 << shift)) | (code << shift)
+
+    def read(self) -> str:
+        """Чтение символа под головкой"""
+        return self.symbols[self._get_code(self.head_position)]
+
+    def write(self, symbol: str):
+        """Запись символа под головкой"""
+        self._set_code(self.head_position, self._code(symbol))
+        self._update_bounds()
+
+    def get_symbol(self, position: int) -> str:
+        """Получение символа в указанной позиции без движения головки"""
+        return self.symbols[self._get_code(position)]
+
+    def sweep(self, mapping: dict, direction: str, limit: int) -> int:
+        """Проход головки по серии ячеек за одну операцию (до limit шагов)
+
+        Ячейки внутри массивов обрабатываются по одной, а пустая часть ленты
+        за концом массива, по которой головка уходит от нуля, - целиком.
+        """
+        if limit <= 0:
+            return 0
+        codes = {self._code(symbol): self._code(new_symbol) for symbol, new_symbol in mapping.items()}
+        step = 1 if direction == 'R' else -1
+        start = position = self.head_position
+        end = start + step * limit
+
+        while position != end:
+            # Дальше от нуля, чем конец массива, лента пустая
+            if position >= 0 and step > 0 and position >= 4 * len(self.right) or \
+                    position < 0 and step < 0 and -position - 1 >= 4 * len(self.left):
+                new_code = codes.get(0)
+                if new_code is None:
+                    break
+                if new_code:
+                    self._fill(position, end, step, new_code)
+                position = end
+                break
+
+            new_code = codes.get(self._get_code(position))
+            if new_code is None:
+                break
+            self._set_code(position, new_code)
+            position += step
+
+        # Обновление границ (головка прошла от start до position)
+        self.head_position = position
+        if position != start:
+            low, high = (start, position) if position > start else (position, start)
+            if low < self.min_position:
+                self.min_position = low
+            if high > self.max_position:
+                self.max_position = high
+
+        return (position - start) * step
+
+    def _fill(self, position: int, end: int, step: int, code: int):
+        """Заполнение кодом ячеек от position до end (не включая) в пустой части ленты"""
+        if step > 0:
+            cells, low, high = self.right, position, end
+        else:
+            cells, low, high = self.left, -position - 1, -end - 1
+        cells.extend(bytes((high + 3) // 4 - len(cells)))
+
+        # Неполные байты по краям заполняются по ячейке, середина - целыми байтами
+        pattern = code * 0b01010101
+        index = low
+        while index < high and index & 3:
+            self._set_code(index if step > 0 else -index - 1, code)
+            index += 1
+        whole_end = high & ~3
+        if index < whole_end:
+            cells[index >> 2:whole_end >> 2] = bytes((pattern,)) * ((whole_end - index) >> 2)
+            index = whole_end
+        while index < high:
+            self._set_code(index if step > 0 else -index - 1, code)
+            index += 1
+
+    def get_segment(self, start: int, end: int) -> bytearray:
+        """Коды символов в позициях [start, end)"""
+        result = bytearray()
+        if start < 0:
+            # Позиции start..-1 хранятся в левой половине в обратном порядке
+            part = self._unpack(self.left, -min(end, 0), -start)
+            part.reverse()
+            result += part
+        if end > 0:
+            result += self._unpack(self.right, max(start, 0), end)
+        return result
+
+    def set_segment(self, start: int, codes: bytes):
+        """Запись кодов символов в позиции [start, start + len(codes)) (головка не двигается)"""
+        end = start + len(codes)
+        if start < 0:
+            # Позиции start..-1 хранятся в левой половине в обратном порядке
+            part = bytearray(codes[:min(end, 0) - start])
+            part.reverse()
+            self._store_codes(self.left, -min(end, 0), part)
+        if end > 0:
+            right_start = max(start, 0)
+            self._store_codes(self.right, right_start, codes[right_start - start:])
+
+        if end > start:
+            self.min_position = min(self.min_position, start)
+            self.max_position = max(self.max_position, end - 1)
+
+    @staticmethod
+    def _store_codes(cells: bytearray, low: int, codes: bytes):
+        """Запись кодов в ячейки половины ленты с индексами [low, low + len(codes))"""
+        high = low + len(codes)
+        if len(cells) < (high + 3) >> 2:
+            cells.extend(bytes(((high + 3) >> 2) - len(cells)))
+
+        # Неполные байты по краям записываются по ячейке, середина упаковывается целиком
+        head_end = min(high, (low + 3) & ~3)
+        whole_end = max(high & ~3, head_end)
+        for index in (*range(low, head_end), *range(whole_end, high)):
+            shift = (index & 3) << 1
+            cells[index >> 2] = (cells[index >> 2] & ~(3 << shift)) | (codes[index - low] << shift)
+        if head_end < whole_end:
+            cells[head_end >> 2:whole_end >> 2] = PackedTape._pack(codes[head_end - low:whole_end - low])
+
+    def restore(self, data: bytes):
+        """Восстановление ленты из снимка (не более 4 различных символов)"""
+        super().restore(data)
+        if len(self.symbols) > self.MAX_SYMBOLS:
+            raise ValueError(f"Слишком много различных символов на ленте: {len(self.symbols)}")
+        self.left = self._pack(self.left)
+        self.right = self._pack(self.right)
+
+    def load_from_stream(self, stream):
+        """Загрузка состояния ленты из потока"""
+        super().load_from_stream(stream)
+        self.right = self._pack(self.right)
+
+
+def choose_tape_class(alphabet: set, blank_symbol: str = " ") -> type:
+    """Выбор самой компактной ленты для алфавита программы"""
+    size = len(set(alphabet) | {blank_symbol})
+    if size <= PackedTape.MAX_SYMBOLS:
+        return PackedTape
+    if size <= ArrayTape.MAX_SYMBOLS:
+        return ArrayTape
+    return Tape
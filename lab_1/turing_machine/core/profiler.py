@@ -0,0 +1,66 @@
+import json
+import time
+
+
+class RunProfile:
+    """Класс, собирающий статистику выполнения машины Тьюринга
+
+    Счетчики срабатываний правил и гистограмма позиций головки заполняются
+    в отдельном цикле TuringMachine._run_profiled, поэтому обычное выполнение
+    не проверяет никаких флагов профилирования.
+    """
+
+    def __init__(self, sample_every: int = 1000):
+        self.sample_every = sample_every  # Период записи размера ленты (в шагах)
+        self.rule_hits = {}        # правило -> число срабатываний
+        self.head_histogram = {}   # позиция головки -> число шагов
+        self.tape_growth = []      # (шаг, ширина посещенной части ленты)
+        self.steps = 0
+        self.elapsed = 0.0
+        self._started = None
+
+    def start(self):
+        """Начало замера времени"""
+        self._started = time.perf_counter()
+
+    def stop(self, steps: int):
+        """Окончание замера времени"""
+        self.elapsed += time.perf_counter() - self._started
+        self.steps += steps
+
+    @property
+    def state_dwell(self) -> dict:
+        """Число шагов, выполненных в каждом состоянии"""
+        dwell = {}
+        for rule, hits in self.rule_hits.items():
+            dwell[rule.current_state] = dwell.get(rule.current_state, 0) + hits
+        return dwell
+
+    @property
+    def steps_per_second(self) -> float:
+        """Скорость выполнения"""
+        return self.steps / self.elapsed if self.elapsed > 0 else 0.0
+
+    def hot_rules(self, count: int = 10) -> list:
+        """Самые часто срабатывающие правила: список (правило, число срабатываний)"""
+        return sorted(self.rule_hits.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def to_dict(self) -> dict:
+        """Отчет в виде словаря"""
+        return {
+            "steps": self.steps,
+            "elapsed_seconds": self.elapsed,
+            "steps_per_second": self.steps_per_second,
+            "rule_hits": [{"rule": str(rule), "hits": hits} for rule, hits in self.hot_rules(None)],
+            "state_dwell": self.state_dwell,
+            "head_histogram": {str(position): count
+                               for position, count in sorted(self.head_histogram.items())},
+            "tape_growth": [list(sample) for sample in self.tape_growth],
+        }
+
+    def to_json(self, stream=None) -> str:
+        """Отчет в формате JSON (при указании stream также записывается в поток)"""
+        report = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        if stream is not None:
+            stream.write(report)
+        return report
@@ -1,5 +1,14 @@
+import logging
 from typing import Optional
 from .rule import Rule
+from .compiled import CompiledProgram
+from .minimize import minimize_program
+
+
+logger = logging.getLogger(__name__)
+
+# Разделитель между программой и начальным содержимым ленты в файле .tm
+TAPE_SEPARATOR = "===TAPE==="
 
 
 class Program:
@@ -7,18 +16,27 @@ class Program:
 
     def __init__(self):
         self.rules = []
+        self.rule_index = {}  # (состояние, символ) -> правило
         self.alphabet = set()
         self.states = set()
         self.initial_state = "q0"
         self.final_states = set()
+        self.errors = []  # Ошибки последней загрузки: (номер строки, сообщение)
+        self.tape_data = None  # Лента из секции ===TAPE=== (если она была)
 
     def add_rule(self, rule: Rule):
         """Добавление правила в программу"""
+        key = (rule.current_state, rule.read_symbol)
+        existing = self.rule_index.get(key)
+        if existing is not None:
+            if (existing.next_state, existing.write_symbol, existing.direction) == \
+                    (rule.next_state, rule.write_symbol, rule.direction):
+                return  # Точный дубликат уже есть в программе
+            raise ValueError(f"Конфликт правил: '{rule}' и '{existing}'")
+
         self.rules.append(rule)
-        self.alphabet.add(rule.read_symbol)
-        self.alphabet.add(rule.write_symbol)
-        self.states.add(rule.current_state)
-        self.states.add(rule.next_state)
+        self.rule_index[key] = rule
+        self._add_to_sets(rule)
 
     def remove_rule(self, rule: Rule):
         """Удаление правила из программы"""
@@ -29,44 +47,92 @@ class Program:
 
     def get_rule(self, state: str, symbol: str) -> Optional[Rule]:
         """Поиск подходящего правила для данного состояния и символа"""
-        for rule in self.rules:
-            if rule.matches(state, symbol):
-                return rule
-        return None
+        return self.rule_index.get((state, symbol))
+
+    def compile(self) -> CompiledProgram:
+        """Компиляция программы в целочисленные таблицы переходов"""
+        return CompiledProgram.from_program(self)
+
+    def minimize(self) -> dict:
+        """Удаление недостижимых состояний и правил и объединение эквивалентных состояний
+
+        Возвращает отчет: число состояний и правил до и после, список
+        недостижимых состояний, число мертвых правил и объединенные состояния.
+        """
+        return minimize_program(self)
+
+    def save_binary(self, path: str):
+        """Сохранение скомпилированной программы в двоичный файл"""
+        self.compile().save(path)
+
+    @staticmethod
+    def load_binary(path: str) -> CompiledProgram:
+        """Загрузка скомпилированной программы из двоичного файла (без создания правил)"""
+        return CompiledProgram.load(path)
 
     def _update_sets(self):
         """Обновление алфавита и состояний после изменений"""
         self.alphabet = set()
         self.states = set()
+        self.rule_index = {}
 
         for rule in self.rules:
-            self.alphabet.add(rule.read_symbol)
-            self.alphabet.add(rule.write_symbol)
-            self.states.add(rule.current_state)
-            self.states.add(rule.next_state)
+            self.rule_index[(rule.current_state, rule.read_symbol)] = rule
+            self._add_to_sets(rule)
+
+    def _add_to_sets(self, rule: Rule):
+        """Добавление символов и состояний правила в алфавит и множество состояний"""
+        self.alphabet.add(rule.read_symbol)
+        self.alphabet.add(rule.write_symbol)
+        self.states.add(rule.current_state)
+        self.states.add(rule.next_state)
 
     def load_from_stream(self, stream):
-        """Загрузка программы из потока ввода"""
+        """Построчная загрузка программы из потока ввода
+
+        Ошибки разбора не прерывают загрузку: они сохраняются в errors
+        как пары (номер строки, сообщение) и пишутся в журнал модуля.
+        Строки после разделителя ===TAPE=== сохраняются в tape_data
+        (пробелы в начале строк сохраняются: для нескольких лент они задают
+        положение содержимого относительно головки).
+        """
         self.rules.clear()
+        self.rule_index.clear()
         self.alphabet.clear()
         self.states.clear()
+        self.errors = []
+        self.tape_data = None
 
-        lines = stream.readlines() if hasattr(stream, 'readlines') else stream
-        print(f"Загружаем программу из {len(lines)} строк")
+        tape_lines = None
+        for line_number, raw_line in enumerate(stream, 1):
+            line = raw_line.strip()
 
-        for line in lines:
-            line = line.strip()
-            print(f"Обрабатываем строку: '{line}'")
+            if tape_lines is not None:
+                tape_lines.append(raw_line.rstrip())
+                continue
 
             if not line or line.startswith("#"):
                 continue
 
+            if line == TAPE_SEPARATOR:
+                tape_lines = []
+                continue
+
             # Обрабатываем специальные команды
             if self._process_special_command(line):
                 continue
 
             # Обрабатываем правила
-            self._process_rule_line(line)
+            try:
+                self._process_rule_line(line)
+            except ValueError as error:
+                self.errors.append((line_number, str(error)))
+                logger.warning("Строка %d: %s", line_number, error)
+
+        if tape_lines is not None:
+            self.tape_data = "\n".join(tape_lines).strip("\n")
+
+        logger.debug("Загружено правил: %d, ошибок: %d", len(self.rules), len(self.errors))
 
     def _process_special_command(self, line: str) -> bool:
         """Обработка специальных команд (initial, final)"""
@@ -74,14 +140,12 @@ class Program:
             parts = line.split()
             if len(parts) >= 2:
                 self.initial_state = parts[1]
-                print(f"Установлено начальное состояние: {self.initial_state}")
             return True
 
         elif line.startswith("final"):
             parts = line.split()
             if len(parts) >= 2:
                 self.final_states = set(parts[1:])
-                print(f"Установлены конечные состояния: {self.final_states}")
             return True
 
         return False
@@ -89,7 +153,6 @@ class Program:
     def _process_rule_line(self, line: str):
         """Обработка строки с правилом"""
         parts = line.split()
-        print(f"Части строки: {parts}")
 
         # Ищем позицию "->"
         if "->" in parts:
@@ -100,33 +163,35 @@ class Program:
     def _parse_rule_with_arrow(self, parts: list):
         """Парсинг правила в формате с '->'"""
         arrow_index = parts.index("->")
-        if arrow_index >= 1 and len(parts) >= arrow_index + 3:
-            current_state = parts[0]
-            read_symbol = parts[1]
-            next_state = parts[arrow_index + 1]
-            write_symbol = parts[arrow_index + 2]
-            direction = parts[arrow_index + 3]
+        if arrow_index not in (1, 2) or len(parts) != arrow_index + 4:
+            raise ValueError(f"Неверный формат правила: '{' '.join(parts)}'")
+
+        current_state = parts[0]
+        read_symbol = parts[1]
+        next_state = parts[arrow_index + 1]
+        write_symbol = parts[arrow_index + 2]
+        direction = parts[arrow_index + 3]
 
-            # Для пробела используем специальное обозначение
-            if read_symbol == "->":  # Если пробел пропущен
-                read_symbol = " "
-            if write_symbol == "->":  # Если пробел пропущен
-                write_symbol = " "
+        # Для пробела используем специальное обозначение
+        if read_symbol == "->":  # Если пробел пропущен
+            read_symbol = " "
+        if write_symbol == "->":  # Если пробел пропущен
+            write_symbol = " "
 
-            self._create_and_add_rule(current_state, read_symbol, next_state, write_symbol, direction)
+        self._create_and_add_rule(current_state, read_symbol, next_state, write_symbol, direction)
 
     def _parse_rule_without_arrow(self, parts: list):
         """Парсинг правила в формате без '->'"""
-        if len(parts) == 5:
-            current_state, read_symbol, next_state, write_symbol, direction = parts
-            self._create_and_add_rule(current_state, read_symbol, next_state, write_symbol, direction)
+        if len(parts) != 5:
+            raise ValueError(f"Неверный формат правила: '{' '.join(parts)}'")
+
+        current_state, read_symbol, next_state, write_symbol, direction = parts
+        self._create_and_add_rule(current_state, read_symbol, next_state, write_symbol, direction)
 
     def _create_and_add_rule(self, current_state: str, read_symbol: str,
                              next_state: str, write_symbol: str, direction: str):
         """Создание и добавление правила в программу"""
-        rule = Rule(current_state, read_symbol, next_state, write_symbol, direction)
-        self.add_rule(rule)
-        print(f"Добавлено правило: {rule}")
+        self.add_rule(Rule(current_state, read_symbol, next_state, write_symbol, direction))
 
     def view_rules(self):
         """Просмотр всех правил"""
@@ -15,3 +15,7 @@ class Rule:
     def matches(self, state: str, symbol: str) -> bool:
         """Проверяет, подходит ли правило для текущего состояния и символа"""
         return self.current_state == state and self.read_symbol == symbol
+
+    def is_self_loop(self) -> bool:
+        """Проверяет, является ли правило петлей с движением головки: (q, a) -> (q, b, L|R)"""
+        return self.current_state == self.next_state and self.direction in ('L', 'R')
@@ -0,0 +1,85 @@
+import asyncio
+
+from .machine import TuringMachine
+from .batch import STATUS_HALTED, STATUS_BUDGET_EXCEEDED
+
+
+# Состояния машин в планировщике (кроме причин завершения из batch)
+STATUS_RUNNING = "running"
+STATUS_PAUSED = "paused"
+STATUS_CANCELLED = "cancelled"
+
+
+class MachineHandle:
+    """Класс, описывающий машину, которую выполняет планировщик"""
+
+    def __init__(self, machine: TuringMachine, max_steps: int, name: str):
+        self.machine = machine
+        self.max_steps = max_steps
+        self.name = name
+        self.task = None
+        self.resumed = asyncio.Event()  # Сброшено - машина на паузе
+        self.resumed.set()
+
+    @property
+    def status(self) -> str:
+        """Текущее состояние выполнения"""
+        if self.task is not None and self.task.cancelled():
+            return STATUS_CANCELLED
+        if self.machine.is_halted:
+            return STATUS_HALTED
+        if self.machine.step_count >= self.max_steps:
+            return STATUS_BUDGET_EXCEEDED
+        return STATUS_RUNNING if self.resumed.is_set() else STATUS_PAUSED
+
+    def pause(self):
+        """Приостановка после текущей порции шагов"""
+        self.resumed.clear()
+
+    def resume(self):
+        """Продолжение выполнения"""
+        self.resumed.set()
+
+    def cancel(self):
+        """Отмена выполнения"""
+        self.task.cancel()
+
+    def done(self) -> bool:
+        """Завершено ли выполнение (остановка, исчерпание шагов или отмена)"""
+        return self.task.done()
+
+    def __repr__(self):
+        return f"MachineHandle(name='{self.name}', steps={self.machine.step_count}, status='{self.status}')"
+
+
+class MachineScheduler:
+    """Класс, выполняющий много машин Тьюринга в одном цикле событий asyncio
+
+    Каждая машина выполняется своей задачей asyncio через run_async порциями
+    по slice_steps шагов. Задачи, готовые к выполнению, цикл событий
+    обслуживает по очереди, поэтому машины получают время поровну и длинное
+    выполнение не задерживает остальные больше чем на одну порцию.
+    """
+
+    def __init__(self, slice_steps: int = 10_000):
+        self.slice_steps = slice_steps
+        self.handles = []
+
+    def spawn(self, machine: TuringMachine, max_steps: int = 1000, name: str = None) -> MachineHandle:
+        """Запуск машины (вызывается внутри работающего цикла событий)"""
+        handle = MachineHandle(machine, max_steps, name if name else f"machine-{len(self.handles)}")
+        handle.task = asyncio.get_running_loop().create_task(
+            machine.run_async(max_steps, self.slice_steps, handle.resumed), name=handle.name)
+        self.handles.append(handle)
+        return handle
+
+    async def join(self) -> list:
+        """Ожидание завершения всех машин (отмененные не считаются ошибкой)"""
+        await asyncio.gather(*(handle.task for handle in self.handles), return_exceptions=True)
+        return self.handles
+
+    def cancel_all(self):
+        """Отмена всех незавершенных машин"""
+        for handle in self.handles:
+            if not handle.done():
+                handle.cancel()
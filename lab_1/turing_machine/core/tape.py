@@ -1,3 +1,16 @@
+from array import array
+from itertools import repeat
+
+from . import binary_format
+
+
+# Число ячеек в одном куске при потоковом выводе ленты
+EXPORT_CHUNK = 65536
+
+# Наибольшее число ячеек по каждую сторону от головки в видимой части ленты
+VISIBLE_LIMIT = 1000
+
+
 class Tape:
     """Класс, реализующий ленту машины Тьюринга"""
 
@@ -25,32 +38,164 @@ class Tape:
             del self.tape[self.head_position]
 
         # Обновление границ
-        self.min_position = min(self.min_position, self.head_position)
-        self.max_position = max(self.max_position, self.head_position)
+        if self.head_position < self.min_position:
+            self.min_position = self.head_position
+        elif self.head_position > self.max_position:
+            self.max_position = self.head_position
 
     def move_left(self):
         """Движение головки влево"""
         self.head_position -= 1
-        self.min_position = min(self.min_position, self.head_position)
+        if self.head_position < self.min_position:
+            self.min_position = self.head_position
 
     def move_right(self):
         """Движение головки вправо"""
         self.head_position += 1
-        self.max_position = max(self.max_position, self.head_position)
+        if self.head_position > self.max_position:
+            self.max_position = self.head_position
 
-    def get_visible_tape(self, padding: int = 5) -> str:
-        """Получение видимой части ленты с padding символами вокруг головки"""
-        start = min(self.min_position, self.head_position - padding)
-        end = max(self.max_position, self.head_position + padding)
-
-        result = []
-        for i in range(start, end + 1):
-            if i == self.head_position:
-                result.append(f"[{self.tape.get(i, self.blank_symbol)}]")
+    def sweep(self, mapping: dict, direction: str, limit: int) -> int:
+        """Проход головки по серии ячеек за одну операцию (до limit шагов)
+
+        mapping - словарь символ -> записываемый символ для петлевых правил
+        (q, a) -> (q, b, direction) одного состояния. Проход останавливается
+        на первом символе, которого нет в mapping. Возвращает количество шагов.
+        """
+        cells = self.tape
+        blank = self.blank_symbol
+        start = position = self.head_position
+
+        # За пределами [min_position, max_position] лента пустая
+        if direction == 'R':
+            step = 1
+            inside = self.max_position + 1 - start
+        else:
+            step = -1
+            inside = start - self.min_position + 1
+        end = start + step * limit
+
+        for _ in range(max(0, min(inside, limit))):
+            new_symbol = mapping.get(cells.get(position, blank))
+            if new_symbol is None:
+                break
+            if new_symbol != blank:
+                cells[position] = new_symbol
+            else:
+                cells.pop(position, None)
+            position += step
+        else:
+            if blank in mapping:
+                new_symbol = mapping[blank]
+                if new_symbol != blank:
+                    cells.update(dict.fromkeys(range(position, end, step), new_symbol))
+                position = end
+
+        # Обновление границ (головка прошла от start до position)
+        self.head_position = position
+        if position != start:
+            low, high = (start, position) if step > 0 else (position, start)
+            if low < self.min_position:
+                self.min_position = low
+            if high > self.max_position:
+                self.max_position = high
+
+        return (position - start) * step
+
+    def get_cells(self, start: int, end: int) -> list:
+        """Символы в позициях [start, end)"""
+        return list(map(self.tape.get, range(start, end), repeat(self.blank_symbol, max(0, end - start))))
+
+    def set_cells(self, start: int, symbols):
+        """Запись символов подряд, начиная с позиции start (головка не двигается)"""
+        cells = self.tape
+        blank = self.blank_symbol
+        position = start
+        for symbol in symbols:
+            if symbol != blank:
+                cells[position] = symbol
             else:
-                result.append(self.tape.get(i, self.blank_symbol))
+                cells.pop(position, None)
+            position += 1
+
+        if position > start:
+            self.min_position = min(self.min_position, start)
+            self.max_position = max(self.max_position, position - 1)
+
+    def content_key(self):
+        """Хешируемое представление содержимого ленты (без учета головки)"""
+        return frozenset(self.tape.items())
+
+    def snapshot(self) -> bytes:
+        """Снимок ленты в двоичном формате (отрезок от min_position до max_position)
+
+        При алфавите больше 256 символов коды ячеек занимают 2 или 4 байта.
+        """
+        symbols = [self.blank_symbol]
+        symbols.extend(symbol for symbol in dict.fromkeys(self.tape.values()) if symbol != self.blank_symbol)
+        codes = {symbol: code for code, symbol in enumerate(symbols)}
+        start = self.min_position
+        cells = array(binary_format.cell_typecode(len(symbols)), [0]) * (self.max_position - start + 1)
+
+        for position, symbol in self.tape.items():
+            cells[position - start] = codes[symbol]
+
+        return binary_format.pack_tape(symbols, self.head_position, self.min_position,
+                                       self.max_position, start, cells)
+
+    def restore(self, data: bytes):
+        """Восстановление ленты из снимка"""
+        fields = binary_format.unpack_tape(data)
+        symbols = fields["symbols"]
+        start = fields["start"]
+
+        self.blank_symbol = symbols[0]
+        self.tape = {start + i: symbols[code] for i, code in enumerate(fields["cells"]) if code}
+        self.head_position = fields["head_position"]
+        self.min_position = fields["min_position"]
+        self.max_position = fields["max_position"]
+
+    def get_visible_tape(self, padding: int = 5) -> str:
+        """Получение видимой части ленты с padding символами вокруг головки
+
+        Показывается посещенная часть ленты, но не дальше max(VISIBLE_LIMIT, padding)
+        ячеек от головки: читаются только ячейки окна.
+        """
+        head = self.head_position
+        limit = max(VISIBLE_LIMIT, padding)
+        start = max(min(self.min_position, head - padding), head - limit)
+        end = min(max(self.max_position, head + padding), head + limit)
+        before = "".join(self.iter_cells(start, head))
+        after = "".join(self.iter_cells(head + 1, end + 1))
+        return f"{before}[{self.read()}]{after}"
+
+    def get_window(self, padding: int = 5) -> str:
+        """Окно ленты из padding ячеек по обе стороны от головки (остальная лента не читается)"""
+        head = self.head_position
+        get = self.tape.get
+        blank = self.blank_symbol
+        before = "".join(get(i, blank) for i in range(head - padding, head))
+        after = "".join(get(i, blank) for i in range(head + 1, head + padding + 1))
+        return f"{before}[{get(head, blank)}]{after}"
+
+    def iter_cells(self, start: int = None, end: int = None):
+        """Генератор символов в позициях [start, end) (по умолчанию - посещенная часть ленты)"""
+        start = self.min_position if start is None else start
+        end = self.max_position + 1 if end is None else end
+        for chunk_start in range(start, end, EXPORT_CHUNK):
+            chunk_end = min(chunk_start + EXPORT_CHUNK, end)
+            yield from map(self.tape.get, range(chunk_start, chunk_end),
+                           repeat(self.blank_symbol, chunk_end - chunk_start))
 
-        return "".join(result)
+    def export(self, stream, start: int = None, end: int = None) -> int:
+        """Запись символов позиций [start, end) в поток кусками, возвращает число ячеек"""
+        start = self.min_position if start is None else start
+        end = self.max_position + 1 if end is None else end
+        for chunk_start in range(start, end, EXPORT_CHUNK):
+            chunk_end = min(chunk_start + EXPORT_CHUNK, end)
+            stream.write("".join(map(self.tape.get, range(chunk_start, chunk_end),
+                                     repeat(self.blank_symbol, chunk_end - chunk_start))))
+        return max(0, end - start)
 
     def load_from_stream(self, stream):
         """Загрузка состояния ленты из потока"""
@@ -0,0 +1,221 @@
+import json
+import queue
+import threading
+from array import array
+
+from .tape import Tape
+from .compiled import MOVE_CODES, DIRECTIONS
+
+
+class TraceBuffer:
+    """Класс, хранящий трассу выполнения машины в компактном виде
+
+    На каждый шаг записываются только новое состояние, позиция головки,
+    записанный символ и сдвиг головки (номера в массивах array). Видимая
+    лента любого шага восстанавливается по требованию: от начального снимка
+    ленты применяются записи до нужного шага. При заданной capacity буфер
+    кольцевой - хранятся последние capacity шагов, а вытесняемые записи
+    применяются к начальному снимку.
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity
+        self.states = []
+        self.state_ids = {}
+        self.symbols = []
+        self.symbol_ids = {}
+        self.state_codes = array('i')
+        self.heads = array('q')
+        self.writes = array('i')
+        self.moves = array('b')
+        self.count = 0  # Число записанных шагов (включая вытесненные)
+
+        self.base_tape = None   # Лента перед первым хранимым шагом
+        self.base_state = None
+        self.base_step = 0
+
+    def begin(self, machine):
+        """Начало трассы: копия ленты (без двоичного снимка) и состояние машины"""
+        tape = machine.tape
+        base_tape = Tape(blank_symbol=tape.blank_symbol)
+        base_tape.set_cells(tape.min_position, tape.get_cells(tape.min_position, tape.max_position + 1))
+        base_tape.head_position = tape.head_position
+        base_tape.min_position = tape.min_position
+        base_tape.max_position = tape.max_position
+        self._reset(base_tape, machine.current_state, machine.step_count)
+
+    def start(self, tape_snapshot: bytes, state: str, step: int):
+        """Начало трассы по снимку ленты"""
+        base_tape = Tape()
+        base_tape.restore(tape_snapshot)
+        self._reset(base_tape, state, step)
+
+    def _reset(self, base_tape: Tape, state: str, step: int):
+        """Очистка записей: трасса начинается с ленты base_tape"""
+        self.base_tape = base_tape
+        self.base_state = state
+        self.base_step = step
+        self.state_codes = array('i')
+        self.heads = array('q')
+        self.writes = array('i')
+        self.moves = array('b')
+        self.count = 0
+
+    def end(self, machine):
+        """Окончание трассы"""
+
+    def record(self, state: str, head: int, symbol: str, direction: str):
+        """Запись шага: новое состояние, позиция головки до шага, записанный символ, направление"""
+        state_code = self.state_ids.get(state)
+        if state_code is None:
+            state_code = self.state_ids[state] = len(self.states)
+            self.states.append(state)
+        symbol_code = self.symbol_ids.get(symbol)
+        if symbol_code is None:
+            symbol_code = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+
+        if self.capacity is None or self.count < self.capacity:
+            self.state_codes.append(state_code)
+            self.heads.append(head)
+            self.writes.append(symbol_code)
+            self.moves.append(MOVE_CODES.get(direction, 0))
+        else:
+            # Самая старая запись вытесняется и переносится в начальный снимок
+            slot = self.count % self.capacity
+            self.base_state = self._apply(self.base_tape, slot)
+            self.base_step += 1
+            self.state_codes[slot] = state_code
+            self.heads[slot] = head
+            self.writes[slot] = symbol_code
+            self.moves[slot] = MOVE_CODES.get(direction, 0)
+        self.count += 1
+
+    @property
+    def first_step(self) -> int:
+        """Номер самого раннего шага, который можно восстановить"""
+        return self.base_step
+
+    @property
+    def last_step(self) -> int:
+        """Номер последнего записанного шага"""
+        return self.base_step + len(self.heads)
+
+    def _slot(self, index: int) -> int:
+        """Позиция в массивах для index-й хранимой записи"""
+        if self.capacity is None or self.count <= self.capacity:
+            return index
+        return (self.count + index) % self.capacity
+
+    def _apply(self, tape: Tape, slot: int) -> str:
+        """Применение записи к ленте, возвращает новое состояние"""
+        tape.head_position = self.heads[slot]
+        tape.write(self.symbols[self.writes[slot]])
+        direction = DIRECTIONS[self.moves[slot]]
+        if direction == 'L':
+            tape.move_left()
+        elif direction == 'R':
+            tape.move_right()
+        return self.states[self.state_codes[slot]]
+
+    def replay(self, start: int = None, end: int = None):
+        """Генератор (шаг, состояние, лента) для шагов [start, end]
+
+        Лента - одна и та же рабочая копия, изменяемая между итерациями.
+        """
+        start = self.first_step if start is None else start
+        end = self.last_step if end is None else end
+        if start < self.first_step or end > self.last_step:
+            raise ValueError(f"Шаги {start}..{end} вне трассы {self.first_step}..{self.last_step}")
+
+        tape = Tape(blank_symbol=self.base_tape.blank_symbol)
+        tape.tape = dict(self.base_tape.tape)
+        tape.head_position = self.base_tape.head_position
+        tape.min_position = self.base_tape.min_position
+        tape.max_position = self.base_tape.max_position
+        state = self.base_state
+
+        for step in range(self.first_step, end + 1):
+            if step > self.first_step:
+                state = self._apply(tape, self._slot(step - self.first_step - 1))
+            if step >= start:
+                yield step, state, tape
+
+    def state_at(self, step: int) -> str:
+        """Состояние машины после шага step"""
+        for _, state, _ in self.replay(step, step):
+            return state
+
+    def tape_at(self, step: int, padding: int = 5) -> str:
+        """Видимая часть ленты после шага step"""
+        for _, _, tape in self.replay(step, step):
+            return tape.get_visible_tape(padding)
+
+    def format_steps(self, start: int = None, end: int = None):
+        """Строки в формате TuringMachine.print_state для шагов [start, end]"""
+        for step, state, tape in self.replay(start, end):
+            yield f"Шаг {step}: Состояние={state}, Лента={tape.get_visible_tape()}"
+
+
+class TraceFileWriter:
+    """Класс, записывающий трассу в файл в фоновом потоке
+
+    Первая строка файла - JSON со снимком ленты и состоянием, далее по строке
+    на шаг: состояние, позиция головки, записанный символ и направление через
+    табуляцию. Записи передаются потоку пачками по batch_size шагов.
+    Трассу можно прочитать обратно через load_trace.
+    """
+
+    def __init__(self, path: str, batch_size: int = 4096):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.batches = queue.Queue(maxsize=64)
+        self.thread = None
+        self.stream = None
+
+    def begin(self, machine):
+        """Начало трассы: заголовок файла и запуск потока записи"""
+        self.stream = open(self.path, "w", encoding="utf-8")
+        header = {"state": machine.current_state, "step": machine.step_count,
+                  "tape": machine.tape.snapshot().hex()}
+        self.stream.write(json.dumps(header, ensure_ascii=False) + "\n")
+        self.thread = threading.Thread(target=self._write_batches, daemon=True)
+        self.thread.start()
+
+    def record(self, state: str, head: int, symbol: str, direction: str):
+        """Запись шага (без обращения к файлу)"""
+        self.pending.append((state, head, symbol, direction))
+        if len(self.pending) >= self.batch_size:
+            self.batches.put(self.pending)
+            self.pending = []
+
+    def end(self, machine):
+        """Окончание трассы: запись оставшихся шагов и остановка потока"""
+        if self.pending:
+            self.batches.put(self.pending)
+            self.pending = []
+        self.batches.put(None)
+        self.thread.join()
+        self.stream.close()
+
+    def _write_batches(self):
+        """Цикл потока записи"""
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            self.stream.write("".join(f"{state}\t{head}\t{symbol}\t{direction}\n"
+                                      for state, head, symbol, direction in batch))
+
+
+def load_trace(path: str, capacity: int = None) -> TraceBuffer:
+    """Чтение трассы, записанной TraceFileWriter"""
+    trace = TraceBuffer(capacity)
+    with open(path, encoding="utf-8") as stream:
+        header = json.loads(stream.readline())
+        trace.start(bytes.fromhex(header["tape"]), header["state"], header["step"])
+        for line in stream:
+            state, head, symbol, direction = line.rstrip("\n").split("\t")
+            trace.record(state, int(head), symbol, direction)
+    return trace
@@ -1,10 +1,32 @@
 import unittest
+import asyncio
 import io
+import os
 import sys
+from contextlib import redirect_stdout
 from core.tape import Tape
+from core.array_tape import ArrayTape
+from core.packed_tape import PackedTape, choose_tape_class
 from core.rule import Rule
 from core.program import Program
 from core.machine import TuringMachine
+from core.batch import run_batch, STATUS_HALTED, STATUS_LOOPED, STATUS_BUDGET_EXCEEDED
+from core.multitape import MultiTapeRule, MultiTapeProgram, MultiTapeTuringMachine
+from core.trace import TraceBuffer, TraceFileWriter, load_trace
+from core.nondeterministic import NondeterministicProgram, NondeterministicTuringMachine
+from core.scheduler import MachineScheduler, STATUS_PAUSED, STATUS_CANCELLED
+from core.fuzz import fuzz_program
+
+
+def create_counter_program():
+    """Программа двоичного счетчика (не останавливается)"""
+    program = Program()
+    for line in ["q0 0 q0 0 R", "q0 1 q0 1 R", "q0 _ q1 _ L",
+                 "q1 1 q1 0 L", "q1 0 q2 1 R", "q1 _ q2 1 R",
+                 "q2 0 q2 0 R", "q2 1 q2 1 R", "q2 _ q1 _ L"]:
+        parts = [part.replace("_", " ") for part in line.split()]
+        program.add_rule(Rule(*parts))
+    return program
 
 
 class TestTape(unittest.TestCase):
@@ -56,6 +78,186 @@ class TestTape(unittest.TestCase):
         self.assertEqual(tape.read(), 'e')
 
 
+class TestArrayTape(unittest.TestCase):
+    """Тесты для класса ArrayTape"""
+
+    def test_array_tape_read_write(self):
+        """Тест чтения, записи и движения головки"""
+        tape = ArrayTape("101")
+        self.assertEqual(tape.read(), '1')
+        tape.write('0')
+        self.assertEqual(tape.read(), '0')
+
+        tape.move_left()
+        tape.move_left()
+        self.assertEqual(tape.read(), ' ')
+        tape.write('X')
+        self.assertEqual(tape.read(), 'X')
+        self.assertEqual(tape.min_position, -2)
+
+        tape.head_position = 1000
+        tape.write('Y')
+        self.assertEqual(tape.read(), 'Y')
+        self.assertEqual(tape.max_position, 1000)
+
+        tape.write(' ')
+        self.assertEqual(tape.read(), ' ')
+
+    def test_array_tape_matches_tape(self):
+        """Тест совпадения поведения с Tape на случайных операциях"""
+        import random
+
+        rng = random.Random(42)
+        dict_tape = Tape("0110")
+        array_tape = ArrayTape("0110")
+
+        for _ in range(2000):
+            operation = rng.choice(["L", "R", "W"])
+            if operation == "L":
+                dict_tape.move_left()
+                array_tape.move_left()
+            elif operation == "R":
+                dict_tape.move_right()
+                array_tape.move_right()
+            else:
+                symbol = rng.choice("01 ")
+                dict_tape.write(symbol)
+                array_tape.write(symbol)
+
+            self.assertEqual(dict_tape.read(), array_tape.read())
+
+        self.assertEqual(dict_tape.min_position, array_tape.min_position)
+        self.assertEqual(dict_tape.max_position, array_tape.max_position)
+        self.assertEqual(dict_tape.get_visible_tape(), array_tape.get_visible_tape())
+
+    def test_array_tape_load_from_stream(self):
+        """Тест загрузки ленты из потока"""
+        tape = ArrayTape("original")
+        tape.load_from_stream(io.StringIO("Hi"))
+        self.assertEqual(tape.get_visible_tape(padding=1), " [H]i")
+
+    def test_array_tape_symbol_limit(self):
+        """Тест ограничения на количество символов"""
+        tape = ArrayTape()
+        with self.assertRaises(ValueError):
+            for code in range(300):
+                tape.write(chr(1000 + code))
+
+    def test_machine_with_array_tape(self):
+        """Тест выбора ленты при создании машины"""
+        program = Program()
+        program.add_rule(Rule("q0", " ", "q0", "1", "R"))
+
+        tm = TuringMachine(program=program, tape_class=ArrayTape)
+        self.assertIsInstance(tm.tape, ArrayTape)
+        tm.load_tape_from_stream(io.StringIO(""))
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps=50)
+            tm.run_compiled(max_steps=100)
+
+        self.assertEqual(tm.step_count, 100)
+        self.assertEqual(tm.tape.get_visible_tape(padding=0), "1" * 100 + "[ ]")
+
+
+class TestPackedTape(unittest.TestCase):
+    """Тесты для класса PackedTape"""
+
+    def test_packed_tape_matches_tape(self):
+        """Тест совпадения поведения с Tape на случайных операциях"""
+        import random
+
+        rng = random.Random(19)
+        dict_tape = Tape("0110")
+        packed_tape = PackedTape("0110")
+
+        for _ in range(3000):
+            operation = rng.choice(["L", "R", "W"])
+            if operation == "L":
+                dict_tape.move_left()
+                packed_tape.move_left()
+            elif operation == "R":
+                dict_tape.move_right()
+                packed_tape.move_right()
+            else:
+                symbol = rng.choice("01 ")
+                dict_tape.write(symbol)
+                packed_tape.write(symbol)
+
+            self.assertEqual(dict_tape.read(), packed_tape.read())
+
+        self.assertEqual(dict_tape.min_position, packed_tape.min_position)
+        self.assertEqual(dict_tape.max_position, packed_tape.max_position)
+        self.assertEqual(dict_tape.get_visible_tape(), packed_tape.get_visible_tape())
+        self.assertEqual(list(dict_tape.iter_cells()), list(packed_tape.iter_cells()))
+
+        restored = PackedTape()
+        restored.restore(packed_tape.snapshot())
+        self.assertEqual(restored.get_visible_tape(), packed_tape.get_visible_tape())
+        self.assertEqual(restored.content_key(), packed_tape.content_key())
+
+    def test_packed_tape_storage(self):
+        """Тест упаковки 4 ячеек в байт и ограничения на количество символов"""
+        tape = PackedTape("01" * 500)
+        self.assertEqual(len(tape.right), 250)
+        self.assertEqual(tape.get_window(padding=2), "  [0]10")
+
+        tape.write("x")
+        with self.assertRaises(ValueError):
+            tape.write("y")
+
+    def test_sweep_fills_blank_tail(self):
+        """Тест прохода по пустой части ленты с заполнением символом"""
+        program = Program()
+        program.add_rule(Rule("q0", " ", "q0", "1", "R"))
+
+        for start in (0, 3):
+            with self.subTest(start=start):
+                expected = TuringMachine(Tape("0" * start), program)
+                packed = TuringMachine(PackedTape("0" * start), program)
+                expected.tape.head_position = packed.tape.head_position = start
+                with redirect_stdout(io.StringIO()):
+                    expected.run(max_steps=1001)
+                    packed.run(max_steps=1001, accelerate=True)
+
+                self.assertEqual(packed.step_count, 1001)
+                self.assertEqual(packed.tape.get_visible_tape(), expected.tape.get_visible_tape())
+
+    def test_choose_tape_class(self):
+        """Тест автоматического выбора ленты по алфавиту программы"""
+        self.assertIs(choose_tape_class({"0", "1"}), PackedTape)
+        self.assertIs(choose_tape_class({"0", "1", "x", "y"}), ArrayTape)
+        self.assertIs(choose_tape_class({chr(1000 + code) for code in range(300)}), Tape)
+
+        program = Program()
+        program.add_rule(Rule("q0", "0", "q0", "1", "R"))
+        program.add_rule(Rule("q0", "1", "q0", "0", "R"))
+        tm = TuringMachine(PackedTape("0110"), program, tape_class=None)
+        self.assertIs(tm.tape_class, PackedTape)
+        with redirect_stdout(io.StringIO()):
+            tm.run_compiled(max_steps=100)
+        self.assertEqual(tm.tape.get_visible_tape(padding=0), "1001[ ]")
+
+        # Загрузка программы без секции ===TAPE=== не стирает загруженную ленту
+        for data, tape_class in (("0110", PackedTape), ("01xyz", ArrayTape)):
+            with self.subTest(data=data):
+                tm = TuringMachine(ArrayTape(), tape_class=None)
+                tm.load_tape_from_stream(io.StringIO(data))
+                tm.tape.move_left()
+                tm.load_program_from_stream(io.StringIO("q0 0 -> q0 1 R\nq0 1 -> q0 0 R\n"))
+                self.assertIs(type(tm.tape), tape_class)
+                self.assertEqual("".join(tm.tape.iter_cells()), " " + data)
+                self.assertEqual(tm.tape.head_position, -1)
+
+        # Символы ленты из секции ===TAPE=== учитываются при выборе класса
+        tm = TuringMachine(tape_class=None)
+        tm.load_program_from_stream(io.StringIO("q0 0 -> q0 1 R\n===TAPE===\n01ab\n"))
+        self.assertIs(tm.tape_class, ArrayTape)
+        self.assertEqual("".join(tm.tape.iter_cells()), "01ab")
+
+        results = list(run_batch(program, ["01", "0a"], workers=1, tape_class=None))
+        self.assertEqual([result.tape for result in results], ["10", "1a"])
+
+
 class TestRule(unittest.TestCase):
     """Тесты для класса Rule"""
 
@@ -135,6 +337,43 @@ q0 _ -> q_final _ S
         self.assertEqual(self.program.initial_state, "q0")
         self.assertIn("q_final", self.program.final_states)
 
+    def test_load_from_stream_errors_and_tape(self):
+        """Тест сбора ошибок и секции ленты при загрузке"""
+        program_text = """initial q0
+final halt
+q0 0 -> q0 1 R
+q0 1 -> q0
+q0 0 -> q1 0 L
+q0 _ -> halt _ S
+===TAPE===
+1011001
+"""
+        output = io.StringIO()
+        with redirect_stdout(output), self.assertLogs("core.program", level="WARNING"):
+            self.program.load_from_stream(io.StringIO(program_text))
+
+        self.assertEqual(output.getvalue(), "")  # Загрузка ничего не печатает
+        self.assertEqual(len(self.program.rules), 2)
+        self.assertEqual([line for line, _ in self.program.errors], [4, 5])
+        self.assertIn("Конфликт", self.program.errors[1][1])
+        self.assertEqual(self.program.tape_data, "1011001")
+
+        # Машина загружает ленту из той же секции
+        tm = TuringMachine()
+        with self.assertLogs("core.program", level="WARNING"):
+            tm.load_program_from_stream(io.StringIO(program_text))
+        self.assertEqual(tm.tape.get_visible_tape(padding=0), "[1]011001")
+
+    def test_load_large_program(self):
+        """Тест загрузки программы из большого количества строк"""
+        lines = [f"q{i} {symbol} -> q{i + 1} {symbol} R" for i in range(20000) for symbol in "01"]
+        self.program.load_from_stream(io.StringIO("\n".join(lines)))
+
+        self.assertEqual(len(self.program.rules), 40000)
+        self.assertEqual(self.program.errors, [])
+        self.assertIsNone(self.program.tape_data)
+        self.assertEqual(self.program.get_rule("q19999", "1").next_state, "q20000")
+
     def test_remove_rule(self):
         """Тест удаления правила"""
         rule = Rule("q0", "0", "q1", "1", "R")
@@ -145,6 +384,49 @@ q0 _ -> q_final _ S
         self.assertEqual(len(self.program.rules), 0)
 
 
+class TestRuleIndex(unittest.TestCase):
+    """Тесты для индекса правил Program по паре (состояние, символ)"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.program = Program()
+
+    def test_rule_index_remove_rule(self):
+        """Тест удаления правила из индекса"""
+        rule = Rule("q0", "0", "q1", "1", "R")
+        self.program.add_rule(rule)
+        self.assertIs(self.program.get_rule("q0", "0"), rule)
+
+        self.program.remove_rule(rule)
+        self.assertIsNone(self.program.get_rule("q0", "0"))
+
+    def test_rule_index_duplicates_and_conflicts(self):
+        """Тест обнаружения дубликатов и конфликтующих правил"""
+        self.program.add_rule(Rule("q0", "0", "q1", "1", "R"))
+
+        # Точный дубликат не добавляется повторно
+        self.program.add_rule(Rule("q0", "0", "q1", "1", "R"))
+        self.assertEqual(len(self.program.rules), 1)
+
+        # Другое действие для той же пары (состояние, символ) - конфликт
+        with self.assertRaises(ValueError):
+            self.program.add_rule(Rule("q0", "0", "q2", "0", "L"))
+        self.assertEqual(self.program.get_rule("q0", "0").next_state, "q1")
+
+    def test_rule_index_large_program(self):
+        """Тест поиска правил в большой программе"""
+        for i in range(500):
+            self.program.add_rule(Rule(f"q{i}", "1", f"q{i + 1}", "0", "R"))
+
+        rule = self.program.get_rule("q499", "1")
+        self.assertEqual(rule.next_state, "q500")
+        self.assertIsNone(self.program.get_rule("q500", "1"))
+
+        self.program.remove_rule(rule)
+        self.assertIsNone(self.program.get_rule("q499", "1"))
+        self.assertEqual(self.program.get_rule("q0", "1").next_state, "q1")
+
+
 class TestTuringMachine(unittest.TestCase):
     """Тесты для класса TuringMachine"""
 
@@ -230,6 +512,1183 @@ class TestTuringMachine(unittest.TestCase):
         self.assertEqual(self.tm.tape.head_position, 0)
 
 
+class TestCompiledProgram(unittest.TestCase):
+    """Тесты для скомпилированного выполнения программ"""
+
+    def assert_same_result(self, first, second):
+        """Проверка совпадения состояния двух машин"""
+        self.assertEqual(first.current_state, second.current_state)
+        self.assertEqual(first.step_count, second.step_count)
+        self.assertEqual(first.is_halted, second.is_halted)
+        self.assertEqual(first.tape.head_position, second.tape.head_position)
+        self.assertEqual(first.tape.get_visible_tape(), second.tape.get_visible_tape())
+
+    def test_compile_tables(self):
+        """Тест построения таблиц переходов"""
+        program = Program()
+        program.add_rule(Rule("q0", "0", "q1", "1", "R"))
+        program.final_states = {"q1"}
+        compiled = program.compile()
+
+        q0 = compiled.state_ids["q0"]
+        q1 = compiled.state_ids["q1"]
+        zero = compiled.symbol_ids["0"]
+        one = compiled.symbol_ids["1"]
+
+        index = q0 * compiled.n_symbols + zero
+        self.assertEqual(compiled.next_state[index], q1)
+        self.assertEqual(compiled.write_symbol[index], one)
+        self.assertEqual(compiled.move[index], 1)
+        self.assertEqual(compiled.next_state[q0 * compiled.n_symbols + one], -1)
+        self.assertEqual(compiled.initial_state, q0)
+        self.assertTrue(compiled.final[q1])
+
+        # Добавление нового символа не портит существующие переходы
+        compiled.intern_symbol("X")
+        index = q0 * compiled.n_symbols + zero
+        self.assertEqual(compiled.next_state[index], q1)
+
+    def test_run_compiled_array_tapes(self):
+        """Тест переноса ленты в скомпилированную программу и обратно для всех видов лент"""
+        program = Program()
+        # Проход влево по слову с инверсией, затем запись маркера слева от слова
+        program.add_rule(Rule("q0", "0", "q0", "1", "L"))
+        program.add_rule(Rule("q0", "1", "q0", "0", "L"))
+        program.add_rule(Rule("q0", " ", "halt", "x", "L"))
+        program.final_states = {"halt"}
+
+        for tape_class in (Tape, ArrayTape, PackedTape):
+            with self.subTest(tape=tape_class.__name__):
+                expected = TuringMachine(tape_class("0110" * 50), program)
+                compiled = TuringMachine(tape_class("0110" * 50), program)
+                expected.tape.head_position = compiled.tape.head_position = 199
+                with redirect_stdout(io.StringIO()):
+                    expected.run(max_steps=1000, accelerate=False)
+                    compiled.run_compiled(max_steps=1000)
+
+                self.assert_same_result(expected, compiled)
+                self.assertEqual(compiled.tape.min_position, expected.tape.min_position)
+                self.assertEqual(compiled.get_tape_value(-1), "x")
+
+    def test_run_compiled_matches_run(self):
+        """Тест совпадения результатов run и run_compiled"""
+        program = create_counter_program()
+        for max_steps in [0, 1, 7, 100, 2000]:
+            with self.subTest(max_steps=max_steps):
+                first = TuringMachine(Tape("0"), program)
+                second = TuringMachine(Tape("0"), program)
+                with redirect_stdout(io.StringIO()):
+                    first.run(max_steps=max_steps)
+                    second.run_compiled(max_steps=max_steps)
+                self.assert_same_result(first, second)
+
+    def test_run_compiled_halting(self):
+        """Тест остановки скомпилированной программы"""
+        program = Program()
+        program.add_rule(Rule("q0", "0", "q0", "1", "L"))
+        program.add_rule(Rule("q0", "1", "q0", "0", "L"))
+        program.add_rule(Rule("q0", " ", "halt", "#", "S"))
+        program.final_states = {"halt"}
+
+        tape = Tape("X01")
+        tape.head_position = 2
+        first = TuringMachine(tape, program)
+        first.run_compiled(max_steps=100)
+
+        # Символ X отсутствует в алфавите программы - машина останавливается на нем
+        self.assertTrue(first.is_halted)
+        self.assertEqual(first.step_count, 2)
+        self.assertEqual(first.current_state, "q0")
+        self.assertEqual(first.tape.get_visible_tape(padding=0), "[X]10")
+
+        second = TuringMachine(Tape("01"), program)
+        second.run_compiled(max_steps=100)
+        self.assertEqual(second.current_state, "halt")
+        self.assertEqual(second.tape.min_position, -1)
+        self.assertEqual(second.get_tape_value(-1), "#")
+
+
+class TestMacroSteps(unittest.TestCase):
+    """Тесты для ускоренного выполнения петлевых правил"""
+
+    def create_program(self, direction):
+        """Программа инвертирования с проходом в заданном направлении"""
+        program = Program()
+        program.add_rule(Rule("q0", "0", "q0", "1", direction))
+        program.add_rule(Rule("q0", "1", "q0", "0", direction))
+        program.add_rule(Rule("q0", " ", "halt", "#", "S"))
+        program.final_states = {"halt"}
+        return program
+
+    def test_rule_is_self_loop(self):
+        """Тест определения петлевых правил"""
+        self.assertTrue(Rule("q0", "0", "q0", "1", "R").is_self_loop())
+        self.assertFalse(Rule("q0", "0", "q0", "1", "S").is_self_loop())
+        self.assertFalse(Rule("q0", "0", "q1", "1", "L").is_self_loop())
+
+    def test_sweep_matches_single_steps(self):
+        """Тест совпадения результата с пошаговым выполнением"""
+        import random
+
+        rng = random.Random(7)
+        data = "".join(rng.choice("01") for _ in range(3000))
+
+        for tape_class in (Tape, ArrayTape, PackedTape):
+            for direction, head in (("R", 0), ("L", 2999)):
+                with self.subTest(tape=tape_class.__name__, direction=direction):
+                    results = []
+                    for accelerate in (False, True):
+                        tape = tape_class(data)
+                        tape.head_position = head
+                        tm = TuringMachine(tape, self.create_program(direction))
+                        tm.run(max_steps=10000, accelerate=accelerate)
+                        results.append((tm.current_state, tm.step_count, tm.tape.head_position,
+                                        tm.tape.min_position, tm.tape.get_visible_tape()))
+
+                    self.assertEqual(results[0], results[1])
+                    self.assertEqual(results[1][0], "halt")
+                    self.assertEqual(results[1][1], 3001)
+
+    def test_sweep_respects_max_steps(self):
+        """Тест ограничения числа шагов при проходе по пустой ленте"""
+        program = Program()
+        program.add_rule(Rule("q0", " ", "q0", "1", "L"))
+
+        for tape_class in (Tape, ArrayTape, PackedTape):
+            with self.subTest(tape=tape_class.__name__):
+                tm = TuringMachine(tape_class(""), program)
+                with redirect_stdout(io.StringIO()):
+                    tm.run(max_steps=100000)
+
+                self.assertEqual(tm.step_count, 100000)
+                self.assertFalse(tm.is_halted)
+                self.assertEqual(tm.tape.head_position, -100000)
+                self.assertEqual(tm.tape.min_position, -100000)
+                self.assertEqual(tm.get_tape_value(-99999), "1")
+                self.assertEqual(tm.get_tape_value(-100000), " ")
+
+
+    def test_sweep_plan_cache_is_bounded(self):
+        """Тест кеша планов прохода: одинаковые правила - один план, размер ограничен"""
+        tape = ArrayTape("0" * 10)
+        for _ in range(100):
+            tape.head_position = 0
+            self.assertEqual(tape.sweep({"0": "0"}, "R", 5), 5)
+        self.assertEqual(len(tape._sweep_plans), 1)
+
+        for code in range(200):
+            tape.sweep({chr(0x400 + code % 100): "0", "1": "0"}, "R", 1)
+        self.assertLessEqual(len(tape._sweep_plans), 64)
+
+    def test_short_sweeps_match_single_steps(self):
+        """Тест программы с короткими сериями (проходы отключаются, результат тот же)"""
+        for tape_class in (Tape, ArrayTape):
+            with self.subTest(tape=tape_class.__name__):
+                results = []
+                for accelerate in (False, True):
+                    tm = TuringMachine(tape_class("0"), create_counter_program())
+                    with redirect_stdout(io.StringIO()):
+                        tm.run(max_steps=5000, accelerate=accelerate)
+                    results.append((tm.current_state, tm.step_count, tm.tape.get_visible_tape()))
+                self.assertEqual(results[0], results[1])
+
+
+class TestLoopDetection(unittest.TestCase):
+    """Тесты для обнаружения зацикливания"""
+
+    def test_detects_oscillation(self):
+        """Тест обнаружения цикла с периодом 2"""
+        program = Program()
+        program.add_rule(Rule("q0", "A", "q1", "A", "R"))
+        program.add_rule(Rule("q1", " ", "q0", " ", "L"))
+
+        for tape_class in (Tape, ArrayTape):
+            with self.subTest(tape=tape_class.__name__):
+                tm = TuringMachine(tape_class("A"), program)
+                output = io.StringIO()
+                with redirect_stdout(output):
+                    tm.run(max_steps=10 ** 6, detect_loops=True)
+
+                self.assertIsNotNone(tm.loop_detected)
+                step, period = tm.loop_detected
+                self.assertEqual(period, 2)
+                self.assertLess(step, 10)
+                self.assertEqual(tm.step_count, step)
+                self.assertFalse(tm.is_halted)
+                self.assertIn("зацикливание", output.getvalue())
+
+    def test_detects_loop_after_prefix(self):
+        """Тест обнаружения цикла после предварительных шагов"""
+        program = Program()
+        # Проход вправо до конца слова, затем бесконечное переключение 0 <-> 1
+        program.add_rule(Rule("q0", "1", "q0", "1", "R"))
+        program.add_rule(Rule("q0", " ", "q1", "0", "S"))
+        program.add_rule(Rule("q1", "0", "q2", "1", "S"))
+        program.add_rule(Rule("q2", "1", "q3", "1", "S"))
+        program.add_rule(Rule("q3", "1", "q1", "0", "S"))
+
+        tm = TuringMachine(Tape("1" * 50), program)
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps=10 ** 6, detect_loops=True)
+
+        step, period = tm.loop_detected
+        self.assertEqual(period, 3)
+        self.assertLess(step, 200)
+
+    def test_growing_tape_not_reported(self):
+        """Тест отсутствия ложного срабатывания, когда ячейки меняются и возвращаются"""
+        for tape_class in (Tape, ArrayTape):
+            with self.subTest(tape=tape_class.__name__):
+                tm = TuringMachine(tape_class("0"), create_counter_program())
+                with redirect_stdout(io.StringIO()):
+                    tm.run(max_steps=20000, detect_loops=True)
+                self.assertIsNone(tm.loop_detected)
+                self.assertEqual(tm.step_count, 20000)
+
+    def test_loop_on_large_tape(self):
+        """Тест цикла, который меняет ячейки на большой ленте и восстанавливает их"""
+        program = Program()
+        # Переключение 0 -> 1 и обратно с шагом вправо и влево
+        program.add_rule(Rule("q0", "0", "q1", "1", "R"))
+        program.add_rule(Rule("q1", "0", "q2", "0", "L"))
+        program.add_rule(Rule("q2", "1", "q0", "0", "S"))
+
+        tm = TuringMachine(ArrayTape("0" * 100000), program)
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps=10 ** 6, detect_loops=True)
+
+        self.assertIsNotNone(tm.loop_detected)
+        self.assertEqual(tm.loop_detected[1], 3)
+        self.assertEqual(tm.tape.get_window(padding=1), " [0]0")
+
+    def test_halting_program_not_reported(self):
+        """Тест отсутствия ложных срабатываний"""
+        program = Program()
+        program.add_rule(Rule("q0", "0", "q0", "1", "R"))
+        program.add_rule(Rule("q0", " ", "halt", " ", "S"))
+        program.final_states = {"halt"}
+
+        tm = TuringMachine(Tape("000"), program)
+        tm.run(max_steps=100, detect_loops=True)
+        self.assertTrue(tm.is_halted)
+        self.assertIsNone(tm.loop_detected)
+
+        # Движение по бесконечной пустой ленте не является повтором конфигурации
+        program = Program()
+        program.add_rule(Rule("q0", " ", "q0", " ", "R"))
+        tm = TuringMachine(Tape(""), program)
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps=1000, detect_loops=True)
+        self.assertIsNone(tm.loop_detected)
+        self.assertEqual(tm.step_count, 1000)
+
+
+class TestBatchRunner(unittest.TestCase):
+    """Тесты для пакетного выполнения программы на многих лентах"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.program = Program()
+        self.program.add_rule(Rule("q0", "0", "q0", "1", "R"))
+        self.program.add_rule(Rule("q0", "1", "q0", "0", "R"))
+        self.program.add_rule(Rule("q0", " ", "halt", " ", "S"))
+        self.program.add_rule(Rule("q0", "X", "q1", "X", "R"))
+        self.program.add_rule(Rule("q1", " ", "q2", " ", "L"))
+        self.program.add_rule(Rule("q2", "X", "q1", "X", "R"))
+        self.program.final_states = {"halt"}
+        self.tapes = ["101", "000", "0110X", "", "1" * 50]
+
+    def check_results(self, results):
+        """Проверка результатов для набора лент из setUp"""
+        results = sorted(results, key=lambda result: result.index)
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3, 4])
+
+        self.assertEqual(results[0].tape, "010")
+        self.assertEqual(results[0].state, "halt")
+        self.assertEqual(results[0].steps, 4)
+        self.assertEqual(results[0].status, STATUS_HALTED)
+        self.assertEqual(results[1].tape, "111")
+        self.assertEqual(results[3].tape, "")
+        self.assertEqual(results[4].status, STATUS_BUDGET_EXCEEDED)
+        self.assertEqual(results[4].steps, 20)
+        return results
+
+    def test_run_batch_in_process(self):
+        """Тест пакетного выполнения в текущем процессе"""
+        results = self.check_results(run_batch(self.program, self.tapes, max_steps=20, workers=1))
+        self.assertEqual(results[2].tape, "1001X")
+        self.assertEqual(results[2].status, STATUS_BUDGET_EXCEEDED)
+
+    def test_run_batch_detects_loops(self):
+        """Тест пакетного выполнения с обнаружением зацикливания"""
+        results = self.check_results(run_batch(self.program, self.tapes, max_steps=20,
+                                               workers=1, detect_loops=True))
+        self.assertEqual(results[2].status, STATUS_LOOPED)
+
+    def test_run_batch_process_pool(self):
+        """Тест пакетного выполнения в пуле процессов"""
+        results = self.check_results(run_batch(self.program, self.tapes, max_steps=20,
+                                               workers=2, chunksize=1, tape_class=ArrayTape))
+        self.assertEqual(results[2].status, STATUS_BUDGET_EXCEEDED)
+
+
+class TestBinaryFormat(unittest.TestCase):
+    """Тесты для двоичного формата программ и снимков ленты"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        import tempfile
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "program.tmb")
+
+    def tearDown(self):
+        """Удаление временных файлов"""
+        self.directory.cleanup()
+
+    def test_program_binary_round_trip(self):
+        """Тест сохранения и загрузки скомпилированной программы"""
+        program = create_counter_program()
+        program.save_binary(self.path)
+        compiled = Program.load_binary(self.path)
+
+        original = program.compile()
+        self.assertEqual(compiled.states, original.states)
+        self.assertEqual(compiled.symbols, original.symbols)
+        self.assertEqual(list(compiled.next_state), list(original.next_state))
+        self.assertEqual(list(compiled.move), list(original.move))
+        self.assertIsInstance(compiled.next_state, memoryview)  # Таблица читается из mmap
+
+        first = TuringMachine(Tape("0"), program)
+        second = TuringMachine(Tape("0X"), program)
+        with redirect_stdout(io.StringIO()):
+            first.run_compiled(max_steps=500)
+            second.run_compiled(max_steps=500, compiled=compiled)
+        self.assertEqual(first.step_count, 500)
+
+        # Новый символ X на ленте добавлен в таблицы загруженной программы
+        self.assertIn("X", compiled.symbols)
+        self.assertEqual(second.current_state, "q0")
+        self.assertTrue(second.is_halted)
+
+    def test_program_binary_bad_signature(self):
+        """Тест загрузки файла неверного формата"""
+        with open(self.path, "wb") as stream:
+            stream.write(b"NOPE" + bytes(32))
+        with self.assertRaises(ValueError):
+            Program.load_binary(self.path)
+
+    def test_large_alphabet_snapshot(self):
+        """Тест снимков, контрольных точек и истории ленты с алфавитом больше 256 символов"""
+        symbols = [chr(0x100 + code) for code in range(300)]
+        program = Program()
+        for symbol, next_symbol in zip(symbols, symbols[1:] + symbols[:1]):
+            program.add_rule(Rule("q0", symbol, "q0", next_symbol, "R"))
+        program.initial_state = "q0"
+
+        tape = Tape("".join(symbols))
+        tape.head_position = -2
+        tape.write(symbols[-1])
+        copy = Tape()
+        copy.restore(tape.snapshot())
+        self.assertEqual(copy.tape, tape.tape)
+        self.assertEqual((copy.min_position, copy.max_position, copy.head_position), (-2, 299, -2))
+        with self.assertRaises(ValueError):
+            ArrayTape().restore(tape.snapshot())
+
+        expected = TuringMachine(Tape("".join(symbols)), program)
+        checkpointed = TuringMachine(Tape("".join(symbols)), program)
+        with redirect_stdout(io.StringIO()):
+            expected.run(max_steps=250)
+            checkpointed.run_with_checkpoints(self.path, max_steps=250, every_steps=100)
+        resumed = TuringMachine.resume(self.path)
+        self.assertEqual(resumed.tape.tape, expected.tape.tape)
+        self.assertEqual(resumed.step_count, 250)
+
+        tm = TuringMachine(Tape("".join(symbols)), program)
+        tm.enable_history(snapshot_every=50)
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps=250)
+        tm.run_to(120)
+        self.assertEqual(tm.step_count, 120)
+        self.assertEqual(tm.tape.read(), symbols[120])
+        self.assertEqual(tm.tape.get_cells(0, 2), symbols[1:3])
+
+    def test_tape_snapshot_restore(self):
+        """Тест снимков ленты для обеих реализаций"""
+        for source_class in (Tape, ArrayTape):
+            for target_class in (Tape, ArrayTape):
+                with self.subTest(source=source_class.__name__, target=target_class.__name__):
+                    source = source_class("abc")
+                    source.head_position = -3
+                    source.write("x")
+                    source.head_position = 7
+                    source.write("y")
+                    source.head_position = 1
+
+                    target = target_class("something else")
+                    target.restore(source.snapshot())
+
+                    self.assertEqual(target.get_visible_tape(), source.get_visible_tape())
+                    self.assertEqual(target.read(), "b")
+                    self.assertEqual((target.min_position, target.max_position), (-3, 7))
+
+    def test_array_tape_segment(self):
+        """Тест чтения отрезка ленты по кодам"""
+        tape = ArrayTape("ab")
+        tape.head_position = -2
+        tape.write("c")
+        segment = tape.get_segment(-3, 4)
+        self.assertEqual([tape.symbols[code] for code in segment], [" ", "c", " ", "a", "b", " ", " "])
+        self.assertEqual(len(tape.get_segment(-10, -5)), 5)
+        self.assertEqual(len(tape.get_segment(5, 10)), 5)
+
+
+class TestTapeWindow(unittest.TestCase):
+    """Тесты для окна ленты вокруг головки и потокового вывода ленты"""
+
+    def test_window_and_export(self):
+        """Тест окна вокруг головки и потокового вывода ленты"""
+        for tape_class in (Tape, ArrayTape):
+            with self.subTest(tape=tape_class.__name__):
+                tape = tape_class("abc")
+                tape.head_position = -3
+                tape.write("x")
+                tape.head_position = 200000
+                tape.write("y")
+                tape.head_position = 1
+
+                self.assertEqual(tape.get_window(padding=2), " a[b]c ")
+                self.assertEqual(tape.get_window(padding=0), "[b]")
+                self.assertEqual("".join(tape.iter_cells(-4, 3)), " x  abc")
+
+                output = io.StringIO()
+                self.assertEqual(tape.export(output), 200004)
+                content = output.getvalue()
+                self.assertEqual(len(content), 200004)
+                self.assertEqual((content[:7], content[-1]), ("x  abc ", "y"))
+                self.assertEqual(content, "".join(tape.iter_cells()))
+
+    def test_visible_tape_limited_around_head(self):
+        """Тест видимой части большой ленты: показываются только ячейки около головки"""
+        for tape_class in (Tape, ArrayTape, PackedTape):
+            with self.subTest(tape=tape_class.__name__):
+                tape = tape_class("01" * 5000)
+                tape.head_position = 4000
+                visible = tape.get_visible_tape()
+                self.assertEqual(visible, tape.get_window(padding=1000))
+                self.assertEqual(tape.get_visible_tape(padding=3000), tape.get_window(padding=3000))
+
+                tape.head_position = 9995
+                self.assertEqual(tape.get_visible_tape(padding=2),
+                                 "".join(tape.iter_cells(8995, 9995)) + "[1]0101")
+
+
+class TestCheckpoint(unittest.TestCase):
+    """Тесты для контрольных точек выполнения"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        import tempfile
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "run.tmck")
+
+    def tearDown(self):
+        """Удаление временных файлов"""
+        self.directory.cleanup()
+
+    def test_resume_matches_uninterrupted_run(self):
+        """Тест продолжения выполнения с контрольной точки"""
+        program = create_counter_program()
+        for tape_class in (Tape, ArrayTape):
+            with self.subTest(tape=tape_class.__name__):
+                expected = TuringMachine(tape_class("0"), program)
+                first = TuringMachine(tape_class("0"), program)
+                with redirect_stdout(io.StringIO()):
+                    expected.run_compiled(max_steps=5000)
+                    first.run_with_checkpoints(self.path, max_steps=2000, every_steps=300)
+
+                resumed = TuringMachine.resume(self.path, tape_class)
+                self.assertEqual(resumed.step_count, 2000)
+                self.assertEqual(resumed.current_state, first.current_state)
+                self.assertEqual(resumed.tape.get_visible_tape(), first.tape.get_visible_tape())
+
+                with redirect_stdout(io.StringIO()):
+                    resumed.run_with_checkpoints(self.path, max_steps=5000, every_steps=300)
+                self.assertEqual(resumed.step_count, 5000)
+                self.assertEqual(resumed.current_state, expected.current_state)
+                self.assertEqual(resumed.tape.get_visible_tape(), expected.tape.get_visible_tape())
+
+    def test_small_interval_keeps_tape_consistent(self):
+        """Тест частых контрольных точек: лента и файл совпадают с обычным выполнением"""
+        program = create_counter_program()
+        for tape_class in (Tape, ArrayTape, PackedTape):
+            with self.subTest(tape=tape_class.__name__):
+                expected = TuringMachine(tape_class("0"), program)
+                tm = TuringMachine(tape_class("0"), program)
+                with redirect_stdout(io.StringIO()):
+                    expected.run_compiled(max_steps=3000)
+                    tm.run_with_checkpoints(self.path, max_steps=3000, every_steps=7)
+
+                self.assertEqual(tm.tape.get_visible_tape(), expected.tape.get_visible_tape())
+                self.assertEqual(tm.tape.min_position, expected.tape.min_position)
+                resumed = TuringMachine.resume(self.path, tape_class)
+                self.assertEqual(resumed.tape.get_visible_tape(), expected.tape.get_visible_tape())
+
+    def test_deltas_and_truncated_record(self):
+        """Тест записи дельт и пропуска недописанной записи"""
+        program = create_counter_program()
+        tm = TuringMachine(Tape("0"), program)
+        with redirect_stdout(io.StringIO()):
+            tm.run_with_checkpoints(self.path, max_steps=1000, every_steps=100)
+        size = os.path.getsize(self.path)
+
+        # Обрыв файла на середине последней записи - восстанавливается предыдущая точка
+        with open(self.path, "r+b") as stream:
+            stream.truncate(size - 3)
+        resumed = TuringMachine.resume(self.path)
+        self.assertEqual(resumed.step_count, 900)
+
+    def test_halted_run_and_time_trigger(self):
+        """Тест контрольной точки по времени для остановившейся машины"""
+        program = Program()
+        program.add_rule(Rule("q0", "1", "q0", "0", "R"))
+        program.add_rule(Rule("q0", " ", "qf", " ", "S"))
+        program.initial_state = "q0"
+        program.final_states = {"qf"}
+
+        tm = TuringMachine(Tape("111"), program)
+        tm.run_with_checkpoints(self.path, max_steps=100, every_seconds=0.01)
+        resumed = TuringMachine.resume(self.path)
+        self.assertTrue(resumed.is_halted)
+        self.assertEqual(resumed.current_state, "qf")
+        self.assertEqual(resumed.tape.get_visible_tape(), tm.tape.get_visible_tape())
+
+    def test_bad_checkpoint_file(self):
+        """Тест чтения файла неверного формата"""
+        with open(self.path, "wb") as stream:
+            stream.write(b"NOPE")
+        with self.assertRaises(ValueError):
+            TuringMachine.resume(self.path)
+
+
+class TestMultiTape(unittest.TestCase):
+    """Тесты для многоленточной машины Тьюринга"""
+
+    PALINDROME = """
+initial copy
+final yes
+
+# Копирование входа на вторую ленту, возврат первой головки и сравнение
+copy a,_ -> copy a,a R,R
+copy b,_ -> copy b,b R,R
+copy _,_ -> back _,_ L,L
+back a,a -> back a,a L,S
+back a,b -> back a,b L,S
+back b,a -> back b,a L,S
+back b,b -> back b,b L,S
+back _,a -> check _,a R,S
+back _,b -> check _,b R,S
+check a,a -> check a,a R,L
+check b,b -> check b,b R,L
+check _,_ -> yes _,_ S,S
+"""
+
+    def create_machine(self, data: str, tape_class: type = Tape) -> MultiTapeTuringMachine:
+        """Машина с программой проверки палиндрома на двух лентах"""
+        program = MultiTapeProgram(2)
+        tapes = [tape_class(blank_symbol="_"), tape_class(blank_symbol="_")]
+        tm = MultiTapeTuringMachine(tapes, program, tape_class)
+        tm.load_program_from_stream(io.StringIO(self.PALINDROME + "===TAPE===\n" + data + "\n"))
+        return tm
+
+    def test_palindrome_linear_steps(self):
+        """Тест программы, которой на двух лентах нужно линейное число шагов"""
+        for tape_class in (Tape, ArrayTape):
+            for data, expected in (("abba", True), ("abab", False), ("a" * 500, True)):
+                with self.subTest(tape=tape_class.__name__, data=data[:10]):
+                    tm = self.create_machine(data, tape_class)
+                    self.assertEqual(tm.program.errors, [])
+                    tm.run(max_steps=10000)
+                    self.assertTrue(tm.is_halted)
+                    self.assertEqual(tm.current_state == "yes", expected)
+                    self.assertLessEqual(tm.step_count, 3 * len(data) + 3)
+
+    def test_step_matches_run(self):
+        """Тест совпадения пошагового выполнения и быстрого цикла"""
+        stepped = self.create_machine("abaaba")
+        fast = self.create_machine("abaaba")
+        while stepped.step():
+            pass
+        fast.run()
+        self.assertEqual(stepped.step_count, fast.step_count)
+        self.assertEqual(stepped.current_state, fast.current_state)
+        for first, second in zip(stepped.tapes, fast.tapes):
+            self.assertEqual(first.get_visible_tape(), second.get_visible_tape())
+
+    def test_rule_validation(self):
+        """Тест проверки числа лент в правилах"""
+        program = MultiTapeProgram(2)
+        rule = MultiTapeRule("q0", ("a", "b"), "q1", ("b", "a"), ("R", "L"))
+        program.add_rule(rule)
+        self.assertIs(program.get_rule("q0", ("a", "b")), rule)
+        self.assertEqual(str(rule), "q0 a,b -> q1 b,a R,L")
+        self.assertEqual(program.alphabet, {"a", "b"})
+
+        with self.assertRaises(ValueError):
+            MultiTapeRule("q0", ("a", "b"), "q1", ("b",), ("R", "L"))
+        with self.assertRaises(ValueError):
+            program.add_rule(MultiTapeRule("q0", ("a",), "q1", ("b",), ("R",)))
+        with self.assertRaises(ValueError):
+            MultiTapeTuringMachine([Tape()], program)
+
+        program.load_from_stream(io.StringIO("q0 a,b -> q1 b R,L\nq0 a,b -> q1 b,a X,L\n"))
+        self.assertEqual([line for line, _ in program.errors], [1, 2])
+
+    def test_leading_blanks_keep_tape_offset(self):
+        """Тест загрузки лент с пробелами в начале строки: содержимое не сдвигается к головке"""
+        for tape_class in (Tape, ArrayTape):
+            with self.subTest(tape=tape_class.__name__):
+                tm = MultiTapeTuringMachine(None, MultiTapeProgram(2), tape_class)
+                tm.load_program_from_stream(io.StringIO("initial q0\n===TAPE===\naa\n  b\n"))
+                first, second = tm.tapes
+                self.assertEqual(first.read(), "a")
+                self.assertEqual(second.read(), " ")
+                self.assertEqual(second.get_cells(second.head_position, second.head_position + 3),
+                                 [" ", " ", "b"])
+                self.assertEqual(second.min_position, second.head_position)
+
+    def test_unsupported_run_options(self):
+        """Тест явного отказа от режимов одноленточной машины"""
+        tm = self.create_machine("abba")
+        for options in ({"detect_loops": True}, {"profile": True}, {"trace": TraceBuffer()}):
+            with self.subTest(options=list(options)):
+                with self.assertRaises(ValueError):
+                    tm.run(max_steps=100, **options)
+        self.assertEqual(tm.step_count, 0)
+
+        tm.run(max_steps=100, accelerate=False)
+        self.assertEqual(tm.current_state, "yes")
+
+    def test_history_not_supported(self):
+        """Тест явного отказа от истории выполнения"""
+        tm = self.create_machine("abba")
+        with self.assertRaises(ValueError):
+            tm.enable_history(2)
+        self.assertIsNone(tm.history)
+
+    def test_logging_prints_all_tapes(self):
+        """Тест вывода состояния всех лент"""
+        tm = self.create_machine("aa")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tm.run(max_steps=2, log=True)
+        self.assertIn("Лента 2=", output.getvalue())
+        self.assertIn("Достигнуто максимальное число шагов: 2", output.getvalue())
+
+
+class TestProfiling(unittest.TestCase):
+    """Тесты для профилирования выполнения"""
+
+    def test_profile_counts(self):
+        """Тест счетчиков правил, состояний и позиций головки"""
+        program = Program()
+        program.add_rule(Rule("q0", "0", "q0", "1", "R"))
+        program.add_rule(Rule("q0", "1", "q0", "0", "R"))
+        program.add_rule(Rule("q0", " ", "q_final", " ", "S"))
+        program.final_states = {"q_final"}
+
+        tm = TuringMachine(Tape("10110"), program)
+        tm.run(profile=True)
+        profile = tm.profile
+
+        self.assertEqual(tm.tape.get_visible_tape(padding=0), "01001[ ]")
+        self.assertEqual(profile.steps, 6)
+        self.assertEqual([(str(rule), hits) for rule, hits in profile.hot_rules(2)],
+                         [("q0 1 -> q0 0 R", 3), ("q0 0 -> q0 1 R", 2)])
+        self.assertEqual(profile.state_dwell, {"q0": 6})
+        self.assertEqual(profile.head_histogram, {0: 1, 1: 1, 2: 1, 3: 1, 4: 1, 5: 1})
+        self.assertEqual(profile.tape_growth[-1], (6, 6))
+
+    def test_profile_matches_run_and_exports_json(self):
+        """Тест совпадения результата с обычным выполнением и отчета JSON"""
+        import json
+
+        expected = TuringMachine(Tape("0"), create_counter_program())
+        tm = TuringMachine(Tape("0"), create_counter_program())
+        with redirect_stdout(io.StringIO()):
+            expected.run(max_steps=5000)
+            tm.run(max_steps=5000, profile=True)
+
+        self.assertEqual(tm.tape.get_visible_tape(), expected.tape.get_visible_tape())
+        self.assertEqual(tm.current_state, expected.current_state)
+        self.assertEqual(len(tm.profile.tape_growth), 7)
+
+        report = json.loads(tm.profile.to_json())
+        self.assertEqual(report["steps"], 5000)
+        self.assertEqual(sum(item["hits"] for item in report["rule_hits"]), 5000)
+        self.assertEqual(sum(report["head_histogram"].values()), 5000)
+        self.assertGreater(report["steps_per_second"], 0)
+
+
+class TestTrace(unittest.TestCase):
+    """Тесты для трассировки выполнения"""
+
+    def expected_lines(self, steps: int, tape_class: type = Tape) -> list:
+        """Вывод print_state после каждого шага счетчика"""
+        tm = TuringMachine(tape_class("0"), create_counter_program())
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tm.print_state()
+            for _ in range(steps):
+                tm.step()
+                tm.print_state()
+        return output.getvalue().splitlines()
+
+    def test_log_output_matches_print_state(self):
+        """Тест совпадения вывода run(log=True) с пошаговым print_state"""
+        for tape_class in (Tape, ArrayTape):
+            with self.subTest(tape=tape_class.__name__):
+                tm = TuringMachine(tape_class("0"), create_counter_program())
+                output = io.StringIO()
+                with redirect_stdout(output):
+                    tm.run(max_steps=40, log=True)
+                lines = output.getvalue().splitlines()
+                self.assertEqual(lines[:-1], self.expected_lines(40, tape_class))
+                self.assertEqual(tm.trace.last_step, 40)
+
+    def test_log_output_streamed_in_chunks(self):
+        """Тест вывода длинного выполнения порциями: трасса не растет дольше одной порции"""
+        tm = TuringMachine(Tape("0"), create_counter_program())
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tm.run(max_steps=2500, log=True)
+        self.assertEqual(output.getvalue().splitlines()[:-1], self.expected_lines(2500))
+        self.assertEqual(tm.trace.last_step, 2500)
+        self.assertLessEqual(len(tm.trace.heads), 1000)
+
+    def test_log_large_alphabet(self):
+        """Тест вывода run(log=True) на ленте Tape с алфавитом больше 256 символов"""
+        symbols = [chr(0x100 + code) for code in range(299)]
+        program = Program()
+        for symbol in symbols:
+            program.add_rule(Rule("q0", symbol, "q0", symbol, "R"))
+        program.initial_state = "q0"
+
+        tm = TuringMachine(Tape("".join(symbols)), program)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tm.run(max_steps=10, log=True)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 12)
+        self.assertTrue(lines[10].startswith("Шаг 10: Состояние=q0"))
+        self.assertIn(f"[{symbols[10]}]", lines[10])
+
+    def test_reconstruct_any_step(self):
+        """Тест восстановления ленты и состояния произвольного шага"""
+        expected = self.expected_lines(200)
+        trace = TraceBuffer()
+        tm = TuringMachine(Tape("0"), create_counter_program())
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps=200, trace=trace)
+
+        for step in (0, 1, 57, 200):
+            self.assertEqual(f"Шаг {step}: Состояние={trace.state_at(step)}, Лента={trace.tape_at(step)}",
+                             expected[step])
+
+    def test_ring_buffer_keeps_last_steps(self):
+        """Тест кольцевого буфера"""
+        expected = self.expected_lines(300)
+        trace = TraceBuffer(capacity=50)
+        tm = TuringMachine(Tape("0"), create_counter_program())
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps=300, trace=trace)
+
+        self.assertEqual((trace.first_step, trace.last_step), (250, 300))
+        self.assertEqual(list(trace.format_steps()), expected[250:])
+        with self.assertRaises(ValueError):
+            trace.tape_at(100)
+
+    def test_file_writer_round_trip(self):
+        """Тест записи трассы в файл фоновым потоком"""
+        import tempfile
+
+        expected = self.expected_lines(1000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.trace")
+            tm = TuringMachine(Tape("0"), create_counter_program())
+            with redirect_stdout(io.StringIO()):
+                tm.run(max_steps=1000, trace=TraceFileWriter(path, batch_size=64))
+            trace = load_trace(path)
+
+        self.assertEqual(trace.last_step, 1000)
+        self.assertEqual(list(trace.format_steps(990)), expected[990:])
+
+
+class TestHistory(unittest.TestCase):
+    """Тесты для шагов назад по истории выполнения"""
+
+    def configuration(self, tm: TuringMachine) -> tuple:
+        """Конфигурация машины для сравнения"""
+        return (tm.step_count, tm.current_state, tm.tape.head_position,
+                tm.tape.get_visible_tape(), tm.is_halted)
+
+    def expected_configurations(self, steps: int, tape_class: type = Tape) -> list:
+        """Конфигурации счетчика после каждого шага без истории"""
+        tm = TuringMachine(tape_class("0"), create_counter_program())
+        configurations = [self.configuration(tm)]
+        for _ in range(steps):
+            tm.step()
+            configurations.append(self.configuration(tm))
+        return configurations
+
+    def test_step_back_matches_forward_run(self):
+        """Тест отмены шагов внутри и между снимками"""
+        for tape_class in (Tape, ArrayTape):
+            with self.subTest(tape=tape_class.__name__):
+                expected = self.expected_configurations(300, tape_class)
+                tm = TuringMachine(tape_class("0"), create_counter_program())
+                self.assertNotIn("step", vars(tm))  # Без истории шаг не проверяет журнал
+                tm.enable_history(snapshot_every=64)
+                with redirect_stdout(io.StringIO()):
+                    tm.run(max_steps=300)
+                self.assertEqual(self.configuration(tm), expected[300])
+
+                for step in range(299, 279, -1):
+                    self.assertTrue(tm.step_back())
+                    self.assertEqual(self.configuration(tm), expected[step])
+
+                for step in (200, 64, 63, 150, 0):
+                    tm.run_to(step)
+                    self.assertEqual(self.configuration(tm), expected[step])
+                self.assertFalse(tm.step_back())
+
+    def test_halting_run_can_be_rewound(self):
+        """Тест возврата из остановленного состояния"""
+        program = Program()
+        program.add_rule(Rule("q0", "1", "q0", "0", "R"))
+        program.add_rule(Rule("q0", " ", "q_final", " ", "S"))
+        program.final_states = {"q_final"}
+
+        tm = TuringMachine(Tape("111"), program)
+        tm.enable_history(snapshot_every=2)
+        tm.run_compiled()
+        self.assertTrue(tm.is_halted)
+        tm.run_to(1)
+        self.assertEqual((tm.current_state, tm.tape.get_visible_tape(padding=0)), ("q0", "0[1]1"))
+        self.assertFalse(tm.is_halted)
+        tm.run_to(10)
+        self.assertEqual((tm.step_count, tm.current_state), (4, "q_final"))
+
+    def test_history_memory_is_bounded(self):
+        """Тест ограничения числа снимков"""
+        tm = TuringMachine(Tape("0"), create_counter_program())
+        tm.enable_history(snapshot_every=100, max_snapshots=3)
+        with redirect_stdout(io.StringIO()):
+            tm.run(max_steps=1050)
+        self.assertEqual(len(tm.history.snapshots), 3)
+        self.assertLessEqual(len(tm.history.heads), 100)
+        self.assertEqual(tm.history.first_step, 800)
+
+        with self.assertRaises(ValueError):
+            tm.run_to(500)
+        with self.assertRaises(ValueError):
+            TuringMachine().step_back()
+
+
+class TestNondeterministic(unittest.TestCase):
+    """Тесты для недетерминированной машины Тьюринга"""
+
+    def create_machine(self, text: str) -> NondeterministicTuringMachine:
+        """Машина с программой из текста"""
+        program = NondeterministicProgram()
+        program.load_from_stream(io.StringIO(text))
+        self.assertEqual(program.errors, [])
+        return NondeterministicTuringMachine(program)
+
+    def test_guessing_program(self):
+        """Тест программы, угадывающей начало подстроки 11"""
+        tm = self.create_machine("""
+initial q0
+final yes
+q0 0 -> q0 0 R
+q0 1 -> q0 1 R
+q0 1 -> q1 1 R
+q1 1 -> yes 1 S
+""")
+        self.assertEqual(len(tm.program.get_rules("q0", "1")), 2)
+        self.assertEqual(tm.program.get_rule("q0", "1").next_state, "q0")
+
+        for strategy in ("bfs", "iddfs"):
+            with self.subTest(strategy=strategy):
+                result = tm.search("0101100", strategy=strategy)
+                self.assertTrue(result.accepted)
+                self.assertEqual((result.state, result.tape), ("yes", "0101100"))
+                self.assertFalse(tm.accepts("0101010", strategy=strategy))
+        self.assertEqual(tm.search("0101100").depth, 5)
+
+    def test_infinite_branches_and_deduplication(self):
+        """Тест бесконечных ветвей и отбрасывания повторных конфигураций"""
+        tm = self.create_machine("""
+initial q0
+final yes
+q0 a -> q0 a S
+q0 a -> q0 b S
+q0 b -> q0 a S
+q0 b -> q1 b R
+q1 -> q1 x R
+q1 -> q2 x L
+q2 x -> yes x S
+""")
+        result = tm.search("a")
+        self.assertTrue(result.accepted)
+        self.assertEqual(result.tape, "bxx")
+        self.assertLessEqual(result.configurations, 10)
+        self.assertTrue(tm.accepts("a", strategy="iddfs"))
+
+        # Ветвь, уходящая вправо без конца, не дает ответа
+        endless = self.create_machine("initial q0\nfinal yes\nq0 -> q0 a R\nq0 -> q0 b R\n")
+        self.assertIsNone(endless.search("", max_depth=12).accepted)
+        self.assertIsNone(endless.search("", max_depth=12, strategy="iddfs").accepted)
+        self.assertIsNone(endless.search("", max_depth=100, max_configurations=500).accepted)
+
+        with self.assertRaises(ValueError):
+            endless.search("", strategy="random")
+        with self.assertRaises(ValueError):
+            endless.program.compile()
+
+    def test_configurations_share_tape(self):
+        """Тест совпадения одинаковых конфигураций и общих частей ленты"""
+        tm = self.create_machine("initial q0\nq0 a -> q1 b R\nq0 a -> q1 c R\n")
+        first, second = tm.successors(tm.initial_configuration("aab"))
+        self.assertIs(first[3], second[3])  # Правая часть ленты не копируется
+        self.assertNotEqual(first, second)
+        self.assertEqual(tm.initial_configuration("ab  "), tm.initial_configuration("ab"))
+        self.assertEqual(hash(tm.initial_configuration("ab  ")), hash(tm.initial_configuration("ab")))
+
+
+class TestMinimize(unittest.TestCase):
+    """Тесты для минимизации программы"""
+
+    def create_program(self) -> Program:
+        """Инвертор с лишними состояниями и правилами"""
+        program = Program()
+        program.load_from_stream(io.StringIO("""
+initial even
+final done
+even 0 -> odd 1 R
+even 1 -> odd 0 R
+even _ -> done _ S
+odd 0 -> even 1 R
+odd 1 -> even 0 R
+odd _ -> done _ S
+done 0 -> done 0 R
+lost 0 -> lost 1 L
+lost 1 -> even 1 L
+"""))
+        for rule in list(program.rules):
+            if "_" in (rule.read_symbol, rule.write_symbol):
+                program.remove_rule(rule)
+                program.add_rule(Rule(rule.current_state, rule.read_symbol.replace("_", " "),
+                                      rule.next_state, rule.write_symbol.replace("_", " "), rule.direction))
+        return program
+
+    def test_minimize_report(self):
+        """Тест удаления недостижимых состояний и объединения эквивалентных"""
+        program = self.create_program()
+        report = program.minimize()
+
+        self.assertEqual(report["unreachable_states"], ["lost"])
+        self.assertEqual(report["dead_rules"], 3)
+        self.assertEqual(report["merged_states"], {"odd": "even"})
+        self.assertEqual((report["states_before"], report["states_after"]), (4, 2))
+        self.assertEqual((report["rules_before"], report["rules_after"]), (9, 3))
+        self.assertEqual(program.states, {"even", "done"})
+        self.assertEqual(program.get_rule("even", "0").next_state, "even")
+
+    def test_minimized_program_behaves_the_same(self):
+        """Тест совпадения результатов до и после минимизации"""
+        import random
+
+        original = self.create_program()
+        minimized = self.create_program()
+        minimized.minimize()
+
+        rng = random.Random(7)
+        for _ in range(20):
+            data = "".join(rng.choice("01") for _ in range(rng.randrange(1, 30)))
+            first = TuringMachine(Tape(data), original)
+            second = TuringMachine(Tape(data), minimized)
+            first.run()
+            second.run()
+            self.assertEqual(first.tape.get_visible_tape(), second.tape.get_visible_tape())
+            self.assertEqual((first.step_count, first.current_state),
+                             (second.step_count, second.current_state))
+
+    def test_initial_state_merged_with_smaller_name(self):
+        """Тест: начальное состояние остается представителем класса, даже если его имя не наименьшее"""
+        program = Program()
+        program.load_from_stream(io.StringIO("""
+initial start
+final stop
+start 0 -> a 1 R
+start 1 -> a 0 R
+a 0 -> start 1 R
+a 1 -> start 0 R
+"""))
+        program.add_rule(Rule("start", " ", "stop", " ", "S"))
+        program.add_rule(Rule("a", " ", "stop", " ", "S"))
+
+        report = program.minimize()
+        self.assertEqual(report["merged_states"], {"a": "start"})
+        self.assertEqual(program.initial_state, "start")
+        self.assertEqual(program.states, {"start", "stop"})
+        self.assertEqual(program.final_states, {"stop"})
+
+        tm = TuringMachine(Tape("0110"), program)
+        tm.run()
+        self.assertEqual(tm.current_state, "stop")
+        self.assertEqual(tm.tape.get_cells(0, 4), list("1001"))
+
+    def test_final_initial_state_keeps_rules(self):
+        """Тест: правила конечного начального состояния срабатывают на первом шаге и не удаляются"""
+        def run(program: Program) -> tuple:
+            tm = TuringMachine(Tape("11"), program)
+            tm.run()
+            return tm.step_count, tm.current_state, tm.tape.get_visible_tape(padding=0)
+
+        program = Program()
+        program.add_rule(Rule("q0", "1", "q0", "0", "R"))
+        program.add_rule(Rule("q0", " ", "q1", " ", "L"))
+        program.add_rule(Rule("q1", "0", "q0", "0", "S"))
+        program.initial_state = "q0"
+        program.final_states = {"q0"}
+
+        expected = run(program)
+        self.assertEqual(expected, (1, "q0", "0[1]"))
+        report = program.minimize()
+        self.assertEqual(report["dead_rules"], 0)
+        self.assertEqual(len(program.rules), 3)
+        self.assertEqual(run(program), expected)
+
+    def test_minimize_counter(self):
+        """Тест: одинаковые проходы вправо счетчика объединяются, остальные состояния - нет"""
+        program = create_counter_program()
+        report = program.minimize()
+        self.assertEqual(report["merged_states"], {"q2": "q0"})
+        self.assertEqual(report["rules_after"], 6)
+
+        expected = TuringMachine(Tape("0"), create_counter_program())
+        tm = TuringMachine(Tape("0"), program)
+        with redirect_stdout(io.StringIO()):
+            expected.run(max_steps=500)
+            tm.run(max_steps=500)
+        self.assertEqual(tm.tape.get_visible_tape(), expected.tape.get_visible_tape())
+
+
+class TestScheduler(unittest.TestCase):
+    """Тесты для асинхронного выполнения машин"""
+
+    def test_run_async_matches_run(self):
+        """Тест совпадения результата run_async и run"""
+
+        expected = TuringMachine(Tape("0"), create_counter_program())
+        tm = TuringMachine(Tape("0"), create_counter_program())
+        with redirect_stdout(io.StringIO()):
+            expected.run(max_steps=5000)
+        asyncio.run(tm.run_async(max_steps=5000, yield_every=300))
+        self.assertEqual(tm.step_count, 5000)
+        self.assertEqual(tm.tape.get_visible_tape(), expected.tape.get_visible_tape())
+
+    def test_short_machines_are_not_starved(self):
+        """Тест: короткие машины завершаются, пока длинная еще выполняется"""
+
+        async def scenario():
+            scheduler = MachineScheduler(slice_steps=100)
+            endless = scheduler.spawn(TuringMachine(Tape("0"), create_counter_program()),
+                                      max_steps=10 ** 9, name="endless")
+            short = [scheduler.spawn(TuringMachine(Tape("0"), create_counter_program()), max_steps=2000)
+                     for _ in range(20)]
+            await asyncio.gather(*(handle.task for handle in short))
+            steps_of_endless = endless.machine.step_count
+            endless.cancel()
+            await scheduler.join()
+            return steps_of_endless, endless, short
+
+        steps_of_endless, endless, short = asyncio.run(scenario())
+        self.assertLess(steps_of_endless, 3000)
+        self.assertEqual(endless.status, STATUS_CANCELLED)
+        self.assertTrue(all(handle.machine.step_count == 2000 for handle in short))
+
+    def test_pause_and_resume(self):
+        """Тест паузы и продолжения выполнения"""
+
+        async def scenario():
+            scheduler = MachineScheduler(slice_steps=50)
+            paused = scheduler.spawn(TuringMachine(Tape("0"), create_counter_program()), max_steps=1000)
+            paused.pause()
+            other = scheduler.spawn(TuringMachine(Tape("0"), create_counter_program()), max_steps=1000)
+            await other.task
+
+            status, steps = paused.status, paused.machine.step_count
+            paused.resume()
+            await scheduler.join()
+            return status, steps, paused
+
+        status, steps, paused = asyncio.run(scenario())
+        self.assertEqual((status, steps), (STATUS_PAUSED, 0))
+        self.assertEqual(paused.machine.step_count, 1000)
+
+
+class TestFuzz(unittest.TestCase):
+    """Тесты для проверки программ на случайных словах"""
+
+    def create_inverter(self) -> Program:
+        """Программа, заменяющая 0 на 1 и 1 на 0"""
+        program = Program()
+        program.add_rule(Rule("q0", "0", "q0", "1", "R"))
+        program.add_rule(Rule("q0", "1", "q0", "0", "R"))
+        program.add_rule(Rule("q0", " ", "halt", " ", "S"))
+        program.final_states = {"halt"}
+        return program
+
+    def test_matching_program(self):
+        """Тест программы, совпадающей с эталоном"""
+        def invert(data):
+            return data.translate(str.maketrans("01", "10"))
+
+        report = fuzz_program(self.create_inverter(), invert, cases=500, workers=2)
+        self.assertTrue(report.passed)
+        self.assertEqual(report.cases, 500)
+        self.assertGreater(report.cases_per_second, 0)
+
+    def test_mismatch_is_shrunk(self):
+        """Тест минимизации слова, на котором эталон расходится с программой"""
+        def buggy_invert(data):
+            inverted = data.translate(str.maketrans("01", "10"))
+            return inverted.replace("00", "01")
+
+        report = fuzz_program(self.create_inverter(), buggy_invert, cases=200, workers=1,
+                              max_failures=3)
+        self.assertFalse(report.passed)
+        self.assertEqual(len(report.failures), 3)
+        for failure in report.failures:
+            self.assertIn("11", failure.data)
+            self.assertEqual(failure.shrunk, "11")
+            self.assertEqual(failure.result.tape, "00")
+
+    def test_non_halting_program_fails(self):
+        """Тест программы, не останавливающейся за отведенное число шагов"""
+        program = Program()
+        program.add_rule(Rule("q0", "1", "q0", "1", "R"))
+        program.add_rule(Rule("q0", " ", "q0", " ", "S"))
+
+        report = fuzz_program(program, lambda data: data, cases=20, max_steps=100, workers=1)
+        self.assertFalse(report.passed)
+        self.assertEqual(report.failures[0].shrunk, "")
+
+
 class TestIntegration(unittest.TestCase):
     """Интеграционные тесты"""
 